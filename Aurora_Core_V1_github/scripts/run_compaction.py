@@ -0,0 +1,36 @@
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.pipeline.aurora_memory.pipeline.compaction import format_report, run_compaction
+from aurora_core.pipeline.aurora_memory.pipeline.ingest_pipeline import NamespaceLockedError
+from aurora_core.utils.namespaces import DEFAULT_NAMESPACE
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="expira, promove e consolida memorias short_term")
+    parser.add_argument("--dry-run", action="store_true", help="apenas mostra o que seria feito")
+    parser.add_argument("--use-model", action="store_true", help="consolida grupos com o modelo de memoria")
+    parser.add_argument("--delete", action="store_true", help="apaga em vez de mover para memory/archive/")
+    parser.add_argument("--namespace", default=DEFAULT_NAMESPACE, help="tenant em memory/tenants/<ns>/")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    try:
+        report = run_compaction(
+            use_model=args.use_model,
+            dry_run=args.dry_run,
+            delete=args.delete,
+            namespace=args.namespace,
+        )
+    except NamespaceLockedError as e:
+        print(f"[ERRO] {e}", file=sys.stderr)
+        sys.exit(1)
+    print(format_report(report, dry_run=args.dry_run))
@@ -1,4 +1,5 @@
 from pathlib import Path
+import argparse
 import sys
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -6,8 +7,49 @@ SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
-from aurora_core.pipeline.aurora_memory.pipeline.ingest_pipeline import run_pipeline
+from aurora_core.pipeline.aurora_memory.pipeline.ingest_pipeline import (
+    MEMORY_DIR,
+    NamespaceLockedError,
+    run_pipeline,
+)
+from aurora_core.pipeline.aurora_memory.pipeline.metrics import run_profiled
+from aurora_core.utils.namespaces import DEFAULT_NAMESPACE, namespace_path
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--full", action="store_true", help="reprocessa todos os arquivos")
+    parser.add_argument("--resume", action="store_true", help="continua uma execucao interrompida")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--namespace",
+        default=DEFAULT_NAMESPACE,
+        help="tenant: le data/tenants/<ns>/ e grava em memory/tenants/<ns>/",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="salva cProfile e tracemalloc da execucao em memory/profile/",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    args = _parse_args()
+
+    def run():
+        run_pipeline(
+            workers=args.workers,
+            incremental=not args.full,
+            resume=args.resume,
+            namespace=args.namespace,
+        )
+
+    try:
+        if args.profile:
+            run_profiled(run, namespace_path(MEMORY_DIR, args.namespace) / "profile")
+        else:
+            run()
+    except NamespaceLockedError as e:
+        print(f"[ERRO] {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,52 @@
+import argparse
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.pipeline.aurora_memory.pipeline.daemon import (
+    BATCH_MAX_LATENCY_S,
+    SOCKET_PORT,
+    IngestDaemon,
+    SegmentServer,
+    read_stdin,
+)
+from aurora_core.pipeline.aurora_memory.pipeline.ingest_pipeline import NamespaceLockedError
+from aurora_core.utils.namespaces import DEFAULT_NAMESPACE
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ingestao continua: observa data/ e recebe segmentos")
+    parser.add_argument("--namespace", default=DEFAULT_NAMESPACE, help="tenant em data/tenants/<ns>/")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-latency", type=float, default=BATCH_MAX_LATENCY_S, help="segundos ate processar um lote")
+    parser.add_argument("--port", type=int, default=SOCKET_PORT, help="porta local para segmentos (0 desativa)")
+    parser.add_argument("--stdin", action="store_true", help="le um segmento por linha da entrada padrao e sai no EOF")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    daemon = IngestDaemon(namespace=args.namespace, workers=args.workers, max_latency_s=args.max_latency)
+    server = None
+    if args.port:
+        server = SegmentServer(daemon, port=args.port)
+        threading.Thread(target=server.serve_forever, name="ingest-socket", daemon=True).start()
+        print(f"Recebendo segmentos em 127.0.0.1:{args.port} (um por linha)")
+    if args.stdin:
+        threading.Thread(target=read_stdin, args=(daemon,), name="ingest-stdin", daemon=True).start()
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        print("\nIngestao continua encerrada.")
+    except NamespaceLockedError as e:
+        print(f"[ERRO] {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
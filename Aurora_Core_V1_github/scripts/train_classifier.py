@@ -0,0 +1,29 @@
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.pipeline.aurora_memory.ai.local_classifier import (
+    LOCAL_THRESHOLD,
+    format_report,
+    train,
+)
+from aurora_core.pipeline.aurora_memory.pipeline.ingest_pipeline import _paths
+from aurora_core.utils.namespaces import DEFAULT_NAMESPACE
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="retreina o classificador local a partir do ingest_log.jsonl")
+    parser.add_argument("--threshold", type=float, default=LOCAL_THRESHOLD, help="limiar destacado no relatorio")
+    parser.add_argument("--namespace", default=DEFAULT_NAMESPACE, help="tenant em memory/tenants/<ns>/")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    paths = _paths(args.namespace)
+    print(format_report(train(paths["log"], paths["memory"], paths["local_classifier"], args.threshold)))
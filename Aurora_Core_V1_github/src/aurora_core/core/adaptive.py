@@ -0,0 +1,168 @@
+import json
+import math
+import os
+from collections import deque
+from datetime import UTC, datetime
+from pathlib import Path
+
+from aurora_core.memory.loader import MEMORY_DIR
+from aurora_core.utils.namespaces import rebase
+
+# Adaptive context sizing for --mode auto / '/mode auto'. The settings move
+# along a ladder of LEVELS steps between MODES["fast"] (level 0) and
+# MODES["precise"] (top level): numeric limits (top_k, item limits, chars per
+# item, context budget) are interpolated, switches flip at SWITCH_AT.
+# After each turn the p95 time-to-first-token (and, optionally, p95 prompt
+# size) of the recent turns at the current level is compared with the target:
+# - above target: one level down
+# - below UP_MARGIN * target: one level up
+# At least MIN_SAMPLES turns are needed at a level before it changes again.
+# Every turn's decision is appended to memory/core_decisions.jsonl (the
+# namespace's copy under memory/tenants/<ns>/, see decisions_path).
+# What can be changed without editing business logic:
+# - AURORA_CORE_TARGET_P95_S: time-to-first-token target (seconds)
+# - AURORA_CORE_TARGET_PROMPT_CHARS: prompt size target (0 = latency only)
+# - LEVELS / WINDOW / MIN_SAMPLES / UP_MARGIN / SWITCH_AT
+TARGET_P95_S = float(os.getenv("AURORA_CORE_TARGET_P95_S", "2.5"))
+TARGET_PROMPT_CHARS = int(os.getenv("AURORA_CORE_TARGET_PROMPT_CHARS", "0"))
+LEVELS = 5
+WINDOW = 20
+MIN_SAMPLES = 3
+UP_MARGIN = 0.7
+# Fraction of the way to precise at which a boolean setting takes its precise value.
+SWITCH_AT = {"use_search": 0.25, "include_canonical": 0.5}
+DECISIONS_PATH = MEMORY_DIR / "core_decisions.jsonl"
+
+
+def decisions_path(namespace: str | None = None) -> Path:
+    return rebase(DECISIONS_PATH, MEMORY_DIR, namespace)
+
+
+def build_levels(
+    fast: dict,
+    precise: dict,
+    fast_budget: int,
+    precise_budget: int,
+    levels: int = LEVELS,
+) -> list[dict]:
+    """
+    Settings from fast (index 0) to precise (last index). max_context_chars
+    is the context budget of each level.
+    """
+    ladder = []
+    for i in range(levels):
+        f = i / (levels - 1) if levels > 1 else 1.0
+        settings = {}
+        for key, low in fast.items():
+            high = precise.get(key, low)
+            if isinstance(low, bool):
+                settings[key] = high if f >= SWITCH_AT.get(key, 0.5) else low
+            else:
+                settings[key] = round(low + (high - low) * f)
+        settings["max_context_chars"] = round(fast_budget + (precise_budget - fast_budget) * f)
+        ladder.append(settings)
+    return ladder
+
+
+def _p95(values: list[float]) -> float:
+    # Nearest-rank percentile.
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+class AdaptiveController:
+    def __init__(
+        self,
+        levels: list[dict],
+        target_p95_s: float = TARGET_P95_S,
+        target_prompt_chars: int = TARGET_PROMPT_CHARS,
+        level: int | None = None,
+        log_path: Path | None = DECISIONS_PATH,
+    ) -> None:
+        self.levels = levels
+        self.target_p95_s = target_p95_s
+        self.target_prompt_chars = target_prompt_chars
+        # Starts at precise: an idle system can afford it until latency says otherwise.
+        self.level = len(levels) - 1 if level is None else level
+        self.log_path = log_path
+        self.samples: deque = deque(maxlen=WINDOW)
+        self.turn = 0
+
+    def settings(self) -> dict:
+        return dict(self.levels[self.level])
+
+    def _decide(self, p95_s: float, p95_prompt: float) -> tuple[str, str]:
+        if len(self.samples) < MIN_SAMPLES:
+            return "hold", f"{len(self.samples)}/{MIN_SAMPLES} amostras no nivel"
+        prompt_target = self.target_prompt_chars
+        if p95_s > self.target_p95_s or (prompt_target and p95_prompt > prompt_target):
+            if self.level == 0:
+                return "hold", "acima da meta no nivel minimo"
+            if p95_s > self.target_p95_s:
+                return "down", f"p95 {p95_s:.2f}s > meta {self.target_p95_s:.2f}s"
+            return "down", f"p95 prompt {p95_prompt:.0f} > meta {prompt_target} caracteres"
+        below = p95_s <= UP_MARGIN * self.target_p95_s and (
+            not prompt_target or p95_prompt <= UP_MARGIN * prompt_target
+        )
+        if below and self.level < len(self.levels) - 1:
+            return "up", f"p95 {p95_s:.2f}s <= {UP_MARGIN:.0%} da meta"
+        return "hold", "dentro da meta"
+
+    def record(self, latency_s: float, prompt_chars: int) -> dict:
+        """
+        Account one turn and decide the level of the next one.
+        """
+        self.turn += 1
+        self.samples.append((latency_s, prompt_chars))
+        p95_s = _p95([s[0] for s in self.samples])
+        p95_prompt = _p95([s[1] for s in self.samples])
+        action, reason = self._decide(p95_s, p95_prompt)
+        previous = self.level
+        if action != "hold":
+            self.level += 1 if action == "up" else -1
+            # Older samples were taken with a different context size.
+            self.samples.clear()
+        decision = {
+            "ts": datetime.now(UTC).isoformat(),
+            "turn": self.turn,
+            "action": action,
+            "reason": reason,
+            "level_from": previous,
+            "level": self.level,
+            "latency_s": round(latency_s, 3),
+            "prompt_chars": prompt_chars,
+            "p95_s": round(p95_s, 3),
+            "p95_prompt_chars": p95_prompt,
+            "target_p95_s": self.target_p95_s,
+            "settings": self.settings(),
+        }
+        self._log(decision)
+        return decision
+
+    def _log(self, decision: dict) -> None:
+        if self.log_path is None:
+            return
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.log_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(decision, ensure_ascii=True) + "\n")
+        except OSError:
+            # The audit log must never break a turn.
+            pass
+
+    def status(self) -> str:
+        s = self.settings()
+        return (
+            f"[auto] nivel {self.level}/{len(self.levels) - 1}: top_k={s.get('top_k')}, "
+            f"short_term={s.get('short_term_limit')}, long_term={s.get('long_term_limit')}, "
+            f"canonico={'sim' if s.get('include_canonical') else 'nao'}, "
+            f"contexto<={s['max_context_chars']} caracteres (meta p95 {self.target_p95_s:.2f}s)"
+        )
+
+
+def measure_turn(started: float, first_output: float, ended: float) -> float:
+    """
+    Time-to-first-token of a turn; the full turn time when nothing was
+    marked during it (routes that do not call the model).
+    """
+    return first_output - started if started <= first_output <= ended else ended - started
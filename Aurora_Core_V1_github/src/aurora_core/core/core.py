@@ -2,8 +2,11 @@ import argparse
 import time
 import os
 from aurora_core.memory.loader import build_memory_context
+from aurora_core.utils.namespaces import DEFAULT_NAMESPACE, validate_namespace
 from aurora_core.decision_layer.router import decide_route
-from aurora_core.decision_layer.executors import execute_route
+from aurora_core.decision_layer.executors import build_cache_key, execute_route, first_output_at
+from aurora_core.core.adaptive import AdaptiveController, build_levels, decisions_path, measure_turn
+from aurora_core.core.warmup import WarmUp
 
 # ===============================
 # OLLAMA CONFIG
@@ -12,13 +15,19 @@ from aurora_core.decision_layer.executors import execute_route
 # What can be changed without editing business logic:
 # - AURORA_CORE_MODEL: model used by core/router/executors
 # - --mode fast|precise: tradeoff between latency and context quality
+# - --mode auto: context sized turn by turn against AURORA_CORE_TARGET_P95_S (see core.adaptive)
 # - MODES values below: limits, refresh interval and search behavior
+# - --response-cache / AURORA_RESPONSE_CACHE=1: replay cached answers for repeated questions
+# - --no-warmup / AURORA_CORE_WARMUP=0: skip preloading index, caches and model at startup
+# - --namespace / AURORA_NAMESPACE: tenant whose memory is used (memory/tenants/<ns>/)
 CORE_MODEL_NAME = os.getenv("AURORA_CORE_MODEL", "aurora-nucleo:latest")
 
 # Performance modes
 STREAM_RESPONSES = True
 USE_CONTEXT_CACHE = True
 REFRESH_EVERY = 5
+USE_RESPONSE_CACHE = os.getenv("AURORA_RESPONSE_CACHE", "0") == "1"
+USE_WARMUP = os.getenv("AURORA_CORE_WARMUP", "1") == "1"
 
 MODES = {
     # Fast mode: minimal context, lower latency.
@@ -44,26 +53,89 @@ MODES = {
 }
 
 ACTIVE_MODE = "fast"
+ACTIVE_NAMESPACE = DEFAULT_NAMESPACE
 FAST_MAX_CONTEXT_CHARS = 800
+# Context budget of the top level of auto mode (precise itself is unbounded).
+PRECISE_MAX_CONTEXT_CHARS = 6000
+MODE_CHOICES = [*MODES, "auto"]
+
+_WARMUP: WarmUp | None = None
+_ADAPTIVE: AdaptiveController | None = None
 
 # ===============================
 # CHAT WITH MEMORY
 # ===============================
 
-def ask_aurora(user_input: str) -> str:
+def _wait_for_memory() -> None:
+    # A turn sent during warm-up waits for the index instead of racing it.
+    if _WARMUP is not None:
+        _WARMUP.wait_memory()
+
+
+def _adaptive() -> AdaptiveController:
+    global _ADAPTIVE
+    if _ADAPTIVE is None:
+        levels = build_levels(MODES["fast"], MODES["precise"], FAST_MAX_CONTEXT_CHARS, PRECISE_MAX_CONTEXT_CHARS)
+        _ADAPTIVE = AdaptiveController(levels, log_path=decisions_path(ACTIVE_NAMESPACE))
+    return _ADAPTIVE
+
+
+def _mode_config() -> tuple[dict, int | None]:
     """
-    Send user input to the model with memory context.
+    Settings of the active mode and its context budget (None = unbounded).
     """
-    route = decide_route(user_input)
-    mode_cfg = MODES.get(ACTIVE_MODE, MODES["fast"])
+    if ACTIVE_MODE == "auto":
+        settings = _adaptive().settings()
+        return settings, settings.pop("max_context_chars")
+    if ACTIVE_MODE == "fast":
+        return MODES["fast"], FAST_MAX_CONTEXT_CHARS
+    return MODES.get(ACTIVE_MODE, MODES["fast"]), None
+
+
+def _build_context(user_input: str) -> str:
+    mode_cfg, budget = _mode_config()
     memory_kwargs = {k: v for k, v in mode_cfg.items() if k not in {"refresh_every", "use_search"}}
+    memory_kwargs["namespace"] = ACTIVE_NAMESPACE
     if mode_cfg.get("use_search") is False:
         memory_kwargs["query"] = None
     if "query" not in memory_kwargs:
         memory_kwargs["query"] = user_input
+    _wait_for_memory()
     memory_context = build_memory_context(**memory_kwargs)
-    if ACTIVE_MODE == "fast" and len(memory_context) > FAST_MAX_CONTEXT_CHARS:
-        memory_context = memory_context[:FAST_MAX_CONTEXT_CHARS] + "..."
+    if budget is not None and len(memory_context) > budget:
+        memory_context = memory_context[:budget] + "..."
+    return memory_context
+
+
+def _record_turn(started: float, ended: float, prompt: str) -> dict | None:
+    # Auto mode only: feeds the controller and reports level changes.
+    if ACTIVE_MODE != "auto":
+        return None
+    decision = _adaptive().record(measure_turn(started, first_output_at(), ended), len(prompt))
+    if decision["action"] != "hold":
+        print(f"[auto] nivel {decision['level_from']} -> {decision['level']} ({decision['reason']})")
+    return decision
+
+
+def _response_cache_key(route: dict, user_input: str, memory_context: str) -> str | None:
+    if not USE_RESPONSE_CACHE:
+        return None
+    return build_cache_key(
+        route.get("route", "chat"),
+        route.get("mode", "natural"),
+        user_input,
+        memory_context,
+    )
+
+
+def ask_aurora(user_input: str) -> str:
+    """
+    Send user input to the model with memory context.
+    """
+    # The turn is timed from here: a slow context build counts against auto mode.
+    started = time.perf_counter()
+    route = decide_route(user_input)
+    memory_context = _build_context(user_input)
 
     prompt = f"""
 Voce e Aurora, a IA nucleo do Eclipse Archives.
@@ -83,30 +155,57 @@ ROTA: {route.get('route', 'chat')} (motivo: {route.get('reason', 'n/a')})
 RESPONDA DE FORMA CLARA, TECNICA E OBJETIVA:
 """
 
-    return execute_route(route.get("route", "chat"), prompt, user_input, stream=STREAM_RESPONSES)
+    answer = execute_route(
+        route.get("route", "chat"),
+        prompt,
+        user_input,
+        stream=STREAM_RESPONSES,
+        cache_key=_response_cache_key(route, user_input, memory_context),
+        namespace=ACTIVE_NAMESPACE,
+    )
+    _record_turn(started, time.perf_counter(), prompt)
+    return answer
 
 
 # ===============================
 # MAIN LOOP
 # ===============================
 
-def _parse_args() -> str:
+def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--mode", choices=MODES.keys(), default=ACTIVE_MODE)
+    parser.add_argument("--mode", choices=MODE_CHOICES, default=ACTIVE_MODE)
+    parser.add_argument("--response-cache", action="store_true", default=USE_RESPONSE_CACHE)
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false", default=USE_WARMUP)
+    parser.add_argument("--namespace", default=ACTIVE_NAMESPACE)
     args, _ = parser.parse_known_args()
-    return args.mode
+    return args
 
 
 def main():
     print("Eclipse Archives - Core iniciado")
     print("Digite 'exit' para sair\n")
-    global ACTIVE_MODE
-    ACTIVE_MODE = _parse_args()
+    global ACTIVE_MODE, ACTIVE_NAMESPACE, USE_RESPONSE_CACHE, _WARMUP
+    args = _parse_args()
+    ACTIVE_MODE = args.mode
+    ACTIVE_NAMESPACE = validate_namespace(args.namespace)
+    USE_RESPONSE_CACHE = args.response_cache
     print(f"Modo inicial: {ACTIVE_MODE}")
     print(f"Modelo core: {CORE_MODEL_NAME}")
+    if ACTIVE_NAMESPACE:
+        print(f"Namespace: {ACTIVE_NAMESPACE}")
     if USE_CONTEXT_CACHE:
         print("Cache de contexto ativo. Use '/refresh' para atualizar.")
-    print("Modos: /mode fast | /mode precise\n")
+    if USE_RESPONSE_CACHE:
+        print("Cache de respostas ativo.")
+    print("Modos: /mode fast | /mode precise | /mode auto")
+    if args.warmup:
+        _WARMUP = WarmUp(
+            load_response_cache=USE_RESPONSE_CACHE,
+            namespace=ACTIVE_NAMESPACE,
+            on_ready=lambda w: print(f"\n{w.status()}\nVoce: ", end="", flush=True),
+        ).start()
+        print("Aquecendo indice, caches e modelo em segundo plano. Use '/status' para acompanhar.")
+    print()
 
     cached_context = ""
     since_refresh = 0
@@ -123,24 +222,21 @@ def main():
             break
         if user_input.lower().startswith("/mode"):
             parts = user_input.split()
-            if len(parts) >= 2 and parts[1] in MODES:
+            if len(parts) >= 2 and parts[1] in MODE_CHOICES:
                 ACTIVE_MODE = parts[1]
                 cached_context = ""
                 since_refresh = 0
                 print(f"Modo alterado para: {ACTIVE_MODE}")
             else:
-                print("Use: /mode fast | /mode precise")
+                print("Use: /mode fast | /mode precise | /mode auto")
+            continue
+        if user_input.lower() == "/status":
+            print(_WARMUP.status() if _WARMUP is not None else "[warm-up] desativado")
+            if ACTIVE_MODE == "auto":
+                print(_adaptive().status())
             continue
         if user_input.lower() in {"/refresh", "refresh"}:
-            mode_cfg = MODES.get(ACTIVE_MODE, MODES["fast"])
-            memory_kwargs = {k: v for k, v in mode_cfg.items() if k not in {"refresh_every", "use_search"}}
-            if mode_cfg.get("use_search") is False:
-                memory_kwargs["query"] = None
-            if "query" not in memory_kwargs:
-                memory_kwargs["query"] = user_input
-            cached_context = build_memory_context(**memory_kwargs)
-            if ACTIVE_MODE == "fast" and len(cached_context) > FAST_MAX_CONTEXT_CHARS:
-                cached_context = cached_context[:FAST_MAX_CONTEXT_CHARS] + "..."
+            cached_context = _build_context(user_input)
             since_refresh = 0
             print("Contexto atualizado.")
             continue
@@ -148,17 +244,11 @@ def main():
         if not user_input:
             continue
         if USE_CONTEXT_CACHE:
-            mode_cfg = MODES.get(ACTIVE_MODE, MODES["fast"])
-            memory_kwargs = {k: v for k, v in mode_cfg.items() if k not in {"refresh_every", "use_search"}}
-            if mode_cfg.get("use_search") is False:
-                memory_kwargs["query"] = None
+            start = time.perf_counter()
+            mode_cfg, _budget = _mode_config()
             refresh_every = mode_cfg.get("refresh_every", REFRESH_EVERY)
             if not cached_context or since_refresh >= refresh_every:
-                if "query" not in memory_kwargs:
-                    memory_kwargs["query"] = user_input
-                cached_context = build_memory_context(**memory_kwargs)
-                if ACTIVE_MODE == "fast" and len(cached_context) > FAST_MAX_CONTEXT_CHARS:
-                    cached_context = cached_context[:FAST_MAX_CONTEXT_CHARS] + "..."
+                cached_context = _build_context(user_input)
                 since_refresh = 0
             since_refresh += 1
             route = decide_route(user_input)
@@ -180,12 +270,23 @@ ROTA: {route.get('route', 'chat')} (motivo: {route.get('reason', 'n/a')})
 RESPONDA DE FORMA CLARA, TECNICA E OBJETIVA:
 """
             print("\nAurora: ", end="", flush=True)
-            start = time.perf_counter()
-            resposta = execute_route(route.get("route", "chat"), prompt, user_input, stream=STREAM_RESPONSES)
+            resposta = execute_route(
+                route.get("route", "chat"),
+                prompt,
+                user_input,
+                stream=STREAM_RESPONSES,
+                cache_key=_response_cache_key(route, user_input, cached_context),
+                namespace=ACTIVE_NAMESPACE,
+            )
             end = time.perf_counter()
             if resposta:
                 print(resposta, end="", flush=True)
             print(f"\n[tempo_resposta_s={end - start:.3f}]")
+            decision = _record_turn(start, end, prompt)
+            if decision is not None and decision["action"] != "hold":
+                # The next turn rebuilds the context at the new level.
+                cached_context = ""
+                since_refresh = 0
             print("\n")
         else:
             start = time.perf_counter()
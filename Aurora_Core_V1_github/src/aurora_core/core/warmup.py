@@ -0,0 +1,78 @@
+import threading
+import time
+
+from aurora_core.decision_layer import response_cache
+from aurora_core.decision_layer.executors import preload_model
+from aurora_core.memory.loader import build_memory_index, get_or_build_canonical_memory
+
+# Startup warm-up, run in a background thread while the prompt already
+# accepts input:
+# 1. memory index (rebuilt only if stale) and canonical summaries
+# 2. response cache file (when the cache is enabled)
+# 3. core model loaded by Ollama with an empty prompt and pinned by keep_alive
+# The first turn only waits for steps 1-2; a turn sent before the model is
+# loaded simply queues behind the preload in Ollama.
+CANONICAL_TYPES = ("identity", "long_term")
+
+
+class WarmUp:
+    def __init__(
+        self,
+        load_response_cache: bool = False,
+        preload: bool = True,
+        on_ready=None,
+        namespace: str | None = None,
+    ) -> None:
+        self.load_response_cache = load_response_cache
+        self.preload = preload
+        self.on_ready = on_ready
+        self.namespace = namespace
+        self.memory_ready = threading.Event()
+        self.done = threading.Event()
+        self.steps: dict[str, str] = {}
+        self.started = 0.0
+        self.elapsed: float | None = None
+        self._thread = threading.Thread(target=self._run, name="core-warmup", daemon=True)
+
+    def start(self) -> "WarmUp":
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _step(self, name: str, fn) -> None:
+        started = time.perf_counter()
+        try:
+            result = fn()
+        except (OSError, ValueError, RuntimeError) as e:
+            result = f"erro: {e}"
+        took = time.perf_counter() - started
+        self.steps[name] = f"{result} ({took:.2f}s)" if isinstance(result, str) else f"ok ({took:.2f}s)"
+
+    def _run(self) -> None:
+        try:
+            self._step("indice", lambda: f"{build_memory_index(namespace=self.namespace).get('count', 0)} itens")
+            for mem_type in CANONICAL_TYPES:
+                self._step(
+                    f"resumo {mem_type}",
+                    lambda t=mem_type: f"{len(get_or_build_canonical_memory(t, self.namespace))} caracteres",
+                )
+            if self.load_response_cache:
+                self._step("cache de respostas", lambda: f"{response_cache.preload(self.namespace)} respostas")
+        finally:
+            self.memory_ready.set()
+        try:
+            if self.preload:
+                self._step("modelo", lambda: preload_model() or "carregado")
+        finally:
+            self.elapsed = time.perf_counter() - self.started
+            self.done.set()
+            if self.on_ready is not None:
+                self.on_ready(self)
+
+    def wait_memory(self, timeout: float | None = None) -> bool:
+        return self.memory_ready.wait(timeout)
+
+    def status(self) -> str:
+        state = f"pronto em {self.elapsed:.2f}s" if self.done.is_set() else "em andamento"
+        details = ", ".join(f"{name}: {value}" for name, value in self.steps.items())
+        return f"[warm-up] {state}" + (f" - {details}" if details else "")
@@ -3,33 +3,74 @@ from __future__ import annotations
 import json
 import http.client
 import os
-from typing import Callable
+import time
+from collections.abc import Callable, Iterator
+
+from aurora_core.utils.singleflight import SingleFlight
+from . import response_cache
+from .tabular import run_tabular_request
 
 OLLAMA_HOST = "127.0.0.1"
 OLLAMA_PORT = 11434
 # Change AURORA_CORE_MODEL to switch the model used by chat execution.
 MODEL_NAME = os.getenv("AURORA_CORE_MODEL", "aurora-nucleo:latest")
+# How long Ollama keeps the core model loaded after each request (and after
+# the warm-up preload, see core.warmup).
+KEEP_ALIVE = os.getenv("AURORA_CORE_KEEP_ALIVE", "30m")
+PRELOAD_TIMEOUT_S = 300
+# Longest wait for the next bytes of an answer. Identical calls share one
+# request (see _call_llm), so a hung one must fail instead of holding every
+# caller waiting on it.
+GENERATE_TIMEOUT_S = 300
+
+_INFLIGHT = SingleFlight()
+# perf_counter() of the last answer's first output (streamed chunk, full
+# answer or cached replay); core.adaptive measures time-to-first-token with it.
+_first_output_at = 0.0
+
+
+def first_output_at() -> float:
+    return _first_output_at
+
+
+def _mark_first_output() -> None:
+    global _first_output_at
+    _first_output_at = time.perf_counter()
 
 
-def _call_llm(prompt: str, stream: bool = False) -> str:
+class _LLMError(Exception):
+    pass
+
+
+def _open_generate(conn: http.client.HTTPConnection, prompt: str, stream: bool):
     payload = json.dumps({
         "model": MODEL_NAME,
         "prompt": prompt,
-        "stream": stream
+        "stream": stream,
+        "keep_alive": KEEP_ALIVE,
     })
     headers = {"Content-Type": "application/json"}
-    conn = http.client.HTTPConnection(OLLAMA_HOST, OLLAMA_PORT)
+    conn.request("POST", "/api/generate", payload, headers)
+    response = conn.getresponse()
+    if response.status != 200:
+        raise _LLMError(f"Erro HTTP {response.status}: {response.reason}")
+    return response
+
+
+def _generate(prompt: str) -> str:
+    conn = http.client.HTTPConnection(OLLAMA_HOST, OLLAMA_PORT, timeout=GENERATE_TIMEOUT_S)
     try:
-        conn.request("POST", "/api/generate", payload, headers)
-        response = conn.getresponse()
-        if response.status != 200:
-            return f"Erro HTTP {response.status}: {response.reason}"
-        if not stream:
-            data = json.loads(response.read().decode("utf-8"))
-            return data.get("response", "").strip()
+        response = _open_generate(conn, prompt, stream=False)
+        data = json.loads(response.read().decode("utf-8"))
+        return data.get("response", "").strip()
+    finally:
+        conn.close()
 
-        text = ""
-        printed = False
+
+def _generate_stream(prompt: str) -> Iterator[str]:
+    conn = http.client.HTTPConnection(OLLAMA_HOST, OLLAMA_PORT, timeout=GENERATE_TIMEOUT_S)
+    try:
+        response = _open_generate(conn, prompt, stream=True)
         for line in response:
             try:
                 obj = json.loads(line.decode("utf-8"))
@@ -37,20 +78,91 @@ def _call_llm(prompt: str, stream: bool = False) -> str:
                 continue
             chunk = obj.get("response", "")
             if chunk:
-                print(chunk, end="", flush=True)
-                text += chunk
-                printed = True
+                yield chunk
+    finally:
+        conn.close()
+
+
+def preload_model() -> str | None:
+    """
+    Load MODEL_NAME into memory with an empty prompt (no tokens generated)
+    so the first chat turn does not pay for it. Returns an error or None.
+    """
+    payload = json.dumps({"model": MODEL_NAME, "prompt": "", "stream": False, "keep_alive": KEEP_ALIVE})
+    headers = {"Content-Type": "application/json"}
+    conn = http.client.HTTPConnection(OLLAMA_HOST, OLLAMA_PORT, timeout=PRELOAD_TIMEOUT_S)
+    try:
+        conn.request("POST", "/api/generate", payload, headers)
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            return f"Erro HTTP {response.status}: {response.reason}"
+        return None
+    except (OSError, http.client.HTTPException) as e:
+        return f"Erro de comunicacao: {e}"
+    finally:
+        conn.close()
+
+
+def _call_llm(prompt: str, stream: bool = False, capture: list[str] | None = None) -> str:
+    # Identical prompts in flight at the same time share one upstream request;
+    # streamed chunks are fanned out to every waiting caller.
+    try:
+        if not stream:
+            text = _INFLIGHT.do(("generate", MODEL_NAME, prompt), lambda: _generate(prompt))
+            _mark_first_output()
+            if capture is not None and text:
+                capture.append(text)
+            return text
+
+        text = ""
+        printed = False
+        for chunk in _INFLIGHT.stream(("stream", MODEL_NAME, prompt), lambda: _generate_stream(prompt)):
+            if not printed:
+                _mark_first_output()
+            print(chunk, end="", flush=True)
+            text += chunk
+            printed = True
         if printed:
+            if capture is not None:
+                capture.append(text)
             return ""
         return "Erro: resposta vazia do modelo (stream sem chunks)."
+    except _LLMError as e:
+        return str(e)
     except Exception as e:
         return f"Erro de comunicacao: {e}"
-    finally:
-        conn.close()
 
 
-def execute_chat(prompt: str, stream: bool = False) -> str:
-    return _call_llm(prompt, stream=stream)
+def build_cache_key(route: str, mode: str, user_input: str, memory_context: str) -> str:
+    return response_cache.make_key(MODEL_NAME, route, mode, user_input, memory_context)
+
+
+def _replay(text: str, stream: bool) -> str:
+    # Same contract as _call_llm: streamed text is printed and "" is returned.
+    _mark_first_output()
+    if not stream:
+        return text
+    print(text, end="", flush=True)
+    return ""
+
+
+def execute_chat(
+    prompt: str,
+    stream: bool = False,
+    cache_key: str | None = None,
+    namespace: str | None = None,
+) -> str:
+    if cache_key is None:
+        return _call_llm(prompt, stream=stream)
+    cached = response_cache.get(cache_key, namespace)
+    if cached is not None:
+        return _replay(cached, stream)
+    capture: list[str] = []
+    result = _call_llm(prompt, stream=stream, capture=capture)
+    if capture:
+        response_cache.put(cache_key, capture[0], namespace)
+    return result
 
 
 def execute_image(user_input: str) -> str:
@@ -61,16 +173,34 @@ def execute_video(user_input: str) -> str:
     return "Rota video selecionada, mas o executor de video ainda nao foi implementado."
 
 
-def execute_tool(user_input: str) -> str:
-    return "Rota tool selecionada, mas o executor de ferramentas ainda nao foi implementado."
+def execute_tool(user_input: str, prompt: str | None = None, stream: bool = False) -> str:
+    summary, err = run_tabular_request(user_input)
+    if err:
+        return f"Rota tool selecionada, mas {err}."
+    if prompt is None:
+        return summary
+    # Only the aggregated summary goes to the model, never raw rows.
+    tool_prompt = (
+        f"{prompt}\n"
+        "RESULTADO DA FERRAMENTA (agregado localmente; dados brutos omitidos):\n"
+        f"{summary}\n"
+    )
+    return _call_llm(tool_prompt, stream=stream)
 
 
-def execute_route(route: str, prompt: str, user_input: str, stream: bool = False) -> str:
+def execute_route(
+    route: str,
+    prompt: str,
+    user_input: str,
+    stream: bool = False,
+    cache_key: str | None = None,
+    namespace: str | None = None,
+) -> str:
     handlers: dict[str, Callable[[str], str]] = {
-        "chat": lambda _u: execute_chat(prompt, stream=stream),
+        "chat": lambda _u: execute_chat(prompt, stream=stream, cache_key=cache_key, namespace=namespace),
         "image": execute_image,
         "video": execute_video,
-        "tool": execute_tool,
+        "tool": lambda u: execute_tool(u, prompt, stream=stream),
     }
     handler = handlers.get(route, handlers["chat"])
     return handler(user_input)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+from aurora_core.memory.loader import MEMORY_DIR
+from aurora_core.utils.hashing import sha256_text
+from aurora_core.utils.namespaces import rebase
+
+# Opt-in response cache for chat turns.
+# What can be changed without editing business logic:
+# - RESPONSE_CACHE_TTL_S: seconds before a cached answer expires
+# - RESPONSE_CACHE_MAX_ENTRIES: LRU bound; least recently used answers are evicted
+# The key includes a hash of the memory context, so any change in memory
+# produces a new key and old answers simply age out.
+# Each namespace has its own file (memory/tenants/<ns>/response_cache.json).
+CACHE_PATH = MEMORY_DIR / "response_cache.json"
+RESPONSE_CACHE_TTL_S = int(os.getenv("AURORA_RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("AURORA_RESPONSE_CACHE_MAX", "256"))
+
+_WS_RE = re.compile(r"\s+")
+
+_lock = threading.Lock()
+# Loaded caches by file path.
+_caches: dict[Path, OrderedDict[str, dict]] = {}
+
+
+def normalize_input(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = _WS_RE.sub(" ", text).strip()
+    return text.rstrip("?!. ")
+
+
+def make_key(model: str, route: str, mode: str, user_input: str, memory_context: str) -> str:
+    parts = [model, route, mode, normalize_input(user_input), sha256_text(memory_context)]
+    return sha256_text("\x1f".join(parts))
+
+
+def _cache_path(namespace: str | None) -> Path:
+    return rebase(CACHE_PATH, MEMORY_DIR, namespace)
+
+
+def _load(path: Path) -> OrderedDict[str, dict]:
+    entries = _caches.get(path)
+    if entries is not None:
+        return entries
+    entries = OrderedDict()
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            for key, entry in data.get("entries", []):
+                entries[key] = entry
+        except (OSError, ValueError, TypeError, AttributeError):
+            entries = OrderedDict()
+    _caches[path] = entries
+    return entries
+
+
+def _save(path: Path, entries: OrderedDict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps({"entries": list(entries.items())}, ensure_ascii=True),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+def get(key: str, namespace: str | None = None) -> str | None:
+    with _lock:
+        entries = _load(_cache_path(namespace))
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry.get("ts", 0) > RESPONSE_CACHE_TTL_S:
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return entry.get("text")
+
+
+def put(key: str, text: str, namespace: str | None = None) -> None:
+    if not text:
+        return
+    path = _cache_path(namespace)
+    with _lock:
+        entries = _load(path)
+        entries[key] = {"ts": time.time(), "text": text}
+        entries.move_to_end(key)
+        now = time.time()
+        for k in [k for k, e in entries.items() if now - e.get("ts", 0) > RESPONSE_CACHE_TTL_S]:
+            del entries[k]
+        while len(entries) > RESPONSE_CACHE_MAX_ENTRIES:
+            entries.popitem(last=False)
+        with contextlib.suppress(OSError):
+            _save(path, entries)
+
+
+def preload(namespace: str | None = None) -> int:
+    """
+    Read the cache file now (used by the core warm-up); returns the entry count.
+    """
+    with _lock:
+        return len(_load(_cache_path(namespace)))
+
+
+def clear(namespace: str | None = None) -> None:
+    path = _cache_path(namespace)
+    with _lock:
+        _caches[path] = OrderedDict()
+        with contextlib.suppress(OSError):
+            path.unlink(missing_ok=True)
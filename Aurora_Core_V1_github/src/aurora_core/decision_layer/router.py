@@ -3,6 +3,8 @@ import http.client
 import os
 from pathlib import Path
 
+from aurora_core.utils.singleflight import SingleFlight
+
 RULES_PATH = Path(__file__).with_name("rules.json")
 
 OLLAMA_HOST = "127.0.0.1"
@@ -11,6 +13,8 @@ OLLAMA_PORT = 11434
 MODEL_NAME = os.getenv("AURORA_CORE_MODEL", "aurora-nucleo:latest")
 USE_LLM_FALLBACK = False
 
+_INFLIGHT = SingleFlight()
+
 
 def _load_rules() -> dict:
     if not RULES_PATH.exists():
@@ -37,6 +41,11 @@ def _rule_based_route(user_input: str) -> dict | None:
 
 
 def _llm_route(user_input: str) -> dict:
+    # Concurrent sessions asking the same question share one routing call.
+    return _INFLIGHT.do((MODEL_NAME, user_input), lambda: _request_route(user_input))
+
+
+def _request_route(user_input: str) -> dict:
     prompt = (
         "Decida a rota ideal para a pergunta. Responda apenas JSON valido:\n"
         "{ \"route\": \"chat|image|video|tool\", \"mode\": \"natural|analitico|estruturado\", "
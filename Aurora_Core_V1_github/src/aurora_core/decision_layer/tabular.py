@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import csv
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from aurora_core.memory.loader import BASE_DIR
+
+# Local tabular executor for the "tool" route (planilha/tabela/csv).
+# Files are streamed row by row from fixed-size read buffers; only the
+# aggregate state is kept in memory, never the raw table.
+# What can be changed without editing business logic:
+# - AURORA_TABULAR_WORKERS: process pool size for very large files (1 = no pool)
+# - PARALLEL_MIN_BYTES: files smaller than this are always scanned in-process
+# - MAX_GROUPS / PREVIEW_ROWS / SUMMARY_GROUPS: memory and prompt bounds
+DATA_DIR = BASE_DIR / "data"
+TABULAR_WORKERS = int(os.getenv("AURORA_TABULAR_WORKERS", str(min(os.cpu_count() or 1, 4))))
+PARALLEL_MIN_BYTES = 256 * 1024 * 1024
+READ_CHUNK_BYTES = 1024 * 1024
+MAX_GROUPS = 10000
+PREVIEW_ROWS = 5
+SUMMARY_GROUPS = 15
+OVERFLOW_GROUP = "__outros__"
+
+FILE_RE = re.compile(r"[\w\-.]+\.(?:csv|tsv)\b", re.IGNORECASE)
+SUM_RE = re.compile(
+    r"\b(?:soma|somar|some|total|sum)\s+(?:de\s+|da\s+|do\s+|dos\s+|das\s+|a\s+|o\s+)?"
+    r"(?:coluna\s+)?(\w+)",
+    re.IGNORECASE,
+)
+COUNT_RE = re.compile(r"\b(?:contar|conte|contagem|quantos|quantas|count)\b", re.IGNORECASE)
+GROUP_RE = re.compile(r"\b(?:agrupad[oa]s?|agrupar|group)\s+(?:por|by)\s+(\w+)", re.IGNORECASE)
+LOOSE_GROUP_RE = re.compile(r"\bpor\s+(\w+)", re.IGNORECASE)
+FILTER_RE = re.compile(r"(\w+)\s*(>=|<=|!=|=|>|<)\s*([^\s,;]+)")
+COLUMNS_RE = re.compile(
+    r"\bcolunas?\s+([\w\s,]+?)(?=\s+(?:de|do|da|onde|where|em|no|na)\b|[.;?!]|$)",
+    re.IGNORECASE,
+)
+
+
+def parse_query(user_input: str) -> dict | None:
+    """
+    Extract a tabular query from free text, e.g.
+    "some valor de vendas.csv agrupado por regiao onde status=pago".
+    Column names are resolved later against the file header.
+    """
+    file_match = FILE_RE.search(user_input)
+    if not file_match:
+        return None
+    text = user_input[: file_match.start()] + " " + user_input[file_match.end():]
+
+    spec: dict = {
+        "file": file_match.group(0),
+        "columns": [],
+        "filters": [(c, op, v) for c, op, v in FILTER_RE.findall(text)],
+        "agg": None,
+        "agg_column": None,
+        "group_by": None,
+        "group_candidates": [],
+    }
+    sum_match = SUM_RE.search(text)
+    if sum_match:
+        spec["agg"] = "sum"
+        spec["agg_column"] = sum_match.group(1)
+    elif COUNT_RE.search(text):
+        spec["agg"] = "count"
+
+    group_match = GROUP_RE.search(text)
+    if group_match:
+        spec["group_by"] = group_match.group(1)
+    else:
+        spec["group_candidates"] = LOOSE_GROUP_RE.findall(text)
+
+    columns_match = COLUMNS_RE.search(text)
+    if columns_match:
+        raw = re.split(r"\s*,\s*|\s+e\s+|\s+", columns_match.group(1).strip())
+        spec["columns"] = [c for c in raw if c]
+    return spec
+
+
+def _to_number(value: str) -> float | None:
+    value = value.strip()
+    if not value:
+        return None
+    if "," in value and "." in value:
+        value = value.replace(".", "").replace(",", ".")
+    elif "," in value:
+        value = value.replace(",", ".")
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _matches(value: str, op: str, expected: str) -> bool:
+    left = _to_number(value)
+    right = _to_number(expected)
+    if left is not None and right is not None:
+        a, b = left, right
+    else:
+        a, b = value.strip().casefold(), expected.strip().casefold()
+    if op == "=":
+        return a == b
+    if op == "!=":
+        return a != b
+    try:
+        if op == ">":
+            return a > b
+        if op == "<":
+            return a < b
+        if op == ">=":
+            return a >= b
+        if op == "<=":
+            return a <= b
+    except TypeError:
+        return False
+    return False
+
+
+def _read_header(path: Path) -> tuple[list[str], str, int]:
+    with path.open("rb") as f:
+        first = f.readline()
+        header_end = f.tell()
+    line = first.decode("utf-8-sig", errors="replace")
+    try:
+        delimiter = csv.Sniffer().sniff(line, delimiters=",;\t|").delimiter
+    except csv.Error:
+        delimiter = "\t" if path.suffix.lower() == ".tsv" else ","
+    header = next(csv.reader([line], delimiter=delimiter), [])
+    return [h.strip() for h in header], delimiter, header_end
+
+
+def _resolve_column(name: str | None, header: list[str]) -> int | None:
+    if not name:
+        return None
+    lowered = [h.casefold() for h in header]
+    try:
+        return lowered.index(name.casefold())
+    except ValueError:
+        return None
+
+
+def _compile(spec: dict, header: list[str]) -> dict:
+    group_idx = _resolve_column(spec.get("group_by"), header)
+    if group_idx is None:
+        for candidate in spec.get("group_candidates", []):
+            group_idx = _resolve_column(candidate, header)
+            if group_idx is not None:
+                break
+    filters = []
+    for col, op, value in spec.get("filters", []):
+        idx = _resolve_column(col, header)
+        if idx is not None:
+            filters.append((idx, op, value))
+    columns = [i for i in (_resolve_column(c, header) for c in spec.get("columns", [])) if i is not None]
+    agg_idx = _resolve_column(spec.get("agg_column"), header)
+    agg = spec.get("agg")
+    if agg == "sum" and agg_idx is None:
+        agg = "count"
+    if agg is None and group_idx is not None:
+        agg = "count"
+    return {
+        "filters": filters,
+        "columns": columns,
+        "agg": agg,
+        "agg_idx": agg_idx,
+        "group_idx": group_idx,
+    }
+
+
+def _iter_lines(f, end: int):
+    while f.tell() < end:
+        line = f.readline()
+        if not line:
+            break
+        yield line.decode("utf-8", errors="replace")
+
+
+def _scan_range(path: str, start: int, end: int, delimiter: str, plan: dict) -> dict:
+    """
+    Scan one byte range of the file. A range owns every line that starts
+    inside it, so ranges can be processed independently and merged.
+    """
+    state = {"scanned": 0, "matched": 0, "sum": 0.0, "bad_values": 0, "groups": {}, "preview": []}
+    filters = plan["filters"]
+    agg_idx = plan["agg_idx"] if plan["agg"] == "sum" else None
+    group_idx = plan["group_idx"]
+    columns = plan["columns"]
+    groups: dict[str, list] = state["groups"]
+
+    with open(path, "rb", buffering=READ_CHUNK_BYTES) as f:
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()
+        for row in csv.reader(_iter_lines(f, end), delimiter=delimiter):
+            if not row:
+                continue
+            state["scanned"] += 1
+            try:
+                if any(not _matches(row[i], op, v) for i, op, v in filters):
+                    continue
+            except IndexError:
+                continue
+            state["matched"] += 1
+
+            value = 0.0
+            if agg_idx is not None:
+                number = _to_number(row[agg_idx]) if agg_idx < len(row) else None
+                if number is None:
+                    state["bad_values"] += 1
+                else:
+                    value = number
+                    state["sum"] += number
+
+            if group_idx is not None:
+                key = row[group_idx].strip() if group_idx < len(row) else ""
+                if key not in groups and len(groups) >= MAX_GROUPS:
+                    key = OVERFLOW_GROUP
+                bucket = groups.setdefault(key, [0, 0.0])
+                bucket[0] += 1
+                bucket[1] += value
+
+            if len(state["preview"]) < PREVIEW_ROWS:
+                picked = [row[i] for i in columns if i < len(row)] if columns else row
+                state["preview"].append(picked)
+    return state
+
+
+def _merge(states: list[dict]) -> dict:
+    merged = {"scanned": 0, "matched": 0, "sum": 0.0, "bad_values": 0, "groups": {}, "preview": []}
+    for state in states:
+        for k in ("scanned", "matched", "sum", "bad_values"):
+            merged[k] += state[k]
+        for key, (count, total) in state["groups"].items():
+            if key not in merged["groups"] and len(merged["groups"]) >= MAX_GROUPS:
+                key = OVERFLOW_GROUP
+            bucket = merged["groups"].setdefault(key, [0, 0.0])
+            bucket[0] += count
+            bucket[1] += total
+        room = PREVIEW_ROWS - len(merged["preview"])
+        if room > 0:
+            merged["preview"].extend(state["preview"][:room])
+    return merged
+
+
+def _split_ranges(start: int, size: int, parts: int) -> list[tuple[int, int]]:
+    step = max((size - start) // parts, 1)
+    bounds = [start + i * step for i in range(parts)] + [size]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts) if bounds[i] < bounds[i + 1]]
+
+
+def run_query(path: Path, spec: dict, workers: int | None = None) -> dict:
+    """
+    Run a parsed query over a CSV file in bounded memory.
+    Multi-GB files are split into byte ranges and scanned by a process pool;
+    this assumes one record per line (no quoted newlines).
+    """
+    header, delimiter, header_end = _read_header(path)
+    plan = _compile(spec, header)
+    size = path.stat().st_size
+    workers = TABULAR_WORKERS if workers is None else workers
+
+    if workers > 1 and size >= PARALLEL_MIN_BYTES:
+        ranges = _split_ranges(header_end, size, workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_scan_range, str(path), s, e, delimiter, plan) for s, e in ranges]
+            state = _merge([f.result() for f in futures])
+    else:
+        state = _scan_range(str(path), header_end, size, delimiter, plan)
+
+    state["header"] = header
+    state["plan"] = plan
+    return state
+
+
+def summarize_result(file_name: str, result: dict) -> str:
+    header = result["header"]
+    plan = result["plan"]
+    lines = [
+        f"Arquivo: {file_name}",
+        f"Colunas: {', '.join(header)}",
+        f"Linhas lidas: {result['scanned']} | linhas filtradas: {result['matched']}",
+    ]
+    if plan["filters"]:
+        conds = [f"{header[i]}{op}{v}" for i, op, v in plan["filters"]]
+        lines.append(f"Filtros: {', '.join(conds)}")
+
+    agg = plan["agg"]
+    agg_name = header[plan["agg_idx"]] if agg == "sum" else None
+    if agg == "sum":
+        lines.append(f"Soma de {agg_name}: {result['sum']:.2f}")
+        if result["bad_values"]:
+            lines.append(f"Valores nao numericos ignorados: {result['bad_values']}")
+    elif agg == "count":
+        lines.append(f"Contagem: {result['matched']}")
+
+    if plan["group_idx"] is not None and result["groups"]:
+        sort_pos = 1 if agg == "sum" else 0
+        ranked = sorted(result["groups"].items(), key=lambda kv: (-kv[1][sort_pos], kv[0]))
+        lines.append(f"Agrupado por {header[plan['group_idx']]} ({len(ranked)} grupos):")
+        for key, (count, total) in ranked[:SUMMARY_GROUPS]:
+            if agg == "sum":
+                lines.append(f"- {key or '(vazio)'}: soma={total:.2f} linhas={count}")
+            else:
+                lines.append(f"- {key or '(vazio)'}: linhas={count}")
+        if len(ranked) > SUMMARY_GROUPS:
+            lines.append(f"- ... {len(ranked) - SUMMARY_GROUPS} grupos omitidos")
+    elif agg is None and result["preview"]:
+        names = [header[i] for i in plan["columns"]] if plan["columns"] else header
+        lines.append(f"Amostra ({len(result['preview'])} linhas, {', '.join(names)}):")
+        for row in result["preview"]:
+            lines.append("- " + " | ".join(row))
+    return "\n".join(lines)
+
+
+def run_tabular_request(user_input: str) -> tuple[str | None, str | None]:
+    """
+    Returns (summary, error). Only files inside data/ are accessible.
+    """
+    spec = parse_query(user_input)
+    if not spec:
+        return None, f"nenhum arquivo .csv indicado (arquivos devem estar em {DATA_DIR})"
+    path = DATA_DIR / Path(spec["file"]).name
+    if not path.is_file():
+        return None, f"arquivo nao encontrado em data/: {path.name}"
+    try:
+        result = run_query(path, spec)
+    except (OSError, csv.Error, RuntimeError) as e:
+        return None, f"falha ao processar {path.name}: {e}"
+    return summarize_result(path.name, result), None
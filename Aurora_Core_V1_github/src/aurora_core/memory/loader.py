@@ -1,16 +1,37 @@
 from __future__ import annotations
 
+import atexit
 import json
 import math
+import os
 import re
+import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
 
+from aurora_core.memory import shards
+from aurora_core.utils.locks import FileLock
+from aurora_core.utils.namespaces import namespace_path, rebase
+
 # Base directory for the project
 BASE_DIR = Path(__file__).resolve().parents[3]
 MEMORY_DIR = BASE_DIR / "memory"
 INDEX_PATH = MEMORY_DIR / "memory_index.json"
 CANONICAL_DIR = MEMORY_DIR / "canonical"
+# Per-memory retrieval counts ({"type/file": {"hits", "last"}}), used by the
+# lifecycle job (pipeline.compaction) to promote frequently used short_term items.
+RETRIEVAL_STATS_PATH = MEMORY_DIR / "retrieval_stats.json"
+RETRIEVAL_FLUSH_INTERVAL_S = 30.0
+# Shard files of large indexes (see memory.shards), one directory per index version.
+SHARDS_DIR = MEMORY_DIR / "index_shards"
+# Every function takes an optional namespace (tenant/user, see
+# utils.namespaces). Parsed indexes and search vectors are kept per namespace,
+# loaded on first use and evicted least-recently-used first once their
+# estimated size passes AURORA_MEMORY_CACHE_MB.
+MEMORY_CACHE_MAX_BYTES = int(float(os.getenv("AURORA_MEMORY_CACHE_MB", "256")) * 1024 * 1024)
+# Parsed JSON plus TF-IDF vectors take several times the index file size.
+CACHE_SIZE_FACTOR = 4
 
 TOKEN_RE = re.compile(r"[a-zA-Z0-9_]{3,}")
 INJECTION_PATTERNS = [
@@ -64,12 +85,39 @@ def _extract_tags(text: str, max_tags: int = 8) -> list[str]:
     return [t for t, _ in tags[:max_tags]]
 
 
-def _list_memory_files() -> list[Path]:
+def memory_dir(namespace: str | None = None) -> Path:
+    return namespace_path(MEMORY_DIR, namespace)
+
+
+def _index_path(namespace: str | None) -> Path:
+    return rebase(INDEX_PATH, MEMORY_DIR, namespace)
+
+
+def _index_lock(namespace: str | None) -> FileLock:
+    # Serializes read-modify-write of the index between processes (ingest
+    # daemon, compaction, rebuilds at startup).
+    return FileLock(_index_path(namespace).with_suffix(".lock"))
+
+
+def _canonical_dir(namespace: str | None) -> Path:
+    return rebase(CANONICAL_DIR, MEMORY_DIR, namespace)
+
+
+def _retrieval_stats_path(namespace: str | None) -> Path:
+    return rebase(RETRIEVAL_STATS_PATH, MEMORY_DIR, namespace)
+
+
+def _shards_dir(namespace: str | None) -> Path:
+    return rebase(SHARDS_DIR, MEMORY_DIR, namespace)
+
+
+def _list_memory_files(namespace: str | None = None) -> list[Path]:
     files: list[Path] = []
-    if not MEMORY_DIR.exists():
+    base = memory_dir(namespace)
+    if not base.exists():
         return files
     for mem_type in ("identity", "short_term", "long_term", "unclassified"):
-        path = MEMORY_DIR / mem_type
+        path = base / mem_type
         if not path.exists():
             continue
         files.extend(path.glob("*.txt"))
@@ -81,21 +129,23 @@ def build_canonical_memory(
     limit: int = 50,
     max_len: int = 160,
     write_file: bool = True,
+    namespace: str | None = None,
 ) -> str:
-    items = load_memory(memory_type, limit=limit)
+    items = load_memory(memory_type, limit=limit, namespace=namespace)
     if not items:
         return ""
     lines = [f"- {_summarize(item, max_len=max_len)}" for item in items]
     content = "\n".join(lines)
     if write_file:
-        CANONICAL_DIR.mkdir(parents=True, exist_ok=True)
-        path = CANONICAL_DIR / f"{memory_type}.txt"
+        canonical_dir = _canonical_dir(namespace)
+        canonical_dir.mkdir(parents=True, exist_ok=True)
+        path = canonical_dir / f"{memory_type}.txt"
         path.write_text(content, encoding="utf-8")
     return content
 
 
-def load_canonical_memory(memory_type: str) -> str:
-    path = CANONICAL_DIR / f"{memory_type}.txt"
+def load_canonical_memory(memory_type: str, namespace: str | None = None) -> str:
+    path = _canonical_dir(namespace) / f"{memory_type}.txt"
     if not path.exists():
         return ""
     try:
@@ -104,18 +154,19 @@ def load_canonical_memory(memory_type: str) -> str:
         return ""
 
 
-def get_or_build_canonical_memory(memory_type: str) -> str:
-    content = load_canonical_memory(memory_type)
+def get_or_build_canonical_memory(memory_type: str, namespace: str | None = None) -> str:
+    content = load_canonical_memory(memory_type, namespace)
     if content:
         return content
-    return build_canonical_memory(memory_type, write_file=True)
+    return build_canonical_memory(memory_type, write_file=True, namespace=namespace)
 
 
-def _index_is_stale(files: list[Path]) -> bool:
-    if not INDEX_PATH.exists():
+def _index_is_stale(files: list[Path], namespace: str | None = None) -> bool:
+    index_path = _index_path(namespace)
+    if not index_path.exists():
         return True
     try:
-        data = json.loads(INDEX_PATH.read_text(encoding="utf-8"))
+        data = json.loads(index_path.read_text(encoding="utf-8"))
         index_mtime = data.get("index_mtime", 0)
     except Exception:
         return True
@@ -128,52 +179,153 @@ def _index_is_stale(files: list[Path]) -> bool:
     return False
 
 
-def build_memory_index(force: bool = False) -> dict:
-    files = _list_memory_files()
-    if not force and not _index_is_stale(files):
-        return load_memory_index()
+def _index_entry(f: Path) -> dict | None:
+    try:
+        text = f.read_text(encoding="utf-8").strip()
+        text = _sanitize_memory(text)
+        if not text:
+            return None
+    except (OSError, UnicodeDecodeError):
+        return None
+    return {
+        "path": str(f),
+        "type": f.parent.name,
+        "mtime": f.stat().st_mtime,
+        "summary": _summarize(text),
+        "tags": _extract_tags(text),
+        "text": text,
+    }
 
-    entries = []
-    for f in files:
-        try:
-            text = f.read_text(encoding="utf-8").strip()
-            text = _sanitize_memory(text)
-            if not text:
-                continue
-        except Exception:
-            continue
-        mem_type = f.parent.name
-        entries.append(
-            {
-                "path": str(f),
-                "type": mem_type,
-                "mtime": f.stat().st_mtime,
-                "summary": _summarize(text),
-                "tags": _extract_tags(text),
-                "text": text,
-            }
-        )
 
+def _write_index(entries: list[dict], namespace: str | None = None) -> dict:
     data = {
         "index_mtime": time.time(),
         "count": len(entries),
         "entries": entries,
     }
-    MEMORY_DIR.mkdir(parents=True, exist_ok=True)
-    INDEX_PATH.write_text(json.dumps(data, ensure_ascii=True, indent=2), encoding="utf-8")
+    index_path = _index_path(namespace)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    # Replaced atomically: the core may be reading it while ingest publishes.
+    tmp_path = index_path.with_suffix(f".tmp{os.getpid()}")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=True, indent=2), encoding="utf-8")
+    os.replace(tmp_path, index_path)
     return data
 
 
-def load_memory_index() -> dict:
-    if not INDEX_PATH.exists():
-        return build_memory_index(force=True)
+def _read_index(namespace: str | None) -> dict | None:
     try:
-        return json.loads(INDEX_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        return build_memory_index(force=True)
+        return json.loads(_index_path(namespace).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _scan_index(files: list[Path], namespace: str | None) -> dict:
+    entries = []
+    for f in files:
+        entry = _index_entry(f)
+        if entry is not None:
+            entries.append(entry)
+    return _write_index(entries, namespace)
+
+
+def build_memory_index(force: bool = False, namespace: str | None = None) -> dict:
+    with _index_lock(namespace):
+        files = _list_memory_files(namespace)
+        if not force and not _index_is_stale(files, namespace):
+            index = _read_index(namespace)
+            if index is not None:
+                return index
+        return _scan_index(files, namespace)
+
+
+def update_memory_index(removed: list[Path], added: list[Path], namespace: str | None = None) -> dict:
+    """
+    Apply file moves/deletions/additions to the index without re-reading
+    every memory file.
+    """
+    with _index_lock(namespace):
+        index = _read_index(namespace)
+        if index is None:
+            # A full scan already reflects the moves.
+            return _scan_index(_list_memory_files(namespace), namespace)
+        gone = {str(p) for p in removed} | {str(p) for p in added}
+        entries = [e for e in index.get("entries", []) if e.get("path") not in gone]
+        for f in added:
+            entry = _index_entry(f)
+            if entry is not None:
+                entries.append(entry)
+        return _write_index(entries, namespace)
 
 
-def _tfidf_vectors(texts: list[str]) -> tuple[list[dict[str, float]], dict[str, float]]:
+def load_memory_index(namespace: str | None = None) -> dict:
+    index = _read_index(namespace)
+    if index is None:
+        return build_memory_index(force=True, namespace=namespace)
+    return index
+
+
+_loaded: OrderedDict[str, dict] = OrderedDict()
+_loaded_lock = threading.Lock()
+_shards_lock = threading.Lock()
+
+
+def _index_version(namespace: str | None) -> tuple | None:
+    try:
+        stat = _index_path(namespace).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _loaded_index(namespace: str | None) -> dict:
+    """
+    Parsed index of a namespace, re-read only when the index file changed.
+    """
+    key = str(_index_path(namespace))
+    version = _index_version(namespace)
+    with _loaded_lock:
+        state = _loaded.get(key)
+        if state is not None and version is not None and state["version"] == version:
+            _loaded.move_to_end(key)
+            return state
+    entries = load_memory_index(namespace).get("entries", [])
+    version = _index_version(namespace)
+    state = {
+        "namespace": namespace or "",
+        "version": version,
+        "entries": entries,
+        "vectors": {},
+        "shards": None,
+        "size": (version[1] if version else 0) * CACHE_SIZE_FACTOR,
+    }
+    with _loaded_lock:
+        _loaded[key] = state
+        _loaded.move_to_end(key)
+        total = sum(s["size"] for s in _loaded.values())
+        while total > MEMORY_CACHE_MAX_BYTES and len(_loaded) > 1:
+            _evicted, old = _loaded.popitem(last=False)
+            total -= old["size"]
+    return state
+
+
+def loaded_namespaces() -> list[str]:
+    """
+    Namespaces whose index is currently held in memory, least recently used first.
+    """
+    with _loaded_lock:
+        return [state["namespace"] for state in _loaded.values()]
+
+
+def evict_namespace(namespace: str | None = None) -> None:
+    with _loaded_lock:
+        _loaded.pop(str(_index_path(namespace)), None)
+
+
+def tfidf_vectors(texts: list[str]) -> tuple[list[dict[str, float]], dict[str, float]]:
+    """
+    TF-IDF vector of each text and the idf table (also used by compaction
+    clustering; memory.shards reproduces the same scores).
+    """
     doc_freq: dict[str, int] = {}
     tokenized = []
     for text in texts:
@@ -198,7 +350,7 @@ def _tfidf_vectors(texts: list[str]) -> tuple[list[dict[str, float]], dict[str,
     return vectors, idf
 
 
-def _cosine(a: dict[str, float], b: dict[str, float]) -> float:
+def cosine(a: dict[str, float], b: dict[str, float]) -> float:
     if not a or not b:
         return 0.0
     dot = 0.0
@@ -212,16 +364,132 @@ def _cosine(a: dict[str, float], b: dict[str, float]) -> float:
     return dot / (na * nb)
 
 
-def search_memory(query: str, types: list[str] | None = None, top_k: int = 8) -> list[dict]:
-    index = load_memory_index()
-    entries = index.get("entries", [])
-    if types:
-        entries = [e for e in entries if e.get("type") in types]
+def memory_key(path: Path | str) -> str:
+    path = Path(path)
+    return f"{path.parent.name}/{path.name}"
+
+
+_retrievals: dict[tuple, list] = {}
+_retrievals_lock = threading.Lock()
+_retrievals_flushed = time.monotonic()
+
+
+def _load_stats_file(path: Path) -> dict[str, dict]:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("items", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def _save_stats_file(path: Path, items: dict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({"items": items}, ensure_ascii=True), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def load_retrieval_stats(namespace: str | None = None) -> dict[str, dict]:
+    return _load_stats_file(_retrieval_stats_path(namespace))
+
+
+def save_retrieval_stats(items: dict[str, dict], namespace: str | None = None) -> None:
+    _save_stats_file(_retrieval_stats_path(namespace), items)
+
+
+def flush_retrieval_stats() -> None:
+    global _retrievals_flushed
+    with _retrievals_lock:
+        pending = dict(_retrievals)
+        _retrievals.clear()
+        _retrievals_flushed = time.monotonic()
+    by_file: dict[str, dict] = {}
+    for (path, key), counts in pending.items():
+        by_file.setdefault(path, {})[key] = counts
+    for path, updates in by_file.items():
+        items = _load_stats_file(Path(path))
+        for key, (hits, last) in updates.items():
+            stats = items.setdefault(key, {"hits": 0, "last": 0})
+            stats["hits"] += hits
+            stats["last"] = max(stats["last"], last)
+        _save_stats_file(Path(path), items)
+
+
+atexit.register(flush_retrieval_stats)
+
+
+def _record_retrievals(entries: list[dict], namespace: str | None = None) -> None:
+    # Counted in memory and merged into the stats file every
+    # RETRIEVAL_FLUSH_INTERVAL_S, so searches do not pay for a write.
+    # Keyed by the stats file the namespace maps to now, so a later flush
+    # (e.g. at exit) writes where the search happened.
+    now = time.time()
+    path = str(_retrieval_stats_path(namespace))
+    with _retrievals_lock:
+        for entry in entries:
+            pending = _retrievals.setdefault((path, memory_key(entry["path"])), [0, now])
+            pending[0] += 1
+            pending[1] = now
+        due = time.monotonic() - _retrievals_flushed >= RETRIEVAL_FLUSH_INTERVAL_S
+    if due:
+        flush_retrieval_stats()
+
+
+def _shard_set(state: dict, namespace: str | None) -> shards.ShardSet | None:
+    # Built once per index version and reused by every process that maps it.
+    # None when the set cannot be built or opened (disk full, pruned by a
+    # process with a newer index): this version is then searched in process.
+    with _shards_lock:
+        if state["shards"] is None:
+            base = _shards_dir(namespace)
+            try:
+                shard_set = shards.ShardSet.open(base, state["version"])
+                if shard_set is None:
+                    shards.build_shards(state["entries"], base, state["version"], _tokenize)
+                    shard_set = shards.ShardSet.open(base, state["version"])
+            except (OSError, ValueError):
+                shard_set = None
+            state["shards"] = shard_set if shard_set is not None else False
+        return state["shards"] or None
+
+
+def search_memory(
+    query: str,
+    types: list[str] | None = None,
+    top_k: int = 8,
+    namespace: str | None = None,
+) -> list[dict]:
+    state = _loaded_index(namespace)
+    shard_set = None
+    if state["version"] is not None and len(state["entries"]) >= shards.SHARDED_SEARCH_MIN_DOCS:
+        shard_set = _shard_set(state, namespace)
+    if shard_set is not None:
+        query_tokens = _tokenize(query)
+        if not query_tokens:
+            return []
+        try:
+            positions = shard_set.search(query_tokens, types, top_k)
+        except OSError:
+            positions = None
+            state["shards"] = False
+        if positions is not None:
+            hits = [state["entries"][pos] for pos in positions]
+            _record_retrievals(hits, namespace)
+            return hits
+
+    types_key = tuple(sorted(types)) if types else ()
+    cached = state["vectors"].get(types_key)
+    if cached is None:
+        entries = state["entries"]
+        if types:
+            entries = [e for e in entries if e.get("type") in types]
+        vectors, idf = tfidf_vectors([e.get("text", "") for e in entries])
+        cached = state["vectors"][types_key] = (entries, vectors, idf)
+    entries, vectors, idf = cached
     if not entries:
         return []
 
-    texts = [e.get("text", "") for e in entries]
-    vectors, idf = _tfidf_vectors(texts)
     query_tokens = _tokenize(query)
     if not query_tokens:
         return []
@@ -234,15 +502,17 @@ def search_memory(query: str, types: list[str] | None = None, top_k: int = 8) ->
 
     scored = []
     for entry, vec in zip(entries, vectors):
-        score = _cosine(q_vec, vec)
+        score = cosine(q_vec, vec)
         if score > 0.0:
             scored.append((score, entry))
     scored.sort(key=lambda x: x[0], reverse=True)
-    return [e for _, e in scored[:top_k]]
+    hits = [e for _, e in scored[:top_k]]
+    _record_retrievals(hits, namespace)
+    return hits
 
 
-def load_memory(memory_type: str, limit: int | None = None) -> list[str]:
-    path = MEMORY_DIR / memory_type
+def load_memory(memory_type: str, limit: int | None = None, namespace: str | None = None) -> list[str]:
+    path = memory_dir(namespace) / memory_type
     if not path.exists():
         return []
 
@@ -257,7 +527,7 @@ def load_memory(memory_type: str, limit: int | None = None) -> list[str]:
             sanitized = _sanitize_memory(raw)
             if sanitized:
                 memories.append(sanitized)
-        except Exception:
+        except (OSError, UnicodeDecodeError):
             continue
     return memories
 
@@ -269,48 +539,49 @@ def build_memory_context(
     top_k: int = 8,
     include_canonical: bool = True,
     max_item_chars: int = 400,
+    namespace: str | None = None,
 ) -> str:
     sections: list[str] = []
 
-    identity = load_memory("identity")
+    identity = load_memory("identity", namespace=namespace)
     if identity:
         sections.append("IDENTITY MEMORY:")
         for item in identity:
             sections.append(f"- {_truncate_item(item, max_item_chars)}")
 
     if include_canonical:
-        identity_canon = get_or_build_canonical_memory("identity")
+        identity_canon = get_or_build_canonical_memory("identity", namespace)
         if identity_canon:
             sections.append("\nIDENTITY SUMMARY:")
             sections.append(identity_canon)
 
     if query:
-        short_hits = search_memory(query, types=["short_term"], top_k=top_k)
+        short_hits = search_memory(query, types=["short_term"], top_k=top_k, namespace=namespace)
         if short_hits:
             sections.append("\nSHORT-TERM MEMORY:")
             for item in short_hits[:short_term_limit]:
                 sections.append(f"- {_truncate_item(item['text'], max_item_chars)}")
 
-        long_hits = search_memory(query, types=["long_term"], top_k=top_k)
+        long_hits = search_memory(query, types=["long_term"], top_k=top_k, namespace=namespace)
         if long_hits:
             sections.append("\nLONG-TERM MEMORY:")
             for item in long_hits[:long_term_limit]:
                 sections.append(f"- {_truncate_item(item['text'], max_item_chars)}")
     else:
-        short_term = load_memory("short_term", short_term_limit)
+        short_term = load_memory("short_term", short_term_limit, namespace)
         if short_term:
             sections.append("\nSHORT-TERM MEMORY:")
             for item in short_term:
                 sections.append(f"- {_truncate_item(item, max_item_chars)}")
 
-        long_term = load_memory("long_term", long_term_limit)
+        long_term = load_memory("long_term", long_term_limit, namespace)
         if long_term:
             sections.append("\nLONG-TERM MEMORY:")
             for item in long_term:
                 sections.append(f"- {_truncate_item(item, max_item_chars)}")
 
     if include_canonical:
-        long_canon = get_or_build_canonical_memory("long_term")
+        long_canon = get_or_build_canonical_memory("long_term", namespace)
         if long_canon:
             sections.append("\nLONG-TERM SUMMARY:")
             sections.append(long_canon)
@@ -325,6 +596,7 @@ def build_prompt_with_memory(
     top_k: int = 8,
     include_canonical: bool = True,
     max_item_chars: int = 400,
+    namespace: str | None = None,
 ) -> str:
     """
     Returns a prompt that includes memory context plus the user query.
@@ -337,6 +609,7 @@ def build_prompt_with_memory(
         top_k=top_k,
         include_canonical=include_canonical,
         max_item_chars=max_item_chars,
+        namespace=namespace,
     ).strip()
     if context:
         return f"{context}\n\nUSER:\n{query}"
@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import atexit
+import heapq
+import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import threading
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, chain, repeat
+from pathlib import Path
+
+from aurora_core.utils.locks import FileLock
+
+# Sharded search over the memory index, used by loader.search_memory once a
+# namespace holds SHARDED_SEARCH_MIN_DOCS entries (smaller corpora keep the
+# in-process scan). Entries are partitioned by type and, inside a type, by a
+# hash of their path into shards of about SHARD_DOCS entries. Each shard is a
+# memory-mapped file of term counts plus postings, so pool workers share the
+# page cache instead of receiving the corpus. A query fans out one task per
+# shard and the per-shard top-k lists are merged. Scores are the same TF-IDF
+# cosine as the in-process path (idf over every selected type), so results
+# do not depend on how the index is sharded.
+# What can be changed without editing business logic:
+# - AURORA_SEARCH_WORKERS: process pool size for sharded search (1 = no pool)
+# - AURORA_SHARDED_SEARCH_MIN_DOCS: index size at which sharding kicks in
+# - AURORA_INDEX_SHARD_DOCS: target entries per shard
+SEARCH_WORKERS = int(os.getenv("AURORA_SEARCH_WORKERS", str(min(os.cpu_count() or 1, 4))))
+SHARDED_SEARCH_MIN_DOCS = int(os.getenv("AURORA_SHARDED_SEARCH_MIN_DOCS", "20000"))
+SHARD_DOCS = int(os.getenv("AURORA_INDEX_SHARD_DOCS", "5000"))
+# Shard files opened by one process (parent or worker), least recently used
+# closed first.
+OPEN_SHARDS_MAX = 64
+
+# magic, docs, doc-term pairs (= postings), distinct terms; then uint32 arrays:
+# docs (pos, length, terms_end) * docs, doc term ids, doc term counts,
+# term ids (sorted), term postings ends, posting docs, posting counts.
+SHARD_HEADER = struct.Struct("=4sIII")
+SHARD_MAGIC = b"AMS1"
+MANIFEST_NAME = "manifest.json"
+VOCAB_NAME = "vocab.json"
+# Held in the shards folder while a build runs: concurrent processes that
+# need the same version wait for it instead of building it again.
+BUILD_LOCK_NAME = "build.lock"
+
+
+def _idf(n_docs: int, df: int) -> float:
+    # Same formula as loader.tfidf_vectors; terms absent from the selected
+    # types weigh 0 there, so they do here too.
+    if df == 0:
+        return 0.0
+    return math.log((1 + n_docs) / (1 + df)) + 1.0
+
+
+def _version_dir(base: Path, version: tuple) -> Path:
+    return base / f"{version[0]}_{version[1]}"
+
+
+def _read_manifest(directory: Path, version: tuple) -> dict | None:
+    try:
+        manifest = json.loads((directory / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if tuple(manifest.get("version", ())) != tuple(version):
+        return None
+    return manifest
+
+
+def _is_older_version(name: str, version: tuple) -> bool:
+    # Only <mtime_ns>_<size> folders of an older index; in-progress builds
+    # (.tmp<pid>) and newer versions belong to other processes.
+    mtime, sep, size = name.partition("_")
+    if not sep or not mtime.isdigit() or not size.isdigit():
+        return False
+    return int(mtime) < version[0]
+
+
+def _write_shard(path: Path, docs: list[tuple[int, int, Counter]], vocab: dict[str, int]) -> None:
+    doc_table = array("I")
+    doc_terms = array("I")
+    doc_counts = array("I")
+    pair_docs = array("I")
+    for local, (pos, length, tf) in enumerate(docs):
+        # Counter keeps first-occurrence order, the order loader sums norms in.
+        doc_terms.extend(map(vocab.__getitem__, tf))
+        doc_counts.extend(tf.values())
+        pair_docs.extend(repeat(local, len(tf)))
+        doc_table.extend((pos, length, len(doc_terms)))
+
+    # Postings: doc-term pairs ordered by term (stable, so docs stay ascending).
+    order = sorted(range(len(doc_terms)), key=doc_terms.__getitem__)
+    post_docs = array("I", map(pair_docs.__getitem__, order))
+    post_counts = array("I", map(doc_counts.__getitem__, order))
+    df = Counter(doc_terms)
+    term_ids = array("I", sorted(df))
+    term_ends = array("I", accumulate(map(df.__getitem__, term_ids)))
+
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(SHARD_HEADER.pack(SHARD_MAGIC, len(docs), len(doc_terms), len(term_ids)))
+        for arr in (doc_table, doc_terms, doc_counts, term_ids, term_ends, post_docs, post_counts):
+            f.write(arr.tobytes())
+    os.replace(tmp_path, path)
+
+
+def build_shards(entries: list[dict], base: Path, version: tuple, tokenize) -> dict:
+    """
+    Write the shard set of one index version to base/<version>/ and remove
+    older versions. Returns the manifest; a set another process finished
+    while this one waited for the build lock is used as is.
+    """
+    out_dir = _version_dir(base, version)
+    base.mkdir(parents=True, exist_ok=True)
+    with FileLock(base / BUILD_LOCK_NAME):
+        manifest = _read_manifest(out_dir, version)
+        if manifest is None:
+            manifest = _build(entries, out_dir, version, tokenize)
+        for old in base.iterdir():
+            # Processes that still have them mapped keep reading the unlinked files.
+            if old.is_dir() and _is_older_version(old.name, version):
+                shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+def _build(entries: list[dict], out_dir: Path, version: tuple, tokenize) -> dict:
+    tmp_dir = out_dir.with_name(out_dir.name + f".tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    by_type: dict[str, list[tuple[int, int, Counter]]] = {}
+    for pos, entry in enumerate(entries):
+        tokens = tokenize(entry.get("text", ""))
+        by_type.setdefault(entry.get("type", ""), []).append((pos, len(tokens), Counter(tokens)))
+
+    terms = dict.fromkeys(chain.from_iterable(tf for docs in by_type.values() for _p, _l, tf in docs))
+    vocab = {t: i for i, t in enumerate(terms)}
+
+    manifest = {"version": list(version), "terms": len(vocab), "types": {}}
+    for mem_type, docs in by_type.items():
+        counts = Counter(chain.from_iterable(tf for _p, _l, tf in docs))
+        df = array("I", bytes(4 * len(vocab)))
+        for t, c in counts.items():
+            df[vocab[t]] = c
+        (tmp_dir / f"df_{mem_type}.bin").write_bytes(df.tobytes())
+
+        n_shards = max(1, math.ceil(len(docs) / max(SHARD_DOCS, 1)))
+        parts: list[list[tuple[int, int, Counter]]] = [[] for _ in range(n_shards)]
+        for doc in docs:
+            path = entries[doc[0]].get("path", str(doc[0]))
+            parts[zlib.crc32(path.encode("utf-8")) % n_shards].append(doc)
+        names = []
+        for n, part in enumerate(parts):
+            if not part:
+                continue
+            name = f"{mem_type}_{n}.bin"
+            _write_shard(tmp_dir / name, part, vocab)
+            names.append(name)
+        manifest["types"][mem_type] = {"count": len(docs), "shards": names}
+
+    (tmp_dir / VOCAB_NAME).write_text(json.dumps(list(vocab), ensure_ascii=True), encoding="utf-8")
+    (tmp_dir / MANIFEST_NAME).write_text(json.dumps(manifest, ensure_ascii=True), encoding="utf-8")
+    # A folder without a matching manifest is a build that did not finish.
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return manifest
+
+
+class _Mapped:
+    """
+    A shard or df file mapped read-only, viewed as uint32 arrays without copying.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.view = memoryview(self.mm).cast("I") if self.mm is not None else memoryview(array("I"))
+        # Doc norms per selection of types (they depend on idf).
+        self.norms: dict[tuple, list[float]] = {}
+
+
+class _Shard(_Mapped):
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        magic, n_docs, n_pairs, n_terms = SHARD_HEADER.unpack_from(self.mm, 0)
+        if magic != SHARD_MAGIC:
+            raise ValueError(f"shard invalido: {path}")
+        offset = SHARD_HEADER.size // 4
+        sections = []
+        for length in (3 * n_docs, n_pairs, n_pairs, n_terms, n_terms, n_pairs, n_pairs):
+            sections.append(self.view[offset: offset + length])
+            offset += length
+        (self.docs, self.doc_terms, self.doc_counts, self.term_ids,
+         self.term_ends, self.post_docs, self.post_counts) = sections
+        self.n_docs = n_docs
+
+
+_open: OrderedDict[str, _Mapped] = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def _mapped(path: str, kind=_Mapped) -> _Mapped:
+    # Paths are unique per index version, so a cached mapping is never stale.
+    with _open_lock:
+        mapped = _open.get(path)
+        if mapped is None:
+            mapped = _open[path] = kind(path)
+            while len(_open) > OPEN_SHARDS_MAX:
+                # Unmapped once no running search holds a view of it.
+                _open.popitem(last=False)
+        _open.move_to_end(path)
+        return mapped
+
+
+class _Idf:
+    """
+    idf over a selection of types, computed per term on demand from the df files.
+    """
+
+    def __init__(self, df_paths: list[str], n_docs: int) -> None:
+        self.dfs = [_mapped(p).view for p in df_paths]
+        self.n_docs = n_docs
+        self.cache: dict[int, float] = {}
+
+    def __call__(self, term_id: int) -> float:
+        value = self.cache.get(term_id)
+        if value is None:
+            value = self.cache[term_id] = _idf(self.n_docs, sum(df[term_id] for df in self.dfs))
+        return value
+
+    def table(self) -> list[float]:
+        # Every term at once, for doc norms.
+        return [_idf(self.n_docs, df) for df in map(sum, zip(*self.dfs))]
+
+
+def _doc_norms(shard: _Shard, key: tuple, idf: _Idf) -> list[float]:
+    norms = shard.norms.get(key)
+    if norms is not None:
+        return norms
+    table = idf.table()
+    norms = []
+    start = 0
+    docs, terms, counts = shard.docs, shard.doc_terms, shard.doc_counts
+    for d in range(shard.n_docs):
+        length, end = docs[3 * d + 1], docs[3 * d + 2]
+        # v * v summed left to right, exactly as loader.cosine does.
+        vs = [(c / length) * table[t] for t, c in zip(terms[start:end], counts[start:end])]
+        norms.append(math.sqrt(sum(v * v for v in vs)))
+        start = end
+    shard.norms[key] = norms
+    return norms
+
+
+def search_shard(
+    path: str,
+    df_paths: list[str],
+    n_docs: int,
+    query: list[tuple[int, float]],
+    query_norm: float,
+    top_k: int,
+) -> list[tuple[float, int]]:
+    """
+    Top-k (score, index position) of one shard. query holds (term id, query
+    weight) in query token order, so dot products add up in the same order
+    as loader.cosine.
+    """
+    shard = _mapped(path, _Shard)
+    idf = _Idf(df_paths, n_docs)
+    norms = _doc_norms(shard, tuple(df_paths), idf)
+    docs = shard.docs
+    dots: dict[int, float] = {}
+    for term_id, weight in query:
+        i = bisect_left(shard.term_ids, term_id)
+        if i == len(shard.term_ids) or shard.term_ids[i] != term_id:
+            continue
+        term_idf = idf(term_id)
+        start = shard.term_ends[i - 1] if i else 0
+        for p in range(start, shard.term_ends[i]):
+            d = shard.post_docs[p]
+            dots[d] = dots.get(d, 0.0) + weight * ((shard.post_counts[p] / docs[3 * d + 1]) * term_idf)
+    scored = []
+    for d, dot in dots.items():
+        if norms[d] == 0.0:
+            continue
+        score = dot / (query_norm * norms[d])
+        if score > 0.0:
+            scored.append((score, docs[3 * d]))
+    # Ties go to the earlier index entry, as in the in-process stable sort.
+    return heapq.nlargest(top_k, scored, key=lambda s: (s[0], -s[1]))
+
+
+class ShardSet:
+    """
+    Parent-side view of one shard set: manifest, vocabulary and df files.
+    """
+
+    def __init__(self, directory: Path, manifest: dict) -> None:
+        self.dir = directory
+        self.manifest = manifest
+        self.vocab = {t: i for i, t in enumerate(json.loads((directory / VOCAB_NAME).read_text(encoding="utf-8")))}
+
+    @classmethod
+    def open(cls, base: Path, version: tuple) -> ShardSet | None:
+        directory = _version_dir(base, version)
+        manifest = _read_manifest(directory, version)
+        if manifest is None:
+            return None
+        return cls(directory, manifest)
+
+    def search(
+        self,
+        query_tokens: list[str],
+        types: list[str] | None,
+        top_k: int,
+        workers: int | None = None,
+    ) -> list[int]:
+        """
+        Index positions of the top_k entries, best first.
+        """
+        selected = sorted(t for t in self.manifest["types"] if not types or t in types)
+        n_docs = sum(self.manifest["types"][t]["count"] for t in selected)
+        if not n_docs:
+            return []
+        df_paths = [str(self.dir / f"df_{t}.bin") for t in selected]
+        idf = _Idf(df_paths, n_docs)
+
+        q_tf: dict[str, int] = {}
+        for t in query_tokens:
+            q_tf[t] = q_tf.get(t, 0) + 1
+        query = []
+        total = 0.0
+        for t, c in q_tf.items():
+            term_id = self.vocab.get(t)
+            weight = (c / len(query_tokens)) * idf(term_id) if term_id is not None else 0.0
+            total += weight * weight
+            if weight:
+                query.append((term_id, weight))
+        if not query:
+            return []
+        query_norm = math.sqrt(total)
+
+        paths = [str(self.dir / name) for t in selected for name in self.manifest["types"][t]["shards"]]
+        args = (df_paths, n_docs, query, query_norm, top_k)
+        workers = SEARCH_WORKERS if workers is None else workers
+        if workers > 1 and len(paths) > 1:
+            pool = _get_pool(workers)
+            results = list(pool.map(search_shard, paths, *[[a] * len(paths) for a in args]))
+        else:
+            results = [search_shard(path, *args) for path in paths]
+        merged = heapq.nlargest(top_k, (s for shard in results for s in shard), key=lambda s: (s[0], -s[1]))
+        return [pos for _score, pos in merged]
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    # Kept alive between queries so workers keep their shard mappings and norms.
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import re
 import unicodedata
 
@@ -5,6 +7,14 @@ from .ollama_client import ask_ollama
 
 VALID_TYPES = ["identity", "short_term", "long_term"]
 
+# Batched classification packs several segments into one prompt so the
+# instructions are prefilled once per batch instead of once per segment.
+# BATCH_TOKEN_BUDGET bounds the estimated prompt size (keep it under the
+# model context); MAX_BATCH_ITEMS bounds the answer length.
+BATCH_TOKEN_BUDGET = 1500
+MAX_BATCH_ITEMS = 24
+CHARS_PER_TOKEN = 4
+
 IDENTITY_PATTERNS = [
     r"\bmeu nome e\b",
     r"\bme chamo\b",
@@ -61,3 +71,147 @@ def classify_memory(content):
         return first_line, None, "model"
 
     return None, f"unrecognized_response:{first_line}", "model"
+
+
+BATCH_PROMPT_TEMPLATE = """
+Classifique cada texto abaixo em APENAS UM dos tipos:
+
+identity
+short_term
+long_term
+
+Responda apenas JSON valido no formato:
+{{"labels": [{{"id": 1, "type": "short_term"}}]}}
+Inclua um item para cada id.
+
+{items}
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _batch_overhead_tokens() -> int:
+    return estimate_tokens(BATCH_PROMPT_TEMPLATE)
+
+
+def _item_tokens(content: str) -> int:
+    # Item header plus one label entry in the answer.
+    return estimate_tokens(content) + 12
+
+
+def plan_batches(contents: list[str]) -> list[list[int]]:
+    """
+    Group item positions into batches that fit BATCH_TOKEN_BUDGET.
+    An item larger than the budget gets a batch of its own.
+    """
+    batches: list[list[int]] = []
+    current: list[int] = []
+    used = _batch_overhead_tokens()
+    for pos, content in enumerate(contents):
+        cost = _item_tokens(content)
+        if current and (used + cost > BATCH_TOKEN_BUDGET or len(current) >= MAX_BATCH_ITEMS):
+            batches.append(current)
+            current = []
+            used = _batch_overhead_tokens()
+        current.append(pos)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def fits_batch(contents: list[str], content: str) -> bool:
+    if not contents:
+        return True
+    if len(contents) >= MAX_BATCH_ITEMS:
+        return False
+    used = _batch_overhead_tokens() + sum(_item_tokens(c) for c in contents)
+    return used + _item_tokens(content) <= BATCH_TOKEN_BUDGET
+
+
+def _parse_batch_labels(response: str, count: int) -> dict[int, str]:
+    try:
+        data = json.loads(response)
+    except ValueError:
+        start = response.find("{")
+        end = response.rfind("}")
+        if start == -1 or end <= start:
+            return {}
+        try:
+            data = json.loads(response[start : end + 1])
+        except ValueError:
+            return {}
+
+    if isinstance(data, dict):
+        data = data.get("labels", data.get("items", []))
+    if not isinstance(data, list):
+        return {}
+
+    labels: dict[int, str] = {}
+    for pos, entry in enumerate(data, start=1):
+        if isinstance(entry, str):
+            item_id, label = pos, entry
+        elif isinstance(entry, dict):
+            item_id, label = entry.get("id", pos), entry.get("type", entry.get("label"))
+        else:
+            continue
+        try:
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            continue
+        label = str(label or "").strip().lower()
+        if 1 <= item_id <= count and label in VALID_TYPES:
+            labels[item_id] = label
+    return labels
+
+
+def _classify_one_batch(contents: list[str]) -> list[tuple]:
+    items = "\n".join(f"[{i}]\n{c}\n" for i, c in enumerate(contents, start=1))
+    response = ask_ollama(BATCH_PROMPT_TEMPLATE.format(items=items), json_mode=True)
+    labels = {}
+    if response and not response.startswith("error:"):
+        labels = _parse_batch_labels(response, len(contents))
+
+    results = []
+    for i, content in enumerate(contents, start=1):
+        if i in labels:
+            results.append((labels[i], None, "model_batch"))
+        else:
+            # Only items whose label failed to parse pay for their own call.
+            results.append(classify_memory(content))
+    return results
+
+
+def classify_batch(contents: list[str]) -> list[tuple]:
+    """
+    Classify many segments with as few model calls as possible.
+    Returns one (type, error, source) tuple per input, in order.
+    """
+    results: list[tuple | None] = [None] * len(contents)
+    pending: list[int] = []
+    for pos, content in enumerate(contents):
+        if _looks_like_identity(content):
+            results[pos] = ("identity", None, "heuristic")
+        else:
+            pending.append(pos)
+
+    if len(pending) == 1:
+        pos = pending[0]
+        results[pos] = classify_memory(contents[pos])
+        return results
+
+    pending_contents = [contents[pos] for pos in pending]
+    for batch in plan_batches(pending_contents):
+        batch_results = _classify_one_batch([pending_contents[i] for i in batch])
+        for i, result in zip(batch, batch_results):
+            results[pending[i]] = result
+    return results
+
+
+# Changes whenever prompts or heuristics change, so cached labels from an
+# older classifier are not reused (see ai.label_cache).
+PROMPT_VERSION = hashlib.sha256(
+    "\x1f".join([PROMPT_TEMPLATE, BATCH_PROMPT_TEMPLATE, *IDENTITY_PATTERNS]).encode("utf-8")
+).hexdigest()[:12]
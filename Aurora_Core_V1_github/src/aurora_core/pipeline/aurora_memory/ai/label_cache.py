@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Persistent classification cache: segment hash + model + prompt version -> label.
+# Entries are stored compactly as {key: [label, source, last_used]} and the
+# least recently used ones are evicted above MAX_ENTRIES.
+# Change AURORA_LABEL_CACHE_MAX to bound the cache size.
+MAX_ENTRIES = int(os.getenv("AURORA_LABEL_CACHE_MAX", "200000"))
+EVICT_FRACTION = 0.1
+KEY_CHARS = 32
+
+
+class LabelCache:
+    def __init__(self, path: Path, model: str, prompt_version: str) -> None:
+        self.path = path
+        self.namespace = f"{model}\x1f{prompt_version}"
+        self.entries: dict[str, list] = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def _key(self, content_hash: str) -> str:
+        raw = f"{content_hash}\x1f{self.namespace}".encode()
+        return hashlib.sha256(raw).hexdigest()[:KEY_CHARS]
+
+    def load(self) -> "LabelCache":
+        if not self.path.exists():
+            return self
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.entries = data.get("entries", {})
+        except (OSError, ValueError, AttributeError):
+            self.entries = {}
+        return self
+
+    def get(self, content_hash: str) -> tuple | None:
+        key = self._key(content_hash)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry[2] = int(time.time())
+            self.dirty = True
+            return entry[0], None, entry[1]
+
+    def put(self, content_hash: str, label: str, source: str) -> None:
+        key = self._key(content_hash)
+        with self._lock:
+            self.entries[key] = [label, source, int(time.time())]
+            self.dirty = True
+
+    def _evict(self) -> None:
+        if len(self.entries) <= MAX_ENTRIES:
+            return
+        target = int(MAX_ENTRIES * (1 - EVICT_FRACTION))
+        ranked = sorted(self.entries.items(), key=lambda kv: kv[1][2], reverse=True)
+        self.entries = dict(ranked[:target])
+
+    def save(self) -> None:
+        with self._lock:
+            if not self.dirty:
+                return
+            self._evict()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps({"entries": self.entries}, ensure_ascii=True, separators=(",", ":")),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        rate = (self.hits / lookups * 100) if lookups else 0.0
+        return (
+            f"Cache de classificacao: {self.hits}/{lookups} acertos ({rate:.1f}%), "
+            f"{len(self.entries)} entradas"
+        )
@@ -0,0 +1,232 @@
+import json
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from itertools import pairwise
+from pathlib import Path
+
+from .classifier import VALID_TYPES, _normalize
+
+# Local pre-classifier: multinomial naive Bayes over hashed word unigrams and
+# bigrams, trained from the labels the model produced (ingest_log.jsonl).
+# Segments it labels with confidence >= threshold skip the LLM entirely.
+# What can be changed without editing business logic:
+# - AURORA_LOCAL_CLASSIFIER_THRESHOLD: minimum posterior to trust a local label
+# - MIN_TRAINING_EXAMPLES: below this the model is not saved (nothing is skipped)
+LOCAL_THRESHOLD = float(os.getenv("AURORA_LOCAL_CLASSIFIER_THRESHOLD", "0.9"))
+NUM_FEATURES = 2**18
+ALPHA = 0.5
+MIN_TRAINING_EXAMPLES = 50
+# Only labels that came from the model (or the identity rule) are training
+# data; local labels would only reinforce the classifier's own mistakes.
+TRAINING_SOURCES = {"model", "model_batch", "heuristic"}
+# One example in HOLDOUT_EVERY (chosen by key hash) is held out for the report.
+HOLDOUT_EVERY = 5
+REPORT_THRESHOLDS = (0.6, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def features(text: str) -> Counter:
+    words = _WORD_RE.findall(_normalize(text))
+    grams = words + [f"{a} {b}" for a, b in pairwise(words)]
+    return Counter(zlib.crc32(g.encode("utf-8")) % NUM_FEATURES for g in grams)
+
+
+class LocalClassifier:
+    def __init__(self, threshold: float = LOCAL_THRESHOLD) -> None:
+        self.threshold = threshold
+        self.docs = {label: 0 for label in VALID_TYPES}
+        self.counts: dict[str, dict[int, int]] = {label: {} for label in VALID_TYPES}
+        self.totals = {label: 0 for label in VALID_TYPES}
+
+    def __len__(self) -> int:
+        return sum(self.docs.values())
+
+    def fit(self, examples: list[tuple[str, str]]) -> "LocalClassifier":
+        for text, label in examples:
+            self.docs[label] += 1
+            counts = self.counts[label]
+            for bucket, n in features(text).items():
+                counts[bucket] = counts.get(bucket, 0) + n
+                self.totals[label] += n
+        return self
+
+    def probabilities(self, text: str) -> dict[str, float]:
+        feats = features(text)
+        docs = len(self)
+        scores = {}
+        for label in VALID_TYPES:
+            if not self.docs[label]:
+                continue
+            counts = self.counts[label]
+            denom = math.log(self.totals[label] + ALPHA * NUM_FEATURES)
+            score = math.log(self.docs[label] / docs)
+            for bucket, n in feats.items():
+                score += n * (math.log(counts.get(bucket, 0) + ALPHA) - denom)
+            scores[label] = score
+        if not scores:
+            return {}
+        top = max(scores.values())
+        exp = {label: math.exp(s - top) for label, s in scores.items()}
+        norm = sum(exp.values())
+        return {label: v / norm for label, v in exp.items()}
+
+    def predict(self, text: str) -> tuple[str | None, float]:
+        probs = self.probabilities(text)
+        if not probs:
+            return None, 0.0
+        label = max(probs, key=probs.get)
+        return label, probs[label]
+
+    def classify(self, text: str) -> str | None:
+        """
+        The label when confidence reaches the threshold, otherwise None
+        (the caller falls back to the model).
+        """
+        label, confidence = self.predict(text)
+        return label if confidence >= self.threshold else None
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "num_features": NUM_FEATURES,
+                    "alpha": ALPHA,
+                    "docs": self.docs,
+                    "totals": self.totals,
+                    "counts": {label: {str(k): v for k, v in c.items()} for label, c in self.counts.items()},
+                },
+                ensure_ascii=True,
+                separators=(",", ":"),
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, threshold: float = LOCAL_THRESHOLD) -> "LocalClassifier | None":
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("num_features") != NUM_FEATURES or data.get("alpha") != ALPHA:
+            return None
+        model = cls(threshold)
+        for label in VALID_TYPES:
+            model.docs[label] = data["docs"].get(label, 0)
+            model.totals[label] = data["totals"].get(label, 0)
+            model.counts[label] = {int(k): v for k, v in data["counts"].get(label, {}).items()}
+        return model
+
+
+def load_training_examples(log_path: Path, memory_dir: Path) -> list[tuple[str, str, str]]:
+    """
+    (key, text, label) for every segment stored with a model label. The log
+    has no text, so it is read back from the memory file the segment was
+    written to; the latest label of a segment wins.
+    """
+    labels: dict[str, tuple[str, Path]] = {}
+    if not log_path.exists():
+        return []
+    with log_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get("status") != "ok" or event.get("source") not in TRAINING_SOURCES:
+                continue
+            label = event.get("type")
+            if label not in VALID_TYPES:
+                continue
+            source = Path(event["file"])
+            name = f"{label}_{source.stem}_part{event['segment']}{source.suffix}"
+            labels[f"{event['file']}#{event['segment']}"] = (label, memory_dir / label / name)
+
+    examples = []
+    for key, (label, path) in labels.items():
+        try:
+            text = path.read_text(encoding="utf-8").strip()
+        except OSError:
+            continue
+        if text:
+            examples.append((key, text, label))
+    return examples
+
+
+def _held_out(key: str) -> bool:
+    return zlib.crc32(key.encode("utf-8")) % HOLDOUT_EVERY == 0
+
+
+def evaluate(model: LocalClassifier, examples: list[tuple[str, str]]) -> dict:
+    """
+    Accuracy of the model on labelled examples, overall and for the
+    predictions it would be trusted with at each threshold. Coverage is the
+    share of segments that would skip the LLM.
+    """
+    predictions = [(model.predict(text), label) for text, label in examples]
+    total = len(predictions)
+    report = {
+        "examples": total,
+        "accuracy": sum(1 for (p, _c), label in predictions if p == label) / total if total else 0.0,
+        "thresholds": [],
+    }
+    for threshold in REPORT_THRESHOLDS:
+        confident = [(p, label) for (p, c), label in predictions if c >= threshold]
+        report["thresholds"].append(
+            {
+                "threshold": threshold,
+                "coverage": len(confident) / total if total else 0.0,
+                "accuracy": (
+                    sum(1 for p, label in confident if p == label) / len(confident) if confident else 0.0
+                ),
+            }
+        )
+    return report
+
+
+def train(log_path: Path, memory_dir: Path, model_path: Path, threshold: float = LOCAL_THRESHOLD) -> dict:
+    """
+    Retrain from the ingest log. The report is measured on held-out segments,
+    then the saved model is fitted on all of them.
+    """
+    examples = load_training_examples(log_path, memory_dir)
+    train_set = [(text, label) for key, text, label in examples if not _held_out(key)]
+    test_set = [(text, label) for key, text, label in examples if _held_out(key)]
+    report = evaluate(LocalClassifier(threshold).fit(train_set), test_set)
+    report["threshold"] = threshold
+    report["training_examples"] = len(examples)
+    report["labels"] = dict(Counter(label for _key, _text, label in examples))
+    report["saved"] = len(examples) >= MIN_TRAINING_EXAMPLES
+    if report["saved"]:
+        LocalClassifier(threshold).fit([(text, label) for _key, text, label in examples]).save(model_path)
+    elif model_path.exists():
+        # A stale model trained on other data must not keep skipping the LLM.
+        model_path.unlink()
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"Exemplos rotulados: {report['training_examples']} {report['labels']}",
+        f"Validacao: {report['examples']} exemplos, acuracia geral {report['accuracy'] * 100:.1f}%",
+        "limiar  cobertura (chamadas LLM evitadas)  acuracia",
+    ]
+    for row in report["thresholds"]:
+        marker = " <- atual" if abs(row["threshold"] - report["threshold"]) < 1e-9 else ""
+        lines.append(
+            f"{row['threshold']:.2f}    {row['coverage'] * 100:5.1f}%"
+            f"                          {row['accuracy'] * 100:5.1f}%{marker}"
+        )
+    if not report["saved"]:
+        lines.append(
+            f"Modelo nao salvo: minimo de {MIN_TRAINING_EXAMPLES} exemplos (todos os segmentos usam o LLM)."
+        )
+    return "\n".join(lines)
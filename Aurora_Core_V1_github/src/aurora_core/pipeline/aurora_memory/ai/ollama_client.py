@@ -1,18 +1,145 @@
+import http.client
+import json
 import subprocess
 import os
+import threading
+import time
+
+from aurora_core.utils.singleflight import SingleFlight
 
 # Aurora models are based on Llama 3.1 via Ollama
 # Change AURORA_MEMORY_MODEL to switch the model used by ingest classification.
 MODEL_NAME = os.getenv("AURORA_MEMORY_MODEL", "aurora_memory:latest")
 
-def ask_ollama(prompt):
+# Ingest talks to the Ollama HTTP API over a persistent connection per worker
+# thread. Set USE_HTTP_API=False to force the `ollama run` CLI. When the API is
+# unreachable the call goes to the CLI and the API is not tried again for
+# API_RETRY_AFTER_S; a call that times out is an error (the CLI would wait on
+# the same busy server).
+# AURORA_MEMORY_KEEP_ALIVE controls how long Ollama keeps the model loaded.
+OLLAMA_HOST = "127.0.0.1"
+OLLAMA_PORT = 11434
+USE_HTTP_API = True
+KEEP_ALIVE = os.getenv("AURORA_MEMORY_KEEP_ALIVE", "10m")
+HTTP_TIMEOUT_S = 300
+CLI_TIMEOUT_S = 600
+API_RETRY_AFTER_S = 30.0
+
+# What a kept-alive socket closed by the server looks like before any response
+# (RemoteDisconnected is a ConnectionResetError).
+_STALE_SOCKET_ERRORS = (BrokenPipeError, ConnectionResetError, ConnectionAbortedError)
+
+_INFLIGHT = SingleFlight()
+_local = threading.local()
+# Model calls actually made (after coalescing) and time spent waiting on them;
+# read by the ingest metrics (pipeline.metrics).
+_stats = {"calls": 0, "seconds": 0.0}
+_stats_lock = threading.Lock()
+_api_down_until = 0.0
+
+
+def call_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def ask_ollama(prompt, json_mode=False):
+    # Identical prompts issued concurrently (e.g. the same segment text from
+    # several workers) share a single model call.
+    return _INFLIGHT.do((MODEL_NAME, json_mode, prompt), lambda: _ask(prompt, json_mode))
+
+
+def _ask(prompt, json_mode):
+    global _api_down_until
+    started = time.perf_counter()
+    try:
+        if USE_HTTP_API and time.monotonic() >= _api_down_until:
+            try:
+                return _ask_http(prompt, json_mode)
+            except TimeoutError:
+                return "error:http_timeout"
+            except (OSError, http.client.HTTPException, ValueError):
+                _api_down_until = time.monotonic() + API_RETRY_AFTER_S
+        return _run_ollama(prompt, json_mode)
+    finally:
+        with _stats_lock:
+            _stats["calls"] += 1
+            _stats["seconds"] += time.perf_counter() - started
+
+
+def _connection():
+    """
+    The thread's connection and whether it already served a request (only
+    then can a failure be a stale socket).
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = http.client.HTTPConnection(OLLAMA_HOST, OLLAMA_PORT, timeout=HTTP_TIMEOUT_S)
+        _local.conn = conn
+        _local.reused = False
+    return conn, _local.reused
+
+
+def _drop_connection():
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+    _local.conn = None
+
+
+def _ask_http(prompt, json_mode):
+    body = {
+        "model": MODEL_NAME,
+        "prompt": prompt,
+        "stream": False,
+        "keep_alive": KEEP_ALIVE,
+    }
+    if json_mode:
+        body["format"] = "json"
+    payload = json.dumps(body)
+    headers = {"Content-Type": "application/json"}
+
+    # A kept-alive socket may have been closed by the server; retry once on a
+    # fresh one. Anything else (refused, timeout, error mid-response) is not
+    # retried here.
+    for attempt in range(2):
+        conn, reused = _connection()
+        try:
+            conn.request("POST", "/api/generate", payload, headers)
+            response = conn.getresponse()
+        except _STALE_SOCKET_ERRORS:
+            _drop_connection()
+            if attempt or not reused:
+                raise
+            continue
+        except BaseException:
+            _drop_connection()
+            raise
+        try:
+            raw = response.read()
+        except BaseException:
+            _drop_connection()
+            raise
+        _local.reused = True
+        if response.status != 200:
+            return f"error:http_{response.status}:{response.reason}"
+        data = json.loads(raw.decode("utf-8"))
+        return (data.get("response") or "").strip()
+    return "error:http_no_response"
+
+
+def _run_ollama(prompt, json_mode=False):
+    cmd = ["ollama", "run", MODEL_NAME]
+    if json_mode:
+        cmd.insert(2, "--format=json")
     try:
         result = subprocess.run(
-            ["ollama", "run", MODEL_NAME],
+            cmd,
             input=prompt,
             capture_output=True,
             text=True,
-            encoding="utf-8"
+            encoding="utf-8",
+            timeout=CLI_TIMEOUT_S,
         )
         if result.returncode != 0:
             err = (result.stderr or "").strip()
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def load_manifest(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return data.get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def save_manifest(path: Path, files: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps({"files": files}, ensure_ascii=True, indent=2),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+def hash_prefix(file_path: Path, length: int | None = None) -> str:
+    digest = hashlib.sha256()
+    remaining = length
+    with file_path.open("rb") as f:
+        while remaining is None or remaining > 0:
+            size = HASH_CHUNK_BYTES if remaining is None else min(HASH_CHUNK_BYTES, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def plan_file(file_path: Path, entry: dict | None, pipeline_version: str) -> tuple[str, int, dict]:
+    """
+    Decide what to do with a data file before any LLM work.
+    Returns (action, offset, fingerprint) where action is:
+    - "skip": unchanged since it was processed
+    - "tail": only bytes from offset onward are new (file was appended to)
+    - "full": new, rewritten, or processed by another pipeline version
+    """
+    stat = file_path.stat()
+    fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime}
+    if not entry or entry.get("pipeline_version") != pipeline_version:
+        return "full", 0, fingerprint
+
+    old_size = entry.get("size", -1)
+    if stat.st_size == old_size and stat.st_mtime == entry.get("mtime"):
+        return "skip", 0, fingerprint
+    if stat.st_size == old_size:
+        content_hash = hash_prefix(file_path)
+        fingerprint["sha256"] = content_hash
+        return ("skip" if content_hash == entry.get("sha256") else "full"), 0, fingerprint
+    if stat.st_size > old_size and hash_prefix(file_path, old_size) == entry.get("sha256"):
+        return "tail", old_size, fingerprint
+    return "full", 0, fingerprint
+
+
+def make_entry(
+    file_path: Path,
+    fingerprint: dict,
+    pipeline_version: str,
+    segments: int,
+    status: str,
+) -> dict:
+    content_hash = fingerprint.get("sha256") or hash_prefix(file_path, fingerprint["size"])
+    return {
+        "path": str(file_path),
+        "size": fingerprint["size"],
+        "mtime": fingerprint["mtime"],
+        "sha256": content_hash,
+        "pipeline_version": pipeline_version,
+        "segments": segments,
+        "status": status,
+    }
@@ -1,11 +1,14 @@
 from pathlib import Path
 
+from aurora_core.utils.namespaces import namespace_path
+
 BASE_DIR = Path(__file__).resolve().parents[5]
 DATA_DIR = BASE_DIR / "data"
 
-def read_data_files():
-    if not DATA_DIR.exists():
-        print(f"[ERRO] Pasta data nao encontrada: {DATA_DIR}")
+def read_data_files(namespace=None):
+    data_dir = namespace_path(DATA_DIR, namespace)
+    if not data_dir.exists():
+        print(f"[ERRO] Pasta data nao encontrada: {data_dir}")
         return []
 
-    return list(DATA_DIR.glob("*.txt"))
+    return list(data_dir.glob("*.txt"))
@@ -1,17 +1,32 @@
+import codecs
 import json
 import re
-import subprocess
-import os
+
+from ..ai.ollama_client import ask_ollama
 
 MIN_SEGMENT_LEN = 10
-# Change AURORA_MEMORY_MODEL for splitter behavior; set USE_LLM_SPLITTER=False
-# to force rule-based split (faster and less precise).
-MODEL_NAME = os.getenv("AURORA_MEMORY_MODEL", "aurora_memory:latest")
+# The splitter uses the ingest model (AURORA_MEMORY_MODEL) in JSON output mode;
+# set USE_LLM_SPLITTER=False to force rule-based split (faster and less precise).
 USE_LLM_SPLITTER = True
 
+# Streaming split: files are read incrementally and cut into windows that fit
+# the model context. WINDOW_TOKENS bounds each splitter prompt; the last,
+# possibly unfinished segment of a window is carried into the next one.
+WINDOW_TOKENS = 1500
+CHARS_PER_TOKEN = 4
+WINDOW_CHARS = WINDOW_TOKENS * CHARS_PER_TOKEN
+OVERLAP_CHARS = 400
+# A message that fills a whole window is carried too, with half a window of new
+# text added each time; past MAX_CARRY_CHARS it is emitted cut.
+MAX_CARRY_CHARS = 4 * WINDOW_CHARS
+READ_CHUNK_BYTES = 64 * 1024
+
+
+MARKER_RE = re.compile(r"(?m)^\s*>>>\s*")
+
 
 def _split_by_markers(content: str) -> list[str]:
-    parts = re.split(r"(?m)^\\s*>>>\\s*", content)
+    parts = MARKER_RE.split(content)
     segments = []
     for part in parts:
         part = part.strip()
@@ -21,7 +36,7 @@ def _split_by_markers(content: str) -> list[str]:
 
 
 def _split_by_paragraphs(content: str) -> list[str]:
-    parts = re.split(r"\\n\\s*\\n", content)
+    parts = re.split(r"\n\s*\n", content)
     segments = []
     for part in parts:
         part = part.strip()
@@ -35,6 +50,11 @@ def _extract_json_array(text: str) -> list[dict] | None:
         data = json.loads(text)
         if isinstance(data, list):
             return data
+        # JSON mode returns an object; accept {"messages": [...]}.
+        if isinstance(data, dict):
+            for value in data.values():
+                if isinstance(value, list):
+                    return value
     except Exception:
         pass
     start = text.find("[")
@@ -53,26 +73,22 @@ def _extract_json_array(text: str) -> list[dict] | None:
 def _split_with_llm(content: str) -> list[dict] | None:
     prompt = (
         "Separe o texto em mensagens individuais e retorne apenas JSON valido.\n"
-        "Formato: [{\"category\":\"identity|short_term|long_term\","
-        "\"source\":\"user|assistant\",\"data\":\"...\"}]\n"
+        "Formato: {\"messages\": [{\"category\":\"identity|short_term|long_term\","
+        "\"source\":\"user|assistant\",\"data\":\"...\"}]}\n"
         "Texto:\n"
         f"{content}"
     )
     try:
-        result = subprocess.run(
-            ["ollama", "run", MODEL_NAME],
-            input=prompt,
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-        )
-        if result.returncode != 0:
+        response = ask_ollama(prompt, json_mode=True)
+        if not response or response.startswith("error:"):
             return None
-        data = _extract_json_array(result.stdout.strip())
+        data = _extract_json_array(response)
         if not data:
             return None
         segments = []
         for item in data:
+            if not isinstance(item, dict):
+                continue
             text = (item.get("data") or "").strip()
             if len(text) < MIN_SEGMENT_LEN:
                 continue
@@ -88,13 +104,23 @@ def _split_with_llm(content: str) -> list[dict] | None:
         return None
 
 
+def _split_by_rules(content: str) -> list[dict]:
+    segments = _split_by_markers(content)
+    if len(segments) <= 1 and not MARKER_RE.match(content):
+        segments = _split_by_paragraphs(content)
+
+    filtered = [s for s in segments if len(s) >= MIN_SEGMENT_LEN]
+    segments = filtered if filtered else segments
+    return [{"text": s} for s in segments]
+
+
 def split_content(content: str) -> list[dict]:
     """
     Split raw conversation into smaller chunks before classification.
     Tries LLM-based splitting first for accuracy, then falls back to markers
     and paragraph splitting.
     """
-    content = content.replace("\\r\\n", "\\n").strip()
+    content = content.replace("\r\n", "\n").strip()
     if not content:
         return []
 
@@ -103,10 +129,113 @@ def split_content(content: str) -> list[dict]:
         if llm_segments:
             return llm_segments
 
-    segments = _split_by_markers(content)
-    if len(segments) <= 1:
-        segments = _split_by_paragraphs(content)
+    return _split_by_rules(content)
 
-    filtered = [s for s in segments if len(s) >= MIN_SEGMENT_LEN]
-    segments = filtered if filtered else segments
-    return [{"text": s} for s in segments]
+
+def _read_text_chunks(file_path, start: int = 0, end: int | None = None):
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending_cr = ""
+    with file_path.open("rb") as f:
+        f.seek(start)
+        remaining = None if end is None else max(end - start, 0)
+        while remaining is None or remaining > 0:
+            size = READ_CHUNK_BYTES if remaining is None else min(READ_CHUNK_BYTES, remaining)
+            raw = f.read(size)
+            if not raw:
+                break
+            if remaining is not None:
+                remaining -= len(raw)
+            text = pending_cr + decoder.decode(raw)
+            # Keep a trailing \r until we know whether \n follows.
+            pending_cr = "\r" if text.endswith("\r") else ""
+            if pending_cr:
+                text = text[:-1]
+            if text:
+                yield text.replace("\r\n", "\n")
+    tail = pending_cr + decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def _locate(window: str, text: str) -> int | None:
+    pos = window.rfind(text)
+    if pos == -1:
+        pos = window.rfind(text[:40])
+    return pos if pos > 0 else None
+
+
+def _strip_overlap(text: str, overlap: str) -> str:
+    # A segment that starts inside the overlap repeats its end: keep only the
+    # new text.
+    for size in range(min(len(text), len(overlap)), MIN_SEGMENT_LEN - 1, -1):
+        if overlap.endswith(text[:size]):
+            return text[size:].strip()
+    return text
+
+
+def iter_segments(file_path, start: int = 0, end: int | None = None):
+    """
+    Streaming counterpart of split_content for files of any size.
+    Reads the byte range [start, end) incrementally and yields segments as
+    each window is split, so memory stays bounded and the first segments can
+    be classified before the file is fully read.
+    """
+    chunks = _read_text_chunks(file_path, start, end)
+    buffer = ""
+    eof = False
+    overlap = ""
+    carried = 0
+
+    while True:
+        limit = max(WINDOW_CHARS, carried + WINDOW_CHARS // 2)
+        while not eof and len(buffer) < limit:
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+            else:
+                buffer += chunk
+        if not buffer.strip():
+            return
+
+        window, rest = buffer[:limit], buffer[limit:]
+        final = eof and not rest
+        segments = split_content(window)
+
+        carry = ""
+        next_overlap = ""
+        if not final and len(segments) == 1 and len(window) < MAX_CARRY_CHARS:
+            # One message fills the window and may go on past it. The carry
+            # still starts with the current overlap, if any.
+            carry = window
+            next_overlap = overlap
+            segments = []
+        elif not final and len(segments) > 1:
+            # The last segment may continue in the next window: re-split it
+            # together with the following text instead of emitting it now.
+            last = segments[-1]
+            pos = _locate(window, last.get("text", ""))
+            if pos is not None and len(window) - pos <= WINDOW_CHARS // 2:
+                carry = window[pos:]
+                segments = segments[:-1]
+            else:
+                # The model rewrote the text, so its boundary cannot be found:
+                # fall back to a fixed overlap and drop repeated pieces below.
+                carry = next_overlap = window[-OVERLAP_CHARS:]
+        buffer = carry + rest
+        carried = len(carry)
+
+        for segment in segments:
+            text = segment.get("text", "")
+            if overlap and text:
+                if text in overlap:
+                    continue
+                stripped = _strip_overlap(text, overlap)
+                if len(stripped) < MIN_SEGMENT_LEN:
+                    continue
+                if stripped != text:
+                    segment = {**segment, "text": stripped}
+            yield segment
+        overlap = next_overlap
+
+        if final:
+            return
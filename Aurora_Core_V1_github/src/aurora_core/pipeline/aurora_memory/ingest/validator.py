@@ -1,18 +1,41 @@
+import codecs
 import re
 
 # nomealeatorio_DD_MM_AAAA.txt
 FILENAME_PATTERN = re.compile(r".+_\d{2}_\d{2}_\d{4}\.txt")
 
-def validate_file(file_path):
+def check_file(file_path, start=0, end=None, min_chars=10, chunk_bytes=64 * 1024):
+    """
+    Validate name, readability and minimum length of the byte range
+    [start, end) without loading the file. start/end let incremental ingest
+    check only the appended tail. Returns (ok, reason).
+    """
     if not FILENAME_PATTERN.match(file_path.name):
         return False, "Nome de arquivo invalido"
 
+    # The whole range is decoded (strictly, chunk by chunk) so a file that is
+    # not valid UTF-8 is still rejected up front.
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    seen = 0
     try:
-        content = file_path.read_text(encoding="utf-8").strip()
-    except Exception as e:
+        with file_path.open("rb") as f:
+            f.seek(start)
+            remaining = None if end is None else max(end - start, 0)
+            while remaining is None or remaining > 0:
+                size = chunk_bytes if remaining is None else min(chunk_bytes, remaining)
+                raw = f.read(size)
+                if not raw:
+                    break
+                if remaining is not None:
+                    remaining -= len(raw)
+                text = decoder.decode(raw)
+                if seen < min_chars:
+                    seen += len(text.strip())
+            decoder.decode(b"", final=True)
+    except (OSError, UnicodeDecodeError) as e:
         return False, f"Erro ao ler arquivo: {e}"
 
-    if len(content) < 10:
+    if seen < min_chars:
         return False, "Conteudo muito curto"
 
-    return True, content
+    return True, None
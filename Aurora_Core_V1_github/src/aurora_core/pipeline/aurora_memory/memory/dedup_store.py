@@ -0,0 +1,323 @@
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+# Scalable exact-dedup store.
+# - bloom.bin: Bloom filter answering "definitely new" without touching disk
+# - hashes.log: append-only 40-byte records (sha256 digest + offset into meta.jsonl)
+# - run_*.bin: immutable sorted runs of records, memory-mapped and binary searched
+# - meta.jsonl: {"file", "type"} of each stored segment, read only on a hit
+# The log is sorted into a new run once it holds LOG_MAX_RECORDS records and
+# runs are merged once there are more than MAX_RUNS, so startup only reads
+# the Bloom filter and a bounded log tail.
+RECORD = struct.Struct(">32sQ")
+RECORD_SIZE = RECORD.size
+DIGEST_SIZE = 32
+LOG_MAX_RECORDS = 65536
+MAX_RUNS = 8
+BLOOM_FP_RATE = 0.001
+BLOOM_MIN_CAPACITY = 100000
+BLOOM_HEADER = struct.Struct(">QQQ")  # bits, hashes, capacity
+STORE_HEADER = struct.Struct(">Q")  # entries covered by the saved filter
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, fp_rate: float = BLOOM_FP_RATE) -> None:
+        self.capacity = capacity
+        self.bits = max(8, int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, digest: bytes):
+        # The keys are already sha256 digests: two 64-bit slices give
+        # independent hashes for double hashing.
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, digest: bytes) -> None:
+        for pos in self._positions(digest):
+            self.array[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self.array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+    def to_bytes(self) -> bytes:
+        return BLOOM_HEADER.pack(self.bits, self.hashes, self.capacity) + bytes(self.array)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "BloomFilter":
+        bits, hashes, capacity = BLOOM_HEADER.unpack_from(raw)
+        bloom = cls.__new__(cls)
+        bloom.bits, bloom.hashes, bloom.capacity = bits, hashes, capacity
+        bloom.array = bytearray(raw[BLOOM_HEADER.size:])
+        if len(bloom.array) != (bits + 7) // 8:
+            raise ValueError("bloom filter truncated")
+        return bloom
+
+
+class _Run:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.size = path.stat().st_size // RECORD_SIZE
+        self._file = path.open("rb")
+        self.mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def find(self, digest: bytes) -> int | None:
+        lo, hi = 0, self.size
+        mm = self.mm
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = mid * RECORD_SIZE
+            key = mm[start : start + DIGEST_SIZE]
+            if key < digest:
+                lo = mid + 1
+            elif key > digest:
+                hi = mid
+            else:
+                return RECORD.unpack_from(mm, start)[1]
+        return None
+
+    def records(self):
+        for i in range(self.size):
+            yield RECORD.unpack_from(self.mm, i * RECORD_SIZE)
+
+    def close(self) -> None:
+        if self.mm is not None:
+            self.mm.close()
+        self._file.close()
+
+
+class DedupStore:
+    """
+    Dict-like view (hash hex -> {"file", "type"}) over the on-disk store.
+    Safe to query from the ingest reader while the committer adds entries.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.dir = directory
+        self.log_path = directory / "hashes.log"
+        self.meta_path = directory / "meta.jsonl"
+        self.bloom_path = directory / "bloom.bin"
+        self.runs: list[_Run] = []
+        self.tail: dict[bytes, int] = {}
+        self.bloom: BloomFilter | None = None
+        self.count = 0
+        self._pending_log: list[bytes] = []
+        self._pending_meta: list[bytes] = []
+        self._meta_size = 0
+        self._lock = threading.RLock()
+
+    # ---------- open / persist ----------
+
+    def open(self) -> "DedupStore":
+        self.dir.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self.dir.glob("run_*.bin")):
+            self.runs.append(_Run(path))
+        if self.log_path.exists():
+            raw = self.log_path.read_bytes()
+            usable = len(raw) - len(raw) % RECORD_SIZE
+            if usable != len(raw):
+                # Torn record from a crash.
+                with self.log_path.open("r+b") as f:
+                    f.truncate(usable)
+            for i in range(0, usable, RECORD_SIZE):
+                digest, offset = RECORD.unpack_from(raw, i)
+                self.tail[digest] = offset
+        self._meta_size = self.meta_path.stat().st_size if self.meta_path.exists() else 0
+        # Records, not hashes: a replaced hash still split between the tail and
+        # a run counts twice until compaction. Only used to size the filter.
+        self.count = len(self.tail) + sum(run.size for run in self.runs)
+
+        try:
+            raw = self.bloom_path.read_bytes()
+            (covered,) = STORE_HEADER.unpack_from(raw)
+            bloom = BloomFilter.from_bytes(raw[STORE_HEADER.size:])
+            if bloom.capacity < self.count:
+                bloom = None
+        except (OSError, ValueError, struct.error):
+            bloom = None
+        if bloom is None:
+            self._rebuild_bloom()
+        else:
+            self.bloom = bloom
+            if covered != self.count:
+                # Crashed between the log and the filter write.
+                for digest in self.tail:
+                    self.bloom.add(digest)
+        return self
+
+    def _iter_digests(self):
+        for run in self.runs:
+            for digest, _offset in run.records():
+                yield digest
+        yield from self.tail
+
+    def _rebuild_bloom(self) -> None:
+        capacity = max(BLOOM_MIN_CAPACITY, self.count * 2)
+        bloom = BloomFilter(capacity)
+        for digest in self._iter_digests():
+            bloom.add(digest)
+        self.bloom = bloom
+
+    def flush(self) -> None:
+        """
+        Write pending entries (meta before log, so a logged record always
+        points at existing metadata), compact if needed and save the filter.
+        """
+        with self._lock:
+            if self._pending_log:
+                with self.meta_path.open("ab") as f:
+                    f.write(b"".join(self._pending_meta))
+                    f.flush()
+                    os.fsync(f.fileno())
+                with self.log_path.open("ab") as f:
+                    f.write(b"".join(self._pending_log))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._pending_log = []
+                self._pending_meta = []
+            if len(self.tail) >= LOG_MAX_RECORDS:
+                # open() repairs the filter from the log, so the filter must
+                # cover the log before the spill empties it.
+                self._save_bloom()
+                self._spill_tail()
+            if len(self.runs) > MAX_RUNS:
+                self.compact()
+            self._save_bloom()
+
+    def _save_bloom(self) -> None:
+        tmp_path = self.bloom_path.with_suffix(".tmp")
+        tmp_path.write_bytes(STORE_HEADER.pack(self.count) + self.bloom.to_bytes())
+        os.replace(tmp_path, self.bloom_path)
+
+    def _next_run_path(self) -> Path:
+        last = max((int(r.path.stem.split("_")[1]) for r in self.runs), default=0)
+        return self.dir / f"run_{last + 1:06d}.bin"
+
+    def _write_run(self, path: Path, records) -> None:
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("wb") as f:
+            for digest, offset in records:
+                f.write(RECORD.pack(digest, offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _spill_tail(self) -> None:
+        path = self._next_run_path()
+        self._write_run(path, sorted(self.tail.items()))
+        self.runs.append(_Run(path))
+        self.tail = {}
+        self.log_path.write_bytes(b"")
+
+    def compact(self) -> None:
+        """
+        Merge all sorted runs into one with a streaming k-way merge.
+        """
+        with self._lock:
+            if len(self.runs) <= 1:
+                return
+            path = self._next_run_path()
+            merged = heapq.merge(*(run.records() for run in self.runs))
+            self._write_run(path, _unique(merged))
+            old = self.runs
+            self.runs = [_Run(path)]
+            for run in old:
+                run.close()
+                run.path.unlink()
+            self.count = len(self.tail) + self.runs[0].size
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            for run in self.runs:
+                run.close()
+            self.runs = []
+
+    # ---------- dict-like access ----------
+
+    def _offset(self, digest: bytes) -> int | None:
+        if digest not in self.bloom:
+            return None
+        if digest in self.tail:
+            return self.tail[digest]
+        for run in reversed(self.runs):
+            offset = run.find(digest)
+            if offset is not None:
+                return offset
+        return None
+
+    def __contains__(self, content_hash: str) -> bool:
+        with self._lock:
+            return self._offset(bytes.fromhex(content_hash)) is not None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def get(self, content_hash: str, default=None):
+        with self._lock:
+            offset = self._offset(bytes.fromhex(content_hash))
+            if offset is None:
+                return default
+            pos = self._meta_size - sum(len(line) for line in self._pending_meta)
+            if offset >= pos:
+                # Added since the last flush: still in memory.
+                for line in self._pending_meta:
+                    if pos == offset:
+                        return json.loads(line)
+                    pos += len(line)
+                return default
+        with self.meta_path.open("rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def __setitem__(self, content_hash: str, entry: dict) -> None:
+        digest = bytes.fromhex(content_hash)
+        with self._lock:
+            if self._offset(digest) is not None:
+                return
+            self._append(digest, entry)
+
+    def replace(self, content_hash: str, entry: dict) -> None:
+        """
+        Point a stored hash at new metadata (e.g. a memory that moved). The
+        newer record shadows the old one until compaction drops it.
+        """
+        digest = bytes.fromhex(content_hash)
+        with self._lock:
+            self._append(digest, entry, new=self._offset(digest) is None)
+
+    def _append(self, digest: bytes, entry: dict, new: bool = True) -> None:
+        line = (json.dumps(entry, ensure_ascii=True) + "\n").encode("utf-8")
+        offset = self._meta_size
+        self._meta_size += len(line)
+        self._pending_meta.append(line)
+        self._pending_log.append(RECORD.pack(digest, offset))
+        self.tail[digest] = offset
+        if not new:
+            # Already counted and already in the filter.
+            return
+        self.count += 1
+        if self.count > self.bloom.capacity:
+            self._rebuild_bloom()
+        else:
+            self.bloom.add(digest)
+
+
+def _unique(records):
+    # Sorted by (digest, offset) and meta offsets only grow, so the last
+    # record of a digest is the newest one.
+    last = None
+    for record in records:
+        if last is not None and record[0] != last[0]:
+            yield last
+        last = record
+    if last is not None:
+        yield last
@@ -0,0 +1,209 @@
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import struct
+import threading
+import unicodedata
+from pathlib import Path
+
+# Near-duplicate detection with MinHash signatures and an LSH band index.
+# A segment is a near duplicate when the estimated Jaccard similarity of its
+# character shingles with a stored segment reaches the threshold. Numbers are
+# facts (amounts, dates, ids): segments whose numbers differ never match.
+# What can be changed without editing business logic:
+# - AURORA_NEAR_DUP_THRESHOLD: similarity (0-1) above which a segment is dropped
+# - NUM_PERM / BANDS: signature size and LSH banding (ROWS = NUM_PERM // BANDS)
+NEAR_DUP_THRESHOLD = float(os.getenv("AURORA_NEAR_DUP_THRESHOLD", "0.85"))
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+SEED = 1729
+# Bumped when normalization or hashing changes; older indexes are rebuilt.
+FORMAT_VERSION = 2
+
+_MASKS = random.Random(SEED).sample(range(1, 2**32), NUM_PERM)
+# Clock times (10:00, 08:15:42) are when something was said, not what.
+_TIME_RE = re.compile(r"\b\d{1,2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?\b")
+_NON_WORD_RE = re.compile(r"[^a-z0-9 ]+")
+_NUMBER_RE = re.compile(r"\d+")
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    # Accents, case, clock times and punctuation do not make a segment new.
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = _TIME_RE.sub(" h ", text)
+    text = _NON_WORD_RE.sub(" ", text)
+    return _WS_RE.sub(" ", text).strip()
+
+
+def _shingle_hashes(text: str) -> set[int]:
+    norm = normalize(text)
+    if len(norm) <= SHINGLE_SIZE:
+        grams = {norm}
+    else:
+        grams = {norm[i : i + SHINGLE_SIZE] for i in range(len(norm) - SHINGLE_SIZE + 1)}
+    # Salting every shingle with the segment's numbers keeps texts with the
+    # same numbers comparable and makes any other pair share no hash at all.
+    numbers = " ".join(_NUMBER_RE.findall(norm))
+    salt = int.from_bytes(hashlib.blake2b(numbers.encode("ascii"), digest_size=4).digest(), "big")
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "big") ^ salt
+        for g in grams
+    }
+
+
+def minhash(text: str) -> tuple[int, ...]:
+    hashes = _shingle_hashes(text)
+    return tuple(min(h ^ mask for h in hashes) for mask in _MASKS)
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def _pack(signature: tuple[int, ...]) -> bytes:
+    return struct.pack(f">{NUM_PERM}I", *signature)
+
+
+def _unpack(raw: bytes) -> tuple[int, ...]:
+    return struct.unpack(f">{NUM_PERM}I", raw)
+
+
+def _band_keys(packed: bytes) -> list[bytes]:
+    width = ROWS * 4
+    return [bytes([band]) + packed[band * width : (band + 1) * width] for band in range(BANDS)]
+
+
+class NearDupIndex:
+    """
+    LSH index over MinHash signatures. Lookups only compare against segments
+    sharing at least one band bucket, so cost does not grow with the corpus.
+    Persisted as {segment_hash: base64 signature}; buckets are rebuilt on load.
+    """
+
+    def __init__(self, path: Path, threshold: float = NEAR_DUP_THRESHOLD) -> None:
+        self.path = path
+        self.threshold = threshold
+        self.signatures: dict[str, bytes] = {}
+        self.buckets: dict[bytes, list[str]] = {}
+        self.dirty = False
+        # The ingest committer inserts and saves while the reader queries.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def _insert(self, key: str, packed: bytes) -> None:
+        self.signatures[key] = packed
+        for band_key in _band_keys(packed):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def add(self, key: str, text: str, signature: bytes | None = None) -> None:
+        """
+        signature: the one check() returned for text, to skip recomputing it.
+        """
+        if key in self.signatures:
+            return
+        packed = signature or _pack(minhash(text))
+        with self._lock:
+            self._insert(key, packed)
+            self.dirty = True
+
+    def remove(self, key: str) -> bool:
+        """
+        Forget a stored segment (e.g. a memory archived by compaction).
+        """
+        with self._lock:
+            packed = self.signatures.pop(key, None)
+            if packed is None:
+                return False
+            for band_key in _band_keys(packed):
+                bucket = self.buckets.get(band_key)
+                if bucket is not None and key in bucket:
+                    bucket.remove(key)
+                    if not bucket:
+                        del self.buckets[band_key]
+            self.dirty = True
+            return True
+
+    def query(self, text: str) -> tuple[str | None, float]:
+        """
+        Returns (key of the most similar stored segment, similarity) when the
+        similarity reaches the threshold, otherwise (None, best similarity).
+        """
+        return self._query(_pack(minhash(text)))
+
+    def check(
+        self, key: str, text: str, signature: bytes | None = None
+    ) -> tuple[str | None, float, bytes]:
+        """
+        query() ignoring key itself, without adding anything. Also returns the
+        signature, so add() can store the segment once it is actually written.
+        """
+        packed = signature or _pack(minhash(text))
+        match_key, score = self._query(packed, exclude=key)
+        return match_key, score, packed
+
+    def _query(self, packed: bytes, exclude: str | None = None) -> tuple[str | None, float]:
+        signature = _unpack(packed)
+        best_key, best_score = None, 0.0
+        seen: set[str] = {exclude} if exclude else set()
+        for band_key in _band_keys(packed):
+            for key in self.buckets.get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = similarity(signature, _unpack(self.signatures[key]))
+                if score > best_score:
+                    best_key, best_score = key, score
+        if best_key is not None and best_score >= self.threshold:
+            return best_key, best_score
+        return None, best_score
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return False
+        if (
+            data.get("version") != FORMAT_VERSION
+            or data.get("num_perm") != NUM_PERM
+            or data.get("bands") != BANDS
+            or data.get("seed") != SEED
+        ):
+            return False
+        for key, encoded in data.get("entries", {}).items():
+            self._insert(key, base64.b64decode(encoded))
+        return True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self.dirty:
+                return
+            entries = {k: base64.b64encode(v).decode("ascii") for k, v in self.signatures.items()}
+            self.dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "version": FORMAT_VERSION,
+                    "num_perm": NUM_PERM,
+                    "bands": BANDS,
+                    "seed": SEED,
+                    "entries": entries,
+                },
+                ensure_ascii=True,
+                separators=(",", ":"),
+            ),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.path)
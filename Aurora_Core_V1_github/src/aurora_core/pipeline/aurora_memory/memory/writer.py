@@ -1,10 +1,12 @@
 from pathlib import Path
 
+from aurora_core.utils.namespaces import namespace_path
+
 BASE_DIR = Path(__file__).resolve().parents[5]
 MEMORY_DIR = BASE_DIR / "memory"
 
-def write_memory(mem_type, original_filename, content):
-    target_dir = MEMORY_DIR / mem_type
+def write_memory(mem_type, original_filename, content, namespace=None):
+    target_dir = namespace_path(MEMORY_DIR, namespace) / mem_type
     target_dir.mkdir(parents=True, exist_ok=True)
 
     new_filename = f"{mem_type}_{original_filename}"
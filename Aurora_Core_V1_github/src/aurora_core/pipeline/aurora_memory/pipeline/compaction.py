@@ -0,0 +1,226 @@
+import os
+import time
+from pathlib import Path
+
+from aurora_core.memory import loader
+from aurora_core.utils.namespaces import rebase
+
+from ..ai.ollama_client import ask_ollama
+from . import ingest_pipeline
+
+# Lifecycle job for short_term memories (scripts/run_compaction.py):
+# - promote: retrieved at least PROMOTE_MIN_HITS times -> long_term
+# - expire: not written nor retrieved for SHORT_TERM_TTL_DAYS -> archive/
+# - merge: clusters of short, related items older than MERGE_MIN_AGE_DAYS ->
+#   one consolidated long_term entry (originals archived)
+# The index, dedup store, near-duplicate index and long_term summary are
+# updated incrementally.
+# It takes the namespace's ingest writer lock, so it refuses to run while an
+# ingest or the ingest daemon is writing the same namespace.
+# What can be changed without editing business logic:
+# - AURORA_SHORT_TERM_TTL_DAYS / AURORA_PROMOTE_MIN_HITS
+# - MERGE_*: which items are merged and how similar they must be
+BASE_DIR = Path(__file__).resolve().parents[5]
+MEMORY_DIR = BASE_DIR / "memory"
+ARCHIVE_DIR = MEMORY_DIR / "archive"
+SHORT_TERM_TTL_DAYS = float(os.getenv("AURORA_SHORT_TERM_TTL_DAYS", "30"))
+PROMOTE_MIN_HITS = int(os.getenv("AURORA_PROMOTE_MIN_HITS", "3"))
+MERGE_MIN_AGE_DAYS = 7.0
+MERGE_MAX_CHARS = 400
+MERGE_SIMILARITY = 0.35
+MERGE_MIN_CLUSTER = 3
+MERGE_MAX_CLUSTER = 12
+DAY_S = 86400.0
+
+MERGE_PROMPT_TEMPLATE = """
+Resuma as anotacoes abaixo em uma unica memoria de longo prazo.
+Mantenha fatos, nomes, datas e decisoes. Nao invente nada.
+Responda apenas com o texto da memoria.
+
+{items}
+"""
+
+
+def _original_name(path: Path) -> str:
+    # Memory files are named <type>_<original> (see memory.writer).
+    prefix = f"{path.parent.name}_"
+    return path.name.removeprefix(prefix)
+
+
+def _clusters(candidates: list[dict]) -> list[list[dict]]:
+    """
+    Greedy clustering: each unassigned item (oldest first) collects the
+    unassigned items whose TF-IDF cosine with it reaches MERGE_SIMILARITY.
+    """
+    vectors, _idf = loader.tfidf_vectors([c["text"] for c in candidates])
+    for item, vec in zip(candidates, vectors):
+        item["vec"] = vec
+    assigned: set[int] = set()
+    clusters = []
+    for i, seed in enumerate(candidates):
+        if i in assigned:
+            continue
+        members = [i]
+        for j in range(i + 1, len(candidates)):
+            if len(members) >= MERGE_MAX_CLUSTER:
+                break
+            if j not in assigned and loader.cosine(seed["vec"], candidates[j]["vec"]) >= MERGE_SIMILARITY:
+                members.append(j)
+        if len(members) >= MERGE_MIN_CLUSTER:
+            assigned.update(members)
+            clusters.append([candidates[m] for m in members])
+    return clusters
+
+
+def _merge_text(items: list[dict], use_model: bool) -> str:
+    bullets = "\n".join(f"- {item['text']}" for item in items)
+    if use_model:
+        response = ask_ollama(MERGE_PROMPT_TEMPLATE.format(items=bullets))
+        if response and not response.startswith("error:"):
+            return response.strip()
+    return bullets
+
+
+def plan_compaction(now: float | None = None, namespace: str | None = None) -> dict:
+    now = time.time() if now is None else now
+    loader.flush_retrieval_stats()
+    stats = loader.load_retrieval_stats(namespace)
+    plan = {"promote": [], "expire": [], "merge": [], "short_term": 0}
+    candidates = []
+    short_dir = loader.memory_dir(namespace) / "short_term"
+    files = sorted(short_dir.glob("*.txt"), key=lambda f: f.stat().st_mtime) if short_dir.exists() else []
+    for f in files:
+        try:
+            text = f.read_text(encoding="utf-8").strip()
+        except OSError:
+            continue
+        plan["short_term"] += 1
+        used = stats.get(loader.memory_key(f), {})
+        last_used = max(f.stat().st_mtime, used.get("last", 0))
+        item = {"path": f, "text": text, "hits": used.get("hits", 0)}
+        if item["hits"] >= PROMOTE_MIN_HITS:
+            plan["promote"].append(item)
+        elif now - last_used > SHORT_TERM_TTL_DAYS * DAY_S:
+            plan["expire"].append(item)
+        elif len(text) <= MERGE_MAX_CHARS and now - last_used >= MERGE_MIN_AGE_DAYS * DAY_S:
+            candidates.append(item)
+    plan["merge"] = _clusters(candidates) if candidates else []
+    return plan
+
+
+def run_compaction(
+    now: float | None = None,
+    use_model: bool = False,
+    dry_run: bool = False,
+    delete: bool = False,
+    namespace: str | None = None,
+) -> dict:
+    """
+    delete=True removes expired/merged items instead of moving them to
+    memory/archive/. dry_run=True only reports what would change.
+    """
+    if dry_run:
+        return _report(plan_compaction(now, namespace))
+    lock = ingest_pipeline.acquire_writer_lock(ingest_pipeline._paths(namespace))
+    try:
+        return _apply(plan_compaction(now, namespace), use_model, delete, namespace)
+    finally:
+        lock.release()
+
+
+def _report(plan: dict) -> dict:
+    return {
+        "short_term": plan["short_term"],
+        "promoted": len(plan["promote"]),
+        "expired": len(plan["expire"]),
+        "merged_clusters": len(plan["merge"]),
+        "merged_items": sum(len(c) for c in plan["merge"]),
+    }
+
+
+def _apply(plan: dict, use_model: bool, delete: bool, namespace: str | None) -> dict:
+    report = _report(plan)
+    if not (plan["promote"] or plan["expire"] or plan["merge"]):
+        return report
+
+    removed: list[Path] = []
+    added: list[Path] = []
+    stats = loader.load_retrieval_stats(namespace)
+    paths = ingest_pipeline._paths(namespace)
+    dedup = ingest_pipeline._load_dedup_store(paths)
+    # Kept as a rebuild from the memory folders would be: retired texts leave,
+    # consolidated texts join, promoted texts (same content) stay.
+    near_dup = ingest_pipeline._load_near_dup_index(paths) if ingest_pipeline.NEAR_DUP_DETECTION else None
+    long_dir = loader.memory_dir(namespace) / "long_term"
+    archive_dir = rebase(ARCHIVE_DIR, MEMORY_DIR, namespace)
+    long_dir.mkdir(parents=True, exist_ok=True)
+
+    def retire(item: dict, entry: dict) -> None:
+        path = item["path"]
+        if delete:
+            path.unlink()
+        else:
+            target = archive_dir / path.parent.name / path.name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, target)
+        removed.append(path)
+        stats.pop(loader.memory_key(path), None)
+        # The hash stays known, so re-ingesting the same text does not bring
+        # it back; its metadata points at where the content lives now. Similar
+        # new segments are no longer near duplicates of it.
+        content_hash = ingest_pipeline._hash_text(item["text"])
+        dedup.replace(content_hash, entry)
+        if near_dup is not None:
+            near_dup.remove(content_hash)
+
+    try:
+        for item in plan["promote"]:
+            path = item["path"]
+            original = _original_name(path)
+            target = long_dir / f"long_term_{original}"
+            os.replace(path, target)
+            removed.append(path)
+            added.append(target)
+            used = stats.pop(loader.memory_key(path), None)
+            if used:
+                stats[loader.memory_key(target)] = used
+            dedup.replace(ingest_pipeline._hash_text(item["text"]), {"file": original, "type": "long_term"})
+
+        for item in plan["expire"]:
+            status = "deleted" if delete else "archive"
+            retire(item, {"file": _original_name(item["path"]), "type": status})
+
+        for cluster in plan["merge"]:
+            text = _merge_text(cluster, use_model)
+            content_hash = ingest_pipeline._hash_text(text)
+            original = f"consolidated_{content_hash[:12]}.txt"
+            target = long_dir / f"long_term_{original}"
+            target.write_text(text, encoding="utf-8")
+            added.append(target)
+            entry = {"file": original, "type": "long_term"}
+            dedup[content_hash] = entry
+            if near_dup is not None:
+                near_dup.add(content_hash, text)
+            for item in cluster:
+                retire(item, entry)
+    finally:
+        dedup.close()
+        if near_dup is not None:
+            near_dup.save()
+        loader.save_retrieval_stats(stats, namespace)
+        loader.update_memory_index(removed, added, namespace)
+        if added:
+            loader.build_canonical_memory("long_term", namespace=namespace)
+    return report
+
+
+def format_report(report: dict, dry_run: bool = False) -> str:
+    verb = "seriam" if dry_run else "foram"
+    return "\n".join(
+        [
+            f"short_term analisados: {report['short_term']}",
+            f"- {report['promoted']} {verb} promovidos para long_term",
+            f"- {report['expired']} {verb} expirados",
+            f"- {report['merged_items']} {verb} consolidados em {report['merged_clusters']} memorias long_term",
+        ]
+    )
@@ -0,0 +1,328 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import socketserver
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from aurora_core.memory import loader
+from aurora_core.utils.namespaces import namespace_path
+
+from ..ingest import reader
+from . import ingest_pipeline
+
+# Continuous ingest (scripts/run_ingest_daemon.py). The ingest state is opened
+# once and kept across micro-batches:
+# - data/ (or data/tenants/<ns>/) is watched with inotify, or by polling where
+#   inotify is not available; new or appended .txt files are queued
+# - segments pushed over the local socket or stdin are appended to
+#   inbox_DD_MM_AAAA.txt in the same folder (durable before the "ok") and
+#   ingested as that file's new tail
+# - queued files are processed together at most BATCH_MAX_LATENCY_S after the
+#   first change (or at once when BATCH_MAX_SEGMENTS segments were pushed),
+#   then the written memories are added to the index so a running core finds
+#   them on its next search
+# - the namespace's ingest writer lock is held while it runs, so
+#   run_ingest.py and run_compaction.py refuse to write the same namespace
+# What can be changed without editing business logic:
+# - AURORA_INGEST_MAX_LATENCY_S: how long a change may wait for its batch
+# - AURORA_INGEST_MAX_BATCH_SEGMENTS: pushed segments that close a batch early
+# - AURORA_INGEST_POLL_S: polling interval when inotify is not available
+# - AURORA_INGEST_PORT: local TCP port for pushed segments (0 = no socket)
+BATCH_MAX_LATENCY_S = float(os.getenv("AURORA_INGEST_MAX_LATENCY_S", "2"))
+BATCH_MAX_SEGMENTS = int(os.getenv("AURORA_INGEST_MAX_BATCH_SEGMENTS", "64"))
+POLL_INTERVAL_S = float(os.getenv("AURORA_INGEST_POLL_S", "1"))
+SOCKET_HOST = "127.0.0.1"
+SOCKET_PORT = int(os.getenv("AURORA_INGEST_PORT", "8765"))
+INBOX_PREFIX = "inbox"
+SEGMENT_MARKER = ">>>"
+
+# inotify(7): a file is queued once its writer closes it or it is moved in,
+# never while it is still being written.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    def __init__(self, directory: Path) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        wd = libc.inotify_add_watch(self.fd, str(directory).encode(), IN_CLOSE_WRITE | IN_MOVED_TO)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch {directory}")
+
+    def wait(self, timeout: float) -> set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        names: set[str] = set()
+        if not ready:
+            return names
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset < len(data):
+            _wd, _mask, _cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset: offset + length].rstrip(b"\0").decode("utf-8", errors="replace")
+            offset += length
+            if name:
+                names.add(name)
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Fallback for platforms without inotify: a file is reported once its size
+    and mtime stayed the same for one poll (so it is not half written).
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.previous = self._scan()
+        self.reported = dict(self.previous)
+
+    def _scan(self) -> dict[str, tuple]:
+        found = {}
+        for path in self.directory.glob("*.txt"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found[path.name] = (stat.st_size, stat.st_mtime_ns)
+        return found
+
+    def wait(self, timeout: float) -> set[str]:
+        time.sleep(min(timeout, POLL_INTERVAL_S))
+        current = self._scan()
+        names = {
+            name
+            for name, state in current.items()
+            if self.previous.get(name) == state and self.reported.get(name) != state
+        }
+        for name in names:
+            self.reported[name] = current[name]
+        self.previous = current
+        return names
+
+    def close(self) -> None:
+        pass
+
+
+def make_watcher(directory: Path):
+    try:
+        return InotifyWatcher(directory)
+    except (OSError, AttributeError, TypeError):
+        # No inotify (Windows/macOS) or no libc found.
+        return PollingWatcher(directory)
+
+
+def parse_segment(line: str) -> str | None:
+    """
+    A pushed line is either plain text or JSON {"text": ...}.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        try:
+            text = json.loads(line).get("text")
+        except (ValueError, AttributeError):
+            return None
+        return text.strip() if isinstance(text, str) and text.strip() else None
+    return line
+
+
+class IngestDaemon:
+    def __init__(
+        self,
+        namespace: str | None = None,
+        workers: int | None = None,
+        max_latency_s: float = BATCH_MAX_LATENCY_S,
+        publish: bool = True,
+    ) -> None:
+        self.namespace = namespace
+        self.workers = workers
+        self.max_latency_s = max_latency_s
+        self.publish = publish
+        self.data_dir = namespace_path(reader.DATA_DIR, namespace)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.pending: set[str] = set()
+        self.pending_since: float | None = None
+        self.pushed = 0
+        self.batches = 0
+        self.stopping = threading.Event()
+        self._cond = threading.Condition()
+        self._inbox_lock = threading.Lock()
+        self.run: dict | None = None
+
+    # --- input ---
+
+    def notify(self, names) -> None:
+        names = {n for n in names if n.endswith(".txt")}
+        if not names:
+            return
+        with self._cond:
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            self.pending.update(names)
+            self._cond.notify()
+
+    def inbox_path(self) -> Path:
+        return self.data_dir / f"{INBOX_PREFIX}_{datetime.now().strftime('%d_%m_%Y')}.txt"
+
+    def submit(self, texts: list[str]) -> int:
+        """
+        Append pushed segments to today's inbox file (fsynced) and queue it.
+        Returns how many segments were accepted.
+        """
+        texts = [t for t in texts if t]
+        if not texts:
+            return 0
+        with self._inbox_lock:
+            path = self.inbox_path()
+            with path.open("a", encoding="utf-8") as f:
+                for text in texts:
+                    f.write(f"{SEGMENT_MARKER}{text}\n")
+                f.flush()
+                os.fsync(f.fileno())
+        with self._cond:
+            self.pushed += len(texts)
+        self.notify([path.name])
+        return len(texts)
+
+    def stop(self) -> None:
+        self.stopping.set()
+        with self._cond:
+            self._cond.notify()
+
+    # --- batches ---
+
+    def _due(self) -> bool:
+        if not self.pending:
+            return False
+        if self.stopping.is_set() or self.pushed >= BATCH_MAX_SEGMENTS:
+            return True
+        return time.monotonic() - self.pending_since >= self.max_latency_s
+
+    def _take_batch(self) -> list[Path] | None:
+        with self._cond:
+            while not self._due():
+                if self.stopping.is_set():
+                    return None
+                timeout = None
+                if self.pending:
+                    timeout = max(0.0, self.pending_since + self.max_latency_s - time.monotonic())
+                self._cond.wait(timeout)
+            names = sorted(self.pending)
+            self.pending.clear()
+            self.pending_since = None
+            self.pushed = 0
+        return [self.data_dir / name for name in names if (self.data_dir / name).exists()]
+
+    def process(self, files: list[Path]) -> list[Path]:
+        """
+        One micro-batch: split, classify and write the new content of files,
+        make it durable and publish the new memories to the index.
+        """
+        run = self.run
+        run["written"] = []
+        started = time.perf_counter()
+        # The inbox is sized under the lock submit() appends with, so a
+        # batch never ends inside a pushed segment.
+        ingest_pipeline._process_files(files, run, self.workers, plan_lock=self._inbox_lock)
+        # Commits are journaled; flushing here bounds what a crash can lose
+        # to the current batch.
+        run["events"].flush()
+        run["journal"].flush()
+        written = run["written"]
+        if written and self.publish:
+            loader.update_memory_index([], written, self.namespace)
+        self.batches += 1
+        print(
+            f"[LOTE] {len(files)} arquivo(s), {len(written)} memoria(s) em "
+            f"{time.perf_counter() - started:.2f}s",
+            flush=True,
+        )
+        return written
+
+    def _watch(self, watcher) -> None:
+        while not self.stopping.is_set():
+            try:
+                names = watcher.wait(1.0)
+            except OSError as e:
+                print(f"[ERRO] watcher: {e}", file=sys.stderr)
+                time.sleep(POLL_INTERVAL_S)
+                continue
+            self.notify(names)
+
+    def serve_forever(self, initial_scan: bool = True) -> None:
+        """
+        Process batches until stop(); the ingest state is checkpointed and
+        closed on the way out (also on Ctrl-C).
+        """
+        self.run = ingest_pipeline._open_run(
+            incremental=True, resume=True, namespace=self.namespace, track_written=True
+        )
+        watcher = make_watcher(self.data_dir)
+        print(f"Observando {self.data_dir} ({type(watcher).__name__})", flush=True)
+        watch_thread = threading.Thread(target=self._watch, args=(watcher,), name="ingest-watch", daemon=True)
+        watch_thread.start()
+        if initial_scan:
+            # Catch up with whatever changed while the daemon was down.
+            self.notify(path.name for path in self.data_dir.glob("*.txt"))
+        try:
+            while True:
+                files = self._take_batch()
+                if files is None:
+                    break
+                if files:
+                    self.process(files)
+        finally:
+            self.stopping.set()
+            watch_thread.join(timeout=2.0)
+            watcher.close()
+            ingest_pipeline._close_run(self.run)
+
+
+class _SegmentHandler(socketserver.StreamRequestHandler):
+    # One segment per line; each line is answered after it is on disk.
+    def handle(self) -> None:
+        for raw in self.rfile:
+            text = parse_segment(raw.decode("utf-8", errors="replace"))
+            if text is None:
+                self.wfile.write(b"erro: segmento vazio ou invalido\n")
+                continue
+            self.server.daemon_ref.submit([text])
+            self.wfile.write(b"ok\n")
+
+
+class SegmentServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, daemon: IngestDaemon, host: str = SOCKET_HOST, port: int = SOCKET_PORT) -> None:
+        self.daemon_ref = daemon
+        super().__init__((host, port), _SegmentHandler)
+
+
+def read_stdin(daemon: IngestDaemon, stream=None, stop_at_eof: bool = True) -> None:
+    for line in stream or sys.stdin:
+        text = parse_segment(line)
+        if text is not None:
+            daemon.submit([text])
+    if stop_at_eof:
+        daemon.stop()
@@ -1,22 +1,87 @@
 import json
 import hashlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timezone
 from pathlib import Path
 
+from ..ingest.manifest import load_manifest, make_entry, plan_file, save_manifest
 from ..ingest.reader import read_data_files
-from ..ingest.validator import validate_file
-from ..ingest.splitter import split_content
-from ..ai.classifier import classify_memory, VALID_TYPES
+from ..ingest.validator import check_file
+from ..ingest.splitter import iter_segments
+from ..ai.classifier import (
+    _looks_like_identity,
+    classify_batch,
+    classify_memory,
+    fits_batch,
+    PROMPT_VERSION,
+    VALID_TYPES,
+)
+from ..ai.label_cache import LabelCache
+from ..ai.local_classifier import LocalClassifier
+from ..ai.ollama_client import MODEL_NAME, call_stats
+from ..memory.dedup_store import DedupStore
+from ..memory.near_dup import NearDupIndex
 from ..memory.writer import write_memory
+from .journal import GroupWriter, read_journal, replay_journal
+from .metrics import Metrics, append_metrics, format_summary
+from aurora_core.utils.locks import FileLock
+from aurora_core.utils.namespaces import namespace_path, validate_namespace
 
 BASE_DIR = Path(__file__).resolve().parents[5]
 MEMORY_DIR = BASE_DIR / "memory"
 LOG_PATH = MEMORY_DIR / "ingest_log.jsonl"
+DEDUP_STORE_PATH = MEMORY_DIR / "dedup"
+# Pre-store JSON index; imported once into the store, no longer written.
 DEDUP_PATH = MEMORY_DIR / "dedup_index.json"
+LABEL_CACHE_PATH = MEMORY_DIR / "label_cache.json"
+MANIFEST_PATH = MEMORY_DIR / "ingest_manifest.json"
+NEAR_DUP_PATH = MEMORY_DIR / "near_dup_index.json"
+JOURNAL_PATH = MEMORY_DIR / "ingest_journal.jsonl"
+CHECKPOINT_PATH = MEMORY_DIR / "ingest_checkpoint.json"
+LOCAL_CLASSIFIER_PATH = MEMORY_DIR / "local_classifier.json"
+# One "progress" record per checkpoint and one "run" record at the end.
+METRICS_PATH = MEMORY_DIR / "ingest_metrics.jsonl"
+# Held by the process writing a namespace's memories and ingest state (ingest
+# run, ingest daemon, compaction); a second writer fails instead of
+# interleaving with it.
+WRITER_LOCK_PATH = MEMORY_DIR / "ingest.lock"
+# Bump when splitting/classification changes so every data file is reprocessed.
+PIPELINE_VERSION = "3"
 
-def _log_event(event: dict) -> None:
-    MEMORY_DIR.mkdir(parents=True, exist_ok=True)
+# Classification runs on a worker pool; reading/splitting and writes stay
+# single-threaded so output is identical to a serial run.
+# Change AURORA_INGEST_WORKERS to size the pool (1 = serial behaviour).
+INGEST_WORKERS = int(os.getenv("AURORA_INGEST_WORKERS", "4"))
+QUEUE_DEPTH_PER_WORKER = 4
+# How often a reader blocked on a full queue checks whether the committer quit.
+STOP_POLL_S = 0.5
+# Pack several segments per model call (see ai.classifier.BATCH_TOKEN_BUDGET).
+BATCH_CLASSIFICATION = True
+# Entries that skip classification (duplicates, finished files) buffered behind
+# an open batch; reaching it submits the batch early so memory stays bounded.
+BATCH_MAX_BUFFERED = 256
+# Drop segments that differ from a stored one only by whitespace, accents,
+# clock times or small edits (see memory.near_dup.NEAR_DUP_THRESHOLD).
+NEAR_DUP_DETECTION = True
+# Label confident segments with the local model trained by
+# scripts/train_classifier.py (see ai.local_classifier) instead of the LLM.
+LOCAL_CLASSIFICATION = True
+# Every commit is journaled (group-fsynced, see pipeline.journal); all state is
+# checkpointed every CHECKPOINT_EVERY segments or CHECKPOINT_INTERVAL_S seconds.
+CHECKPOINT_EVERY = 200
+CHECKPOINT_INTERVAL_S = 60.0
+
+def _log_event(event: dict, writer: GroupWriter | None = None) -> None:
     event["ts"] = datetime.now(timezone.utc).isoformat()
+    if writer is not None:
+        writer.append(event)
+        return
+    MEMORY_DIR.mkdir(parents=True, exist_ok=True)
     with LOG_PATH.open("a", encoding="utf-8") as f:
         f.write(json.dumps(event, ensure_ascii=True) + "\n")
 
@@ -25,121 +90,705 @@ def _hash_text(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def _build_dedup_index() -> dict:
-    entries: dict[str, dict] = {}
-    if not MEMORY_DIR.exists():
-        return entries
+def _paths(namespace: str | None = None) -> dict[str, Path]:
+    """
+    State files of a namespace: the module paths for the default namespace,
+    the same file names under memory/tenants/<namespace>/ otherwise.
+    """
+    paths = {
+        "memory": MEMORY_DIR,
+        "log": LOG_PATH,
+        "dedup_store": DEDUP_STORE_PATH,
+        "dedup_legacy": DEDUP_PATH,
+        "label_cache": LABEL_CACHE_PATH,
+        "manifest": MANIFEST_PATH,
+        "near_dup": NEAR_DUP_PATH,
+        "journal": JOURNAL_PATH,
+        "checkpoint": CHECKPOINT_PATH,
+        "local_classifier": LOCAL_CLASSIFIER_PATH,
+        "metrics": METRICS_PATH,
+        "writer_lock": WRITER_LOCK_PATH,
+    }
+    if validate_namespace(namespace) is None:
+        return paths
+    base = namespace_path(MEMORY_DIR, namespace)
+    return {name: base if name == "memory" else base / path.name for name, path in paths.items()}
+
+
+def _iter_memory_files(memory_dir: Path | None = None):
+    memory_dir = MEMORY_DIR if memory_dir is None else memory_dir
+    if not memory_dir.exists():
+        return
     for mem_type in ("identity", "short_term", "long_term", "unclassified"):
-        path = MEMORY_DIR / mem_type
+        path = memory_dir / mem_type
         if not path.exists():
             continue
         for f in path.glob("*.txt"):
             try:
                 content = f.read_text(encoding="utf-8").strip()
-            except Exception:
+            except (OSError, UnicodeDecodeError):
                 continue
-            h = _hash_text(content)
-            entries[h] = {"file": f.name, "type": mem_type}
-    return entries
+            yield f, mem_type, content
+
+
+def _build_dedup_entries(memory_dir: Path):
+    for f, mem_type, content in _iter_memory_files(memory_dir):
+        yield _hash_text(content), {"file": f.name, "type": mem_type}
+
+
+def _load_near_dup_index(paths: dict | None = None) -> NearDupIndex:
+    paths = paths or _paths()
+    index = NearDupIndex(paths["near_dup"])
+    if not index.load():
+        for _f, _mem_type, content in _iter_memory_files(paths["memory"]):
+            index.add(_hash_text(content), content)
+    return index
+
 
+def _load_dedup_store(paths: dict | None = None) -> DedupStore:
+    """
+    Opening the store only reads its Bloom filter and log tail. Memory files
+    (or the old dedup_index.json) are scanned only to seed an empty store.
+    """
+    paths = paths or _paths()
+    store = DedupStore(paths["dedup_store"]).open()
+    if len(store):
+        return store
+    entries = None
+    legacy = paths["dedup_legacy"]
+    if legacy.exists():
+        try:
+            entries = json.loads(legacy.read_text(encoding="utf-8")).get("entries", {}).items()
+        except (OSError, ValueError, AttributeError):
+            entries = None
+    if entries is None:
+        entries = _build_dedup_entries(paths["memory"])
+    for content_hash, entry in entries:
+        store[content_hash] = entry
+    store.flush()
+    return store
 
-def _load_dedup_index() -> dict:
-    if not DEDUP_PATH.exists():
-        return _build_dedup_index()
+
+def _load_checkpoint(path: Path) -> dict:
+    if not path.exists():
+        return {}
     try:
-        data = json.loads(DEDUP_PATH.read_text(encoding="utf-8"))
-        return data.get("entries", {})
-    except Exception:
-        return _build_dedup_index()
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
 
 
-def _save_dedup_index(entries: dict) -> None:
-    MEMORY_DIR.mkdir(parents=True, exist_ok=True)
-    DEDUP_PATH.write_text(
-        json.dumps({"entries": entries}, ensure_ascii=True, indent=2),
+def _checkpoint(run: dict) -> None:
+    """
+    Persist all pipeline state, then drop the journal it supersedes. If we
+    crash in between, replaying the journal again is harmless.
+    """
+    run["events"].flush()
+    run["journal"].flush()
+    run["dedup_entries"].flush()
+    run["label_cache"].save()
+    save_manifest(run["paths"]["manifest"], run["manifest"])
+    if run["near_dup"] is not None:
+        run["near_dup"].save()
+    checkpoint_path = run["paths"]["checkpoint"]
+    tmp_path = checkpoint_path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps({"progress": run["progress"], "ts": time.time()}, ensure_ascii=True),
         encoding="utf-8",
     )
+    os.replace(tmp_path, checkpoint_path)
+    run["journal"].truncate()
+    run["since_checkpoint"] = 0
+    run["last_checkpoint"] = time.monotonic()
 
 
+def _metrics_record(run: dict, kind: str) -> dict:
+    llm = call_stats()
+    label_cache = run["label_cache"]
+    return run["metrics"].snapshot(
+        kind=kind,
+        llm={
+            "calls": llm["calls"] - run["llm_start"]["calls"],
+            "wait_s": round(llm["seconds"] - run["llm_start"]["seconds"], 3),
+        },
+        label_cache={"hits": label_cache.hits, "misses": label_cache.misses},
+    )
+
+
+def _after_commit(run: dict) -> None:
+    # The event log is flushed first so the journal never gets ahead of it.
+    if run["events"].due() or run["journal"].due():
+        with run["metrics"].time("log_flush"):
+            run["events"].flush()
+            run["journal"].flush()
+    if (
+        run["since_checkpoint"] >= CHECKPOINT_EVERY
+        or time.monotonic() - run["last_checkpoint"] >= CHECKPOINT_INTERVAL_S
+    ):
+        with run["metrics"].time("checkpoint"):
+            _checkpoint(run)
+        append_metrics(run["paths"]["metrics"], _metrics_record(run, "progress"))
+
+
+def _recover(run: dict) -> None:
+    """
+    Rebuild the state of an interrupted run: last checkpoint plus the journal
+    records written after it.
+    """
+    records = read_journal(run["paths"]["journal"])
+    progress = dict(_load_checkpoint(run["paths"]["checkpoint"]).get("progress", {}))
+    progress.update(replay_journal(records, run["dedup_entries"], run["manifest"]))
+    near_dup = run["near_dup"]
+    for record in records:
+        if near_dup is None or record.get("op") != "segment":
+            continue
+        entry = record["entry"]
+        path = run["paths"]["memory"] / entry["type"] / f"{entry['type']}_{entry['file']}"
+        try:
+            near_dup.add(record["hash"], path.read_text(encoding="utf-8").strip())
+        except OSError:
+            continue
+    if records:
+        print(f"[RECUPERADO] {len(records)} registros do journal aplicados")
+    if progress and not run["resume"]:
+        print("Execucao anterior interrompida; use --resume para continuar de onde parou.")
+        progress = {}
+    run["progress"] = progress
 
-def run_pipeline():
-    files = read_data_files()
 
-    if not files:
-        print("Nenhum arquivo encontrado.")
-        return
 
-    stats = {
-        "identity": 0,
-        "short_term": 0,
-        "long_term": 0,
-        "unclassified": 0
+class _ReaderStopped(Exception):
+    pass
+
+
+def _put(pending: queue.Queue, entry, stop: threading.Event) -> None:
+    # Gives up once the committer has stopped draining the queue (error or
+    # Ctrl-C) instead of blocking the reader thread forever.
+    while not stop.is_set():
+        try:
+            pending.put(entry, timeout=STOP_POLL_S)
+            return
+        except queue.Full:
+            pass
+    raise _ReaderStopped
+
+
+class _Resolved:
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+class _BatchSlot:
+    def __init__(self, future: Future, pos: int) -> None:
+        self.future = future
+        self.pos = pos
+
+    def result(self):
+        return self.future.result()[self.pos]
+
+
+class _Batcher:
+    """
+    Groups segments into classification batches. While a batch is open, every
+    queue entry (including duplicates) is buffered so input order is kept and
+    the committer never waits on a batch that was not submitted yet. At most
+    BATCH_MAX_BUFFERED of those entries wait before the batch is submitted.
+    """
+
+    def __init__(
+        self,
+        pool: ThreadPoolExecutor,
+        pending: queue.Queue,
+        enabled: bool,
+        metrics: Metrics,
+        stop: threading.Event,
+    ) -> None:
+        self.pool = pool
+        self.pending = pending
+        self.enabled = enabled
+        self.metrics = metrics
+        self.stop = stop
+        self.texts: list[str] = []
+        self.entries: list[tuple] = []
+
+    def _enqueue(self, entry: tuple) -> None:
+        # Time spent here is backpressure: the committer is behind.
+        with self.metrics.time("reader_blocked"):
+            _put(self.pending, entry, self.stop)
+
+    def put(self, item: dict, work=None) -> None:
+        if self.entries:
+            self.entries.append((item, work, None))
+            if len(self.entries) - len(self.texts) >= BATCH_MAX_BUFFERED:
+                self.flush()
+        else:
+            self._enqueue((item, work))
+
+    def classify(self, item: dict, text: str) -> None:
+        if not self.enabled:
+            future = self.pool.submit(self.metrics.timed("classify", classify_memory), text)
+            self._enqueue((item, future))
+            return
+        if not fits_batch(self.texts, text):
+            self.flush()
+        self.entries.append((item, None, len(self.texts)))
+        self.texts.append(text)
+
+    def flush(self) -> None:
+        if not self.entries:
+            return
+        future = None
+        if self.texts:
+            self.metrics.observe("batch_size", len(self.texts))
+            future = self.pool.submit(self.metrics.timed("classify", classify_batch), self.texts)
+        for item, work, slot in self.entries:
+            self._enqueue((item, _BatchSlot(future, slot) if slot is not None else work))
+        self.texts = []
+        self.entries = []
+
+
+def _route_segment(
+    file_path: Path,
+    idx: int,
+    segment: dict,
+    run: dict,
+    in_flight: set,
+    in_flight_near: NearDupIndex | None,
+    batcher: _Batcher,
+) -> None:
+    segment_text = segment.get("text", "")
+    content_hash = _hash_text(segment_text)
+    item = {
+        "kind": "segment",
+        "file_path": file_path,
+        "idx": idx,
+        "text": segment_text,
+        "hash": content_hash,
     }
+    metrics = run["metrics"]
+    with metrics.time("dedup"):
+        duplicate = content_hash in in_flight or content_hash in run["dedup_entries"]
+    if duplicate:
+        item["kind"] = "duplicate"
+        batcher.put(item)
+        return
+    near_dup = run["near_dup"]
+    if near_dup is not None:
+        with metrics.time("near_dup"):
+            near_key, score, signature = near_dup.check(content_hash, segment_text)
+            if near_key is None:
+                near_key, score, _ = in_flight_near.check(content_hash, segment_text, signature)
+        if near_key is not None:
+            item["kind"] = "near_duplicate"
+            item["near_of"] = near_key
+            item["similarity"] = score
+            batcher.put(item)
+            return
+        # Stored in the index by _commit, once the memory is written.
+        in_flight_near.add(content_hash, segment_text, signature)
+        item["signature"] = signature
+    in_flight.add(content_hash)
 
-    dedup_entries = _load_dedup_index()
+    preset = segment.get("category")
+    if preset in VALID_TYPES:
+        batcher.put(item, _Resolved((preset, None, "splitter")))
+        return
+    cached = run["label_cache"].get(content_hash)
+    if cached:
+        item["cache_hit"] = True
+        batcher.put(item, _Resolved(cached))
+        return
+    local = run["local_classifier"]
+    if local is not None and not _looks_like_identity(segment_text):
+        with metrics.time("local_classifier"):
+            label = local.classify(segment_text)
+        if label is not None:
+            batcher.put(item, _Resolved((label, None, "local")))
+            return
+    batcher.classify(item, segment_text)
 
-    for file_path in files:
-        valid, result = validate_file(file_path)
 
-        if not valid:
-            print(f"[IGNORADO] {file_path.name} -> {result}")
-            _log_event(
-                {
-                    "file": file_path.name,
-                    "status": "ignored",
-                    "reason": result,
-                }
-            )
-            continue
+def _produce(
+    files: list,
+    run: dict,
+    pool: ThreadPoolExecutor,
+    pending: queue.Queue,
+    stop: threading.Event,
+    plan_lock=None,
+) -> None:
+    """
+    Reads, validates and splits files in order, decides dedup and hands
+    classification to the worker pool. Every unit of work is queued in input
+    order so the committer can process results deterministically.
+    plan_lock is held while a file is stat'ed, so an appender holding it is
+    never seen half way through an append.
+    """
+    metrics = run["metrics"]
+    batcher = _Batcher(pool, pending, BATCH_CLASSIFICATION, metrics, stop)
+    # Hashes routed in this run but maybe not committed to the store yet.
+    in_flight: set[str] = set()
+    # Same for near duplicates; never saved.
+    near_dup = run["near_dup"]
+    in_flight_near = None
+    if near_dup is not None:
+        in_flight_near = NearDupIndex(run["paths"]["near_dup"], near_dup.threshold)
+    manifest = dict(run["manifest"]) if run["incremental"] else {}
+    resumed = dict(run["progress"])
+    try:
+        for file_path in files:
+            entry = manifest.get(file_path.name)
+            with plan_lock or nullcontext():
+                action, offset, fingerprint = plan_file(file_path, entry, PIPELINE_VERSION)
+            if action == "skip":
+                batcher.put({"kind": "unchanged", "file_path": file_path})
+                continue
+            base = entry.get("segments", 0) if action == "tail" else 0
 
-        content = result
-        segments = split_content(content)
-        total_segments = max(len(segments), 1)
-
-        for idx, segment in enumerate(segments, start=1):
-            segment_text = segment.get("text", "")
-            content_hash = _hash_text(segment_text)
-            if content_hash in dedup_entries:
-                print(f"[DUPLICADO] {file_path.name}#{idx} -> ignorado")
-                _log_event(
-                    {
-                        "file": file_path.name,
-                        "segment": idx,
-                        "segments_total": total_segments,
-                        "status": "duplicate",
-                        "dup_of": dedup_entries[content_hash],
-                    }
-                )
+            with metrics.time("validate"):
+                valid, reason = check_file(file_path, offset, fingerprint["size"])
+            if not valid:
+                batcher.put({"kind": "ignored", "file_path": file_path, "reason": reason})
+                if action != "tail":
+                    # A short appended tail is retried once the file grows further.
+                    done = make_entry(file_path, fingerprint, PIPELINE_VERSION, 0, "ignored")
+                    batcher.put({"kind": "file_done", "file_path": file_path, "entry": done})
                 continue
-            preset = segment.get("category")
-            if preset in VALID_TYPES:
-                mem_type, err, source = preset, None, "splitter"
-            else:
-                mem_type, err, source = classify_memory(segment_text)
-
-            if err:
-                print(f"[ERRO] {file_path.name}#{idx} -> {err}")
-                mem_type = "unclassified"
-
-            original_filename = f"{file_path.stem}_part{idx}{file_path.suffix}"
-            write_memory(mem_type, original_filename, segment_text)
-            stats[mem_type] += 1
+
+            # Segments stream out of the splitter window by window, so
+            # classification starts before the whole file has been read.
+            count = 0
+            # --resume: segments committed by the interrupted run are skipped.
+            skip_upto = resumed.pop(file_path.name, 0)
+            metrics.count("files_processed")
+            metrics.count("bytes_read", fingerprint["size"] - offset)
+            try:
+                segments = iter_segments(file_path, offset, fingerprint["size"])
+                # "split" is the time spent inside the splitter (file reads
+                # and LLM splitting) between two segments.
+                started = time.perf_counter()
+                for idx, segment in enumerate(segments, start=base + 1):
+                    metrics.add_time("split", time.perf_counter() - started)
+                    count += 1
+                    if idx > skip_upto:
+                        _route_segment(file_path, idx, segment, run, in_flight, in_flight_near, batcher)
+                    started = time.perf_counter()
+                metrics.add_time("split", time.perf_counter() - started)
+            except (OSError, UnicodeDecodeError) as e:
+                reason = f"Erro ao ler arquivo: {e}"
+                batcher.put({"kind": "ignored", "file_path": file_path, "reason": reason})
+                continue
+
+            done = make_entry(file_path, fingerprint, PIPELINE_VERSION, base + count, "ok")
+            # The total is only known once the splitter is exhausted, so it is
+            # logged with the file instead of with each segment.
+            batcher.put(
+                {"kind": "file_done", "file_path": file_path, "entry": done, "segments_total": base + count}
+            )
+        batcher.flush()
+    except _ReaderStopped:
+        return
+    except Exception as e:  # noqa: BLE001 - re-raised by the committer
+        failed = ({"kind": "failed", "error": e}, None)
+    else:
+        failed = None
+    try:
+        if failed is not None:
+            _put(pending, failed, stop)
+        _put(pending, None, stop)
+    except _ReaderStopped:
+        pass
+
+
+def _commit(item: dict, classification, run: dict) -> None:
+    file_path = item["file_path"]
+    metrics = run["metrics"]
+    if item["kind"] == "unchanged":
+        run["unchanged"] += 1
+        metrics.count("files_unchanged")
+        return
+    if item["kind"] == "file_done":
+        # Recorded only after every segment of the file was committed.
+        run["manifest"][file_path.name] = item["entry"]
+        run["progress"].pop(file_path.name, None)
+        run["journal"].append({"op": "file_done", "file": file_path.name, "entry": item["entry"]})
+        if "segments_total" in item:
             _log_event(
                 {
                     "file": file_path.name,
-                    "segment": idx,
-                    "segments_total": total_segments,
-                    "status": "ok" if not err else "error",
-                    "type": mem_type,
-                    "error": err,
-                    "source": source,
-                }
+                    "status": "file_done",
+                    "segments_total": item["segments_total"],
+                },
+                run["events"],
             )
-            print(f"[OK] {file_path.name}#{idx} -> {mem_type}")
-            dedup_entries[content_hash] = {"file": original_filename, "type": mem_type}
+        return
+    if item["kind"] == "ignored":
+        metrics.count("skipped_ignored")
+        print(f"[IGNORADO] {file_path.name} -> {item['reason']}")
+        _log_event(
+            {
+                "file": file_path.name,
+                "status": "ignored",
+                "reason": item["reason"],
+            },
+            run["events"],
+        )
+        return
+
+    idx = item["idx"]
+    dedup_entries = run["dedup_entries"]
+    if item["kind"] == "duplicate":
+        metrics.count("skipped_duplicate")
+        print(f"[DUPLICADO] {file_path.name}#{idx} -> ignorado")
+        _log_event(
+            {
+                "file": file_path.name,
+                "segment": idx,
+                "status": "duplicate",
+                "dup_of": dedup_entries.get(item["hash"]),
+            },
+            run["events"],
+        )
+        return
+    if item["kind"] == "near_duplicate":
+        metrics.count("skipped_near_duplicate")
+        print(f"[QUASE-DUPLICADO] {file_path.name}#{idx} -> ignorado")
+        _log_event(
+            {
+                "file": file_path.name,
+                "segment": idx,
+                "status": "near_duplicate",
+                "dup_of": dedup_entries.get(item["near_of"]),
+                "similarity": round(item["similarity"], 3),
+            },
+            run["events"],
+        )
+        return
+
+    mem_type, err, source = classification
+    if err:
+        print(f"[ERRO] {file_path.name}#{idx} -> {err}")
+        mem_type = "unclassified"
+    elif source == "local":
+        run["local_labels"] += 1
+    elif source != "splitter" and not item.get("cache_hit"):
+        run["label_cache"].put(item["hash"], mem_type, source)
+
+    original_filename = f"{file_path.stem}_part{idx}{file_path.suffix}"
+    with metrics.time("write"):
+        write_memory(mem_type, original_filename, item["text"], run["namespace"])
+    if run["written"] is not None:
+        run["written"].append(run["paths"]["memory"] / mem_type / f"{mem_type}_{original_filename}")
+    run["stats"][mem_type] += 1
+    metrics.count("segments_written")
+    metrics.count(f"source_{'cache' if item.get('cache_hit') else source}")
+    _log_event(
+        {
+            "file": file_path.name,
+            "segment": idx,
+            "status": "ok" if not err else "error",
+            "type": mem_type,
+            "error": err,
+            "source": source,
+            "cache_hit": bool(item.get("cache_hit")),
+        },
+        run["events"],
+    )
+    print(f"[OK] {file_path.name}#{idx} -> {mem_type}")
+    entry = {"file": original_filename, "type": mem_type}
+    dedup_entries[item["hash"]] = entry
+    if run["near_dup"] is not None and "signature" in item:
+        run["near_dup"].add(item["hash"], item["text"], item["signature"])
+    # Journaled after the write: a lost record only means the (idempotent)
+    # write is redone on the next run.
+    run["journal"].append(
+        {
+            "op": "segment",
+            "file": file_path.name,
+            "idx": idx,
+            "hash": item["hash"],
+            "entry": entry,
+        }
+    )
+    run["progress"][file_path.name] = idx
+    run["since_checkpoint"] += 1
+
+
+class NamespaceLockedError(RuntimeError):
+    pass
+
+
+def acquire_writer_lock(paths: dict[str, Path]) -> FileLock:
+    """
+    Exclusive right to write the namespace of paths (see _paths); released
+    by the caller, or by the OS if the process dies.
+    """
+    lock = FileLock(paths["writer_lock"])
+    if not lock.acquire(blocking=False):
+        raise NamespaceLockedError(
+            f"{paths['memory']} ja esta sendo gravado por outro processo (pid {lock.holder()}): "
+            "aguarde a ingestao/compactacao em andamento ou pare o daemon de ingestao"
+        )
+    return lock
+
+
+def _open_run(
+    incremental: bool = True,
+    resume: bool = False,
+    namespace: str | None = None,
+    track_written: bool = False,
+) -> dict:
+    """
+    Load the ingest state of a namespace and recover an interrupted run.
+    track_written=True collects the path of every memory written in
+    run["written"] (used by the daemon to publish index updates).
+    """
+    paths = _paths(namespace)
+    paths["memory"].mkdir(parents=True, exist_ok=True)
+    lock = acquire_writer_lock(paths)
+    try:
+        run = _load_run(paths, namespace, incremental, resume, track_written)
+        _recover(run)
+    except BaseException:
+        lock.release()
+        raise
+    run["writer_lock"] = lock
+    return run
+
+
+def _load_run(
+    paths: dict[str, Path],
+    namespace: str | None,
+    incremental: bool,
+    resume: bool,
+    track_written: bool,
+) -> dict:
+    local_classifier = None
+    if LOCAL_CLASSIFICATION:
+        local_classifier = LocalClassifier.load(paths["local_classifier"])
+    return {
+        "stats": {
+            "identity": 0,
+            "short_term": 0,
+            "long_term": 0,
+            "unclassified": 0
+        },
+        "namespace": validate_namespace(namespace),
+        "paths": paths,
+        "dedup_entries": _load_dedup_store(paths),
+        "label_cache": LabelCache(paths["label_cache"], MODEL_NAME, PROMPT_VERSION).load(),
+        "manifest": load_manifest(paths["manifest"]),
+        "near_dup": _load_near_dup_index(paths) if NEAR_DUP_DETECTION else None,
+        "local_classifier": local_classifier,
+        "local_labels": 0,
+        "incremental": incremental,
+        "resume": resume,
+        "unchanged": 0,
+        "written": [] if track_written else None,
+        "events": GroupWriter(paths["log"], fsync=False),
+        "journal": GroupWriter(paths["journal"]),
+        "since_checkpoint": 0,
+        "last_checkpoint": time.monotonic(),
+        "metrics": Metrics(),
+        "llm_start": call_stats(),
+    }
+
+
+def _process_files(
+    files: list,
+    run: dict,
+    workers: int | None = None,
+    plan_lock=None,
+) -> None:
+    workers = max(1, workers or INGEST_WORKERS)
+    # Bounded queue = backpressure: the reader stalls when classification
+    # falls behind instead of splitting every file up front.
+    pending: queue.Queue = queue.Queue(maxsize=workers * QUEUE_DEPTH_PER_WORKER)
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="classify")
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_produce,
+        args=(files, run, pool, pending, stop, plan_lock),
+        name="ingest-reader",
+        daemon=True,
+    )
+    producer.start()
+    try:
+        while True:
+            entry = pending.get()
+            if entry is None:
+                break
+            item, work = entry
+            if item["kind"] == "failed":
+                raise item["error"]
+            run["metrics"].observe("queue_depth", pending.qsize())
+            classification = None
+            if work is not None:
+                try:
+                    with run["metrics"].time("wait_classification"):
+                        classification = work.result()
+                except Exception as e:
+                    classification = (None, f"exception:{e}", "model")
+            _commit(item, classification, run)
+            _after_commit(run)
+    finally:
+        # Also when a commit failed: the reader must not stay blocked on a
+        # queue nobody drains (the daemon calls this once per batch).
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        producer.join()
+
+
+def _close_run(run: dict) -> dict:
+    # Also on error or Ctrl-C: everything committed so far is kept and
+    # --resume picks up from here.
+    try:
+        with run["metrics"].time("checkpoint"):
+            _checkpoint(run)
+        run["events"].close()
+        run["journal"].close()
+        run["dedup_entries"].close()
+        summary = _metrics_record(run, "run")
+        append_metrics(run["paths"]["metrics"], summary)
+    finally:
+        run["writer_lock"].release()
+    return summary
+
+
+def run_pipeline(
+    workers: int | None = None,
+    incremental: bool = True,
+    resume: bool = False,
+    namespace: str | None = None,
+):
+    """
+    incremental=False reprocesses every file regardless of the manifest.
+    resume=True continues a run that was interrupted (crash or Ctrl-C) from
+    its last committed segment instead of starting those files over.
+    namespace reads data/tenants/<namespace>/ and keeps memories, logs and
+    ingest state in memory/tenants/<namespace>/ (None = default layout).
+    """
+    files = sorted(read_data_files(namespace))
+
+    if not files:
+        print("Nenhum arquivo encontrado.")
+        return
+
+    run = _open_run(incremental, resume, namespace)
+    try:
+        _process_files(files, run, workers)
+    finally:
+        summary = _close_run(run)
 
     print("Filtragem concluida")
-    for k, v in stats.items():
+    for k, v in run["stats"].items():
         print(f"- {k}: {v} itens")
-
-    _save_dedup_index(dedup_entries)
+    if run["unchanged"]:
+        print(f"Arquivos inalterados (pulados): {run['unchanged']}")
+    print(run["label_cache"].report())
+    if run["local_classifier"] is not None:
+        print(f"Classificador local: {run['local_labels']} segmentos rotulados sem LLM")
+    print(format_summary(summary))
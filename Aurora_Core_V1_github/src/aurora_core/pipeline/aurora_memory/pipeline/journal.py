@@ -0,0 +1,95 @@
+import json
+import os
+import time
+from pathlib import Path
+
+# Group commit: buffered lines are written and fsynced together once
+# FLUSH_EVERY lines are pending or FLUSH_INTERVAL_S has passed.
+FLUSH_EVERY = 32
+FLUSH_INTERVAL_S = 1.0
+
+
+class GroupWriter:
+    """
+    Append-only line writer that keeps the file open and batches fsyncs,
+    instead of reopening the file for every line.
+    """
+
+    def __init__(self, path: Path, fsync: bool = True) -> None:
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+        self._buffer: list[str] = []
+        self._last_flush = time.monotonic()
+
+    def append(self, record: dict) -> None:
+        self._buffer.append(json.dumps(record, ensure_ascii=True) + "\n")
+
+    def due(self) -> bool:
+        if not self._buffer:
+            return False
+        return (
+            len(self._buffer) >= FLUSH_EVERY
+            or time.monotonic() - self._last_flush >= FLUSH_INTERVAL_S
+        )
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+        self._file.write("".join(self._buffer))
+        self._buffer = []
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def truncate(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.path.write_text("", encoding="utf-8")
+
+    def close(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def read_journal(path: Path) -> list[dict]:
+    """
+    Records written since the last checkpoint. A torn last line from a crash
+    is ignored.
+    """
+    if not path.exists():
+        return []
+    records = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
+
+
+def replay_journal(records: list[dict], dedup_entries: dict, manifest: dict) -> dict[str, int]:
+    """
+    Apply journaled commits on top of the last checkpoint. Returns the last
+    committed segment index of every file that was left half-processed.
+    """
+    progress: dict[str, int] = {}
+    for record in records:
+        op = record.get("op")
+        if op == "segment":
+            dedup_entries[record["hash"]] = record["entry"]
+            name = record["file"]
+            progress[name] = max(progress.get(name, 0), record["idx"])
+        elif op == "file_done":
+            manifest[record["file"]] = record["entry"]
+            progress.pop(record["file"], None)
+    return progress
@@ -0,0 +1,170 @@
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+
+# Ingest metrics: per-stage timers, counters and sampled gauges (queue depth),
+# shared by the reader thread, the classification workers and the committer.
+# Stage timers are summed across threads, so for parallel stages (classify)
+# the total can exceed the wall-clock time of the run.
+PROFILE_TOP = 25
+TRACEMALLOC_FRAMES = 25
+TRACEMALLOC_TOP = 15
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.counters: dict[str, int] = {}
+        self.timers: dict[str, list] = {}
+        self.gauges: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timer = self.timers.setdefault(name, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def time(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def timed(self, name: str, fn):
+        """
+        Wrap fn so every call is timed under name (for pool.submit).
+        """
+
+        def run(*args, **kwargs):
+            with self.time(name):
+                return fn(*args, **kwargs)
+
+        return run
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            gauge = self.gauges.setdefault(name, [0, 0.0, value])
+            gauge[0] += 1
+            gauge[1] += value
+            gauge[2] = max(gauge[2], value)
+
+    def snapshot(self, **extra) -> dict:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            counters = dict(self.counters)
+            timers = {
+                name: {"count": c, "total_s": round(t, 4), "max_s": round(m, 4)}
+                for name, (c, t, m) in self.timers.items()
+            }
+            gauges = {
+                name: {"samples": c, "avg": round(total / c, 2) if c else 0.0, "max": m}
+                for name, (c, total, m) in self.gauges.items()
+            }
+        segments = counters.get("segments_written", 0)
+        data = {
+            "ts": datetime.now(UTC).isoformat(),
+            "elapsed_s": round(elapsed, 3),
+            "segments_per_s": round(segments / elapsed, 2) if elapsed > 0 else 0.0,
+            "counters": counters,
+            "timers": timers,
+            "gauges": gauges,
+        }
+        data.update(extra)
+        return data
+
+
+def append_metrics(path: Path, record: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=True) + "\n")
+
+
+def format_summary(record: dict) -> str:
+    counters = record["counters"]
+    lines = [
+        (
+            f"Metricas: {counters.get('segments_written', 0)} segmentos gravados em "
+            f"{record['elapsed_s']:.1f}s ({record['segments_per_s']:.2f} seg/s)"
+        ),
+    ]
+    llm = record.get("llm", {})
+    if llm:
+        lines.append(f"- LLM: {llm['calls']} chamadas, {llm['wait_s']:.1f}s de espera")
+    for name, timer in sorted(record["timers"].items(), key=lambda kv: -kv[1]["total_s"]):
+        lines.append(
+            f"- {name}: {timer['total_s']:.2f}s em {timer['count']} ({timer['max_s'] * 1000:.0f}ms max)"
+        )
+    for name, gauge in record["gauges"].items():
+        lines.append(f"- {name}: media {gauge['avg']}, max {gauge['max']}")
+    cache = record.get("label_cache", {})
+    lookups = cache.get("hits", 0) + cache.get("misses", 0)
+    if lookups:
+        lines.append(f"- cache de rotulos: {cache['hits'] / lookups * 100:.1f}% de acerto")
+    skipped = {k: v for k, v in counters.items() if k.startswith("skipped_")}
+    if skipped:
+        lines.append("- descartados: " + ", ".join(f"{k[8:]}={v}" for k, v in sorted(skipped.items())))
+    return "\n".join(lines)
+
+
+def run_profiled(fn, out_dir: Path, name: str = "ingest"):
+    """
+    Run fn under cProfile (every thread started meanwhile gets its own
+    profiler) and tracemalloc; dump both to out_dir and print the top entries.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    profiles: list[cProfile.Profile] = []
+    profiles_lock = threading.Lock()
+
+    def start_thread_profile(_frame, _event, _arg):
+        # First event in a new thread: swap this hook for a real profiler.
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with profiles_lock:
+            profiles.append(profile)
+        profile.enable()
+
+    main_profile = cProfile.Profile()
+    profiles.append(main_profile)
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    threading.setprofile(start_thread_profile)
+    main_profile.enable()
+    try:
+        return fn()
+    finally:
+        main_profile.disable()
+        threading.setprofile(None)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        prof_path = out_dir / f"{name}_{stamp}.prof"
+        with profiles_lock:
+            stats = pstats.Stats(*profiles)
+        stats.dump_stats(str(prof_path))
+        mem_path = out_dir / f"{name}_{stamp}.tracemalloc"
+        snapshot.dump(str(mem_path))
+
+        report = io.StringIO()
+        pstats.Stats(str(prof_path), stream=report).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(report.getvalue())
+        print(f"Memoria (tracemalloc): atual {current / 1e6:.1f} MB, pico {peak / 1e6:.1f} MB")
+        for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]:
+            print(f"  {stat}")
+        print(f"Perfis salvos em {prof_path} e {mem_path}")
@@ -0,0 +1,86 @@
+import os
+import time
+from pathlib import Path
+from typing import Self
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Exclusive inter-process locks on a lock file. The lock belongs to the open
+# file, so the OS drops it when the holder exits or crashes: a leftover lock
+# file never blocks anyone. The holder's pid is written into the file so a
+# refused caller can say who is holding it.
+WINDOWS_RETRY_S = 0.1
+
+
+class FileLock:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = None
+
+    def _try_lock(self, blocking: bool) -> bool:
+        fd = self._file.fileno()
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return False
+            return True
+        while True:
+            try:
+                self._file.seek(0)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+                time.sleep(WINDOWS_RETRY_S)
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Take the lock; with blocking=False returns False at once when another
+        process holds it.
+        """
+        if self._file is not None:
+            raise RuntimeError(f"lock ja adquirido: {self.path}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a+", encoding="utf-8")
+        if not self._try_lock(blocking):
+            self._file.close()
+            self._file = None
+            return False
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(str(os.getpid()))
+        self._file.flush()
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    def holder(self) -> str:
+        """
+        Pid written by the current holder ("?" when unreadable).
+        """
+        try:
+            return self.path.read_text(encoding="utf-8").strip() or "?"
+        except OSError:
+            return "?"
+
+    def __enter__(self) -> Self:
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,37 @@
+import os
+import re
+from pathlib import Path
+
+# Memory namespaces (one per tenant/user). The default namespace (None or "")
+# keeps the original layout: memory/ and data/. Any other namespace lives in
+# memory/tenants/<name>/ and data/tenants/<name>/ with the same file names.
+# AURORA_NAMESPACE selects the namespace used by the scripts by default.
+TENANTS_DIRNAME = "tenants"
+DEFAULT_NAMESPACE = os.getenv("AURORA_NAMESPACE", "") or None
+
+_NAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+
+
+def validate_namespace(namespace: str | None) -> str | None:
+    if not namespace:
+        return None
+    if not _NAME_RE.fullmatch(namespace) or ".." in namespace:
+        raise ValueError(f"namespace invalido: {namespace!r}")
+    return namespace
+
+
+def namespace_path(base: Path, namespace: str | None) -> Path:
+    namespace = validate_namespace(namespace)
+    if namespace is None:
+        return base
+    return base / TENANTS_DIRNAME / namespace
+
+
+def rebase(path: Path, base: Path, namespace: str | None) -> Path:
+    """
+    The namespace's version of a default-namespace file path under base
+    (e.g. memory/memory_index.json -> memory/tenants/<ns>/memory_index.json).
+    """
+    if validate_namespace(namespace) is None:
+        return path
+    return namespace_path(base, namespace) / path.relative_to(base)
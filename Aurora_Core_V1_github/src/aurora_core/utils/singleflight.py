@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Hashable, Iterable, Iterator
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.cond = threading.Condition()
+        self.chunks: list = []
+        self.done = False
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key runs the
+    upstream call, callers arriving while it is in flight wait and share the
+    result. Nothing is cached once the call finishes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[Hashable, _Flight] = {}
+
+    def _join(self, key: Hashable) -> tuple[_Flight, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = _Flight()
+            self._flights[key] = flight
+            return flight, True
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+        with flight.cond:
+            flight.done = True
+            flight.cond.notify_all()
+
+    def do(self, key: Hashable, fn: Callable[[], object]):
+        flight, leader = self._join(key)
+        if leader:
+            try:
+                flight.result = fn()
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                self._finish(key, flight)
+            return flight.result
+
+        with flight.cond:
+            while not flight.done:
+                flight.cond.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stream(self, key: Hashable, factory: Callable[[], Iterable]) -> Iterator:
+        """
+        Streaming variant of do(): every caller receives every chunk produced
+        by the single upstream iterator, in order, as soon as it arrives.
+        The caller joins (or leads) the flight on its first next(), so a
+        stream that is never iterated never holds the key; a leader closed or
+        dropped mid-stream finishes the flight with an error.
+        """
+        flight, leader = self._join(key)
+        if leader:
+            yield from self._lead(key, flight, factory)
+        else:
+            yield from self._follow(flight)
+
+    def _lead(self, key: Hashable, flight: _Flight, factory: Callable[[], Iterable]) -> Iterator:
+        try:
+            for chunk in factory():
+                with flight.cond:
+                    flight.chunks.append(chunk)
+                    flight.cond.notify_all()
+                yield chunk
+        except GeneratorExit:
+            flight.error = RuntimeError("stream abandoned by leader")
+            raise
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self._finish(key, flight)
+
+    def _follow(self, flight: _Flight) -> Iterator:
+        pos = 0
+        while True:
+            with flight.cond:
+                while pos >= len(flight.chunks) and not flight.done:
+                    flight.cond.wait()
+                pending = flight.chunks[pos:]
+                done = flight.done
+            pos += len(pending)
+            yield from pending
+            if done and pos >= len(flight.chunks):
+                break
+        if flight.error is not None:
+            raise flight.error
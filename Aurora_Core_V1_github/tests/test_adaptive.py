@@ -0,0 +1,92 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.core import adaptive, core
+from aurora_core.core.core import FAST_MAX_CONTEXT_CHARS, MODES, PRECISE_MAX_CONTEXT_CHARS
+from aurora_core.decision_layer import executors
+
+
+def _levels():
+    return adaptive.build_levels(MODES["fast"], MODES["precise"], FAST_MAX_CONTEXT_CHARS, PRECISE_MAX_CONTEXT_CHARS)
+
+
+def test_levels_span_fast_to_precise():
+    levels = _levels()
+    assert len(levels) == adaptive.LEVELS
+    assert levels[0] == {**MODES["fast"], "max_context_chars": FAST_MAX_CONTEXT_CHARS}
+    assert levels[-1] == {**MODES["precise"], "max_context_chars": PRECISE_MAX_CONTEXT_CHARS}
+    top_k = [level["top_k"] for level in levels]
+    assert top_k == sorted(top_k)
+    assert levels[1]["use_search"] and not levels[1]["include_canonical"]
+
+
+def test_controller_follows_latency_target_and_logs_decisions(tmp_path):
+    log_path = tmp_path / "core_decisions.jsonl"
+    controller = adaptive.AdaptiveController(_levels(), target_p95_s=2.0, log_path=log_path)
+    top = adaptive.LEVELS - 1
+    assert controller.level == top
+
+    # Slow turns: one level down per MIN_SAMPLES turns, never below fast.
+    actions = [controller.record(5.0, 4000)["action"] for _ in range(adaptive.MIN_SAMPLES * (top + 2))]
+    assert actions.count("down") == top
+    assert controller.level == 0
+
+    # Turns well under target bring the context back up once the slow turns
+    # leave the p95 window.
+    fast = [controller.record(0.5, 900)["action"] for _ in range(adaptive.WINDOW)]
+    assert "up" in fast and controller.level >= 1
+    while controller.level > 1:
+        controller.record(5.0, 4000)
+
+    # Inside the band (between UP_MARGIN * target and target): hold.
+    for _ in range(adaptive.MIN_SAMPLES * 2):
+        assert controller.record(1.8, 1200)["action"] == "hold"
+
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert len(records) == controller.turn
+    assert records[adaptive.MIN_SAMPLES - 1]["reason"].startswith("p95 5.00s")
+    assert records[-1]["settings"] == controller.settings()
+
+
+def test_prompt_target_also_lowers_the_level():
+    controller = adaptive.AdaptiveController(_levels(), target_p95_s=10.0, target_prompt_chars=3000, log_path=None)
+    for _ in range(adaptive.MIN_SAMPLES):
+        decision = controller.record(1.0, 5000)
+    assert decision["action"] == "down"
+    assert "prompt" in decision["reason"]
+
+
+def test_turn_latency_is_time_to_first_output():
+    assert adaptive.measure_turn(10.0, 10.5, 12.0) == 0.5
+    # Nothing marked during the turn (e.g. image route): whole turn.
+    assert adaptive.measure_turn(10.0, 3.0, 12.0) == 2.0
+
+
+def test_slow_retrieval_lowers_the_level_through_ask_aurora(monkeypatch):
+    def slow_context(**kwargs):
+        time.sleep(0.05)
+        return "memoria"
+
+    def instant_answer(route, prompt, user_input, **kwargs):
+        # The model answers at once: all the latency is in retrieval.
+        executors._mark_first_output()
+        return "resposta"
+
+    controller = adaptive.AdaptiveController(_levels(), target_p95_s=0.02, log_path=None)
+    monkeypatch.setattr(core, "ACTIVE_MODE", "auto")
+    monkeypatch.setattr(core, "_ADAPTIVE", controller)
+    monkeypatch.setattr(core, "_WARMUP", None)
+    monkeypatch.setattr(core, "decide_route", lambda user_input: {"route": "chat", "mode": "natural"})
+    monkeypatch.setattr(core, "build_memory_context", slow_context)
+    monkeypatch.setattr(core, "execute_route", instant_answer)
+
+    for _ in range(adaptive.MIN_SAMPLES):
+        assert core.ask_aurora("qual o status do projeto?") == "resposta"
+    assert controller.level == adaptive.LEVELS - 2
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.pipeline.aurora_memory.ai import classifier
+
+
+def test_plan_batches_respects_token_budget(monkeypatch):
+    monkeypatch.setattr(classifier, "BATCH_TOKEN_BUDGET", classifier._batch_overhead_tokens() + 60)
+    contents = ["x" * 80] * 5 + ["y" * 4000]
+    batches = classifier.plan_batches(contents)
+    assert [pos for batch in batches for pos in batch] == list(range(6))
+    assert batches[-1] == [5]
+    assert all(len(batch) <= 2 for batch in batches[:-1])
+
+
+def test_classify_batch_falls_back_only_for_unparsed_items(monkeypatch):
+    calls = []
+
+    def fake_ask(prompt, json_mode=False):
+        calls.append(json_mode)
+        if json_mode:
+            return '{"labels": [{"id": 1, "type": "long_term"}, {"id": 2, "type": "???"}]}'
+        return "short_term"
+
+    monkeypatch.setattr(classifier, "ask_ollama", fake_ask)
+    results = classifier.classify_batch(["projeto aurora usa ollama", "lembrar amanha", "meu nome e Ana"])
+    assert results == [
+        ("long_term", None, "model_batch"),
+        ("short_term", None, "model"),
+        ("identity", None, "heuristic"),
+    ]
+    assert calls == [True, False]
@@ -0,0 +1,119 @@
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.memory import loader
+from aurora_core.pipeline.aurora_memory.memory.near_dup import NearDupIndex
+from aurora_core.pipeline.aurora_memory.pipeline import compaction, ingest_pipeline
+
+DAY = 86400
+
+
+def _isolate(monkeypatch, tmp_path):
+    memory_dir = tmp_path / "memory"
+    monkeypatch.setattr(loader, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(loader, "INDEX_PATH", memory_dir / "memory_index.json")
+    monkeypatch.setattr(loader, "CANONICAL_DIR", memory_dir / "canonical")
+    monkeypatch.setattr(loader, "RETRIEVAL_STATS_PATH", memory_dir / "retrieval_stats.json")
+    monkeypatch.setattr(compaction, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(compaction, "ARCHIVE_DIR", memory_dir / "archive")
+    monkeypatch.setattr(ingest_pipeline, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(ingest_pipeline, "DEDUP_STORE_PATH", memory_dir / "dedup")
+    monkeypatch.setattr(ingest_pipeline, "DEDUP_PATH", memory_dir / "dedup_index.json")
+    monkeypatch.setattr(ingest_pipeline, "WRITER_LOCK_PATH", memory_dir / "ingest.lock")
+    monkeypatch.setattr(ingest_pipeline, "NEAR_DUP_PATH", memory_dir / "near_dup_index.json")
+    return memory_dir
+
+
+def _memory(memory_dir, mem_type, name, text, age_days):
+    path = memory_dir / mem_type / f"{mem_type}_{name}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    ts = time.time() - age_days * DAY
+    os.utime(path, (ts, ts))
+    return path
+
+
+def test_compaction_expires_promotes_and_merges(monkeypatch, tmp_path):
+    memory_dir = _isolate(monkeypatch, tmp_path)
+    _memory(memory_dir, "short_term", "old_part1.txt", "comprar pilhas para o controle remoto", 60)
+    _memory(memory_dir, "short_term", "fav_part1.txt", "senha do wifi da casa de praia", 1)
+    for i, extra in enumerate(["segunda", "terca", "quarta"]):
+        _memory(memory_dir, "short_term", f"gym_part{i}.txt", f"treino de academia pernas {extra}", 10)
+    _memory(memory_dir, "short_term", "new_part1.txt", "ligar para o dentista amanha", 0)
+    _memory(memory_dir, "long_term", "plan_part1.txt", "plano de carreira em dados", 100)
+    loader.build_memory_index(force=True)
+
+    for _ in range(3):
+        assert loader.search_memory("senha wifi praia", types=["short_term"], top_k=1)
+    loader.flush_retrieval_stats()
+    ingest_pipeline._load_near_dup_index().save()
+
+    report = compaction.run_compaction()
+    assert report == {
+        "short_term": 6,
+        "promoted": 1,
+        "expired": 1,
+        "merged_clusters": 1,
+        "merged_items": 3,
+    }
+    assert sorted(p.name for p in (memory_dir / "short_term").glob("*.txt")) == ["short_term_new_part1.txt"]
+    assert (memory_dir / "long_term" / "long_term_fav_part1.txt").exists()
+    assert (memory_dir / "archive" / "short_term" / "short_term_old_part1.txt").exists()
+    consolidated = list((memory_dir / "long_term").glob("long_term_consolidated_*.txt"))
+    assert len(consolidated) == 1
+    assert "treino de academia pernas terca" in consolidated[0].read_text(encoding="utf-8")
+
+    index = json.loads((memory_dir / "memory_index.json").read_text(encoding="utf-8"))
+    indexed = sorted(Path(e["path"]).name for e in index["entries"])
+    assert indexed == sorted(
+        ["short_term_new_part1.txt", "long_term_fav_part1.txt", "long_term_plan_part1.txt", consolidated[0].name]
+    )
+    assert "academia" in (memory_dir / "canonical" / "long_term.txt").read_text(encoding="utf-8")
+    stats = loader.load_retrieval_stats()
+    assert stats["long_term/long_term_fav_part1.txt"]["hits"] == 3
+
+    store = ingest_pipeline._load_dedup_store()
+    promoted = ingest_pipeline._hash_text("senha do wifi da casa de praia")
+    assert store.get(promoted) == {"file": "fav_part1.txt", "type": "long_term"}
+    store.close()
+
+    # The saved near-duplicate index matches what a rebuild from the memory folders gives.
+    near_dup = NearDupIndex(memory_dir / "near_dup_index.json")
+    assert near_dup.load()
+    assert set(near_dup.signatures) == {
+        ingest_pipeline._hash_text(p.read_text(encoding="utf-8").strip())
+        for folder in ("short_term", "long_term")
+        for p in (memory_dir / folder).glob("*.txt")
+    }
+    assert near_dup.query("treino de academia pernas quarta")[0] is None
+
+    assert compaction.run_compaction()["promoted"] == 0
+
+
+def test_compaction_refuses_a_namespace_being_ingested(monkeypatch, tmp_path):
+    memory_dir = _isolate(monkeypatch, tmp_path)
+    _memory(memory_dir, "short_term", "old_part1.txt", "comprar pilhas para o controle remoto", 60)
+    loader.build_memory_index(force=True)
+
+    # Held by a running ingest or ingest daemon.
+    lock = ingest_pipeline.acquire_writer_lock(ingest_pipeline._paths())
+    try:
+        with pytest.raises(ingest_pipeline.NamespaceLockedError):
+            compaction.run_compaction()
+        with pytest.raises(ingest_pipeline.NamespaceLockedError):
+            ingest_pipeline._open_run()
+        # Reporting does not write anything.
+        assert compaction.run_compaction(dry_run=True)["expired"] == 1
+    finally:
+        lock.release()
+    assert compaction.run_compaction()["expired"] == 1
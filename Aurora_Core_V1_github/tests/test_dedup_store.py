@@ -0,0 +1,93 @@
+import hashlib
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.pipeline.aurora_memory.memory import dedup_store
+from aurora_core.pipeline.aurora_memory.memory.dedup_store import DedupStore
+
+
+def _h(n):
+    return hashlib.sha256(str(n).encode("utf-8")).hexdigest()
+
+
+def test_entries_survive_reopen_and_compaction(monkeypatch, tmp_path):
+    monkeypatch.setattr(dedup_store, "LOG_MAX_RECORDS", 10)
+    monkeypatch.setattr(dedup_store, "MAX_RUNS", 2)
+    store = DedupStore(tmp_path).open()
+    for n in range(95):
+        store[_h(n)] = {"file": f"f{n}.txt", "type": "short_term"}
+        if n % 10 == 9:
+            store.flush()
+    store[_h(3)] = {"file": "other.txt", "type": "long_term"}
+    assert store.get(_h(94)) == {"file": "f94.txt", "type": "short_term"}
+    store.close()
+
+    store = DedupStore(tmp_path).open()
+    assert len(store) == 95
+    assert len(store.runs) <= 2
+    assert all(_h(n) in store for n in range(95))
+    assert _h(1000) not in store
+    assert store.get(_h(3)) == {"file": "f3.txt", "type": "short_term"}
+    assert store.get(_h(1000)) is None
+    store.close()
+
+
+def test_torn_log_record_is_dropped(tmp_path):
+    store = DedupStore(tmp_path).open()
+    store[_h(1)] = {"file": "a.txt", "type": "identity"}
+    store.close()
+    with (tmp_path / "hashes.log").open("ab") as f:
+        f.write(b"\x00" * 7)
+    (tmp_path / "bloom.bin").unlink()
+    store = DedupStore(tmp_path).open()
+    assert len(store) == 1
+    assert store.get(_h(1))["file"] == "a.txt"
+    store.close()
+
+
+def test_replace_counts_only_new_hashes(tmp_path):
+    store = DedupStore(tmp_path).open()
+    store[_h(1)] = {"file": "a.txt", "type": "short_term"}
+    store.replace(_h(1), {"file": "a.txt", "type": "long_term"})
+    store.replace(_h(1), {"file": "a.txt", "type": "archive"})
+    assert len(store) == 1
+    store.replace(_h(2), {"file": "b.txt", "type": "long_term"})
+    assert len(store) == 2
+    store.close()
+
+    store = DedupStore(tmp_path).open()
+    assert len(store) == 2
+    assert store.get(_h(1)) == {"file": "a.txt", "type": "archive"}
+    store.close()
+
+
+def test_crash_after_spilling_the_log_keeps_the_filter(monkeypatch, tmp_path):
+    monkeypatch.setattr(dedup_store, "LOG_MAX_RECORDS", 10)
+    store = DedupStore(tmp_path).open()
+    store.flush()
+    for n in range(10):
+        store[_h(n)] = {"file": f"f{n}.txt", "type": "short_term"}
+    real_spill = DedupStore._spill_tail
+
+    def crash(self):
+        real_spill(self)
+        raise KeyboardInterrupt
+
+    # Killed after the run was written and the log emptied, before the final
+    # filter save.
+    monkeypatch.setattr(DedupStore, "_spill_tail", crash)
+    try:
+        store.flush()
+    except KeyboardInterrupt:
+        pass
+    for run in store.runs:
+        run.close()
+
+    store = DedupStore(tmp_path).open()
+    assert all(_h(n) in store for n in range(10))
+    store.close()
@@ -0,0 +1,31 @@
+import socket
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.decision_layer import executors
+
+
+def test_hung_generation_releases_every_coalesced_caller(monkeypatch):
+    # Accepts connections (kernel backlog) but never answers.
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen(8)
+        monkeypatch.setattr(executors, "OLLAMA_PORT", server.getsockname()[1])
+        monkeypatch.setattr(executors, "GENERATE_TIMEOUT_S", 0.2)
+        results = []
+        threads = [
+            threading.Thread(target=lambda s=stream: results.append(executors._call_llm("ola", stream=s)), daemon=True)
+            for stream in (False, False, True, True)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+    assert len(results) == 4
+    assert all(r.startswith("Erro de comunicacao") for r in results)
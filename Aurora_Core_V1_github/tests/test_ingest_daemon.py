@@ -0,0 +1,130 @@
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.memory import loader
+from aurora_core.pipeline.aurora_memory.ingest import reader, splitter
+from aurora_core.pipeline.aurora_memory.memory import writer
+from aurora_core.pipeline.aurora_memory.pipeline import daemon as ingest_daemon
+from aurora_core.pipeline.aurora_memory.pipeline import ingest_pipeline
+
+
+def _isolate(monkeypatch, tmp_path):
+    data_dir = tmp_path / "data"
+    memory_dir = tmp_path / "memory"
+    data_dir.mkdir(parents=True)
+    monkeypatch.setattr(reader, "DATA_DIR", data_dir)
+    monkeypatch.setattr(writer, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(ingest_pipeline, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(ingest_pipeline, "LOG_PATH", memory_dir / "ingest_log.jsonl")
+    monkeypatch.setattr(ingest_pipeline, "DEDUP_STORE_PATH", memory_dir / "dedup")
+    monkeypatch.setattr(ingest_pipeline, "DEDUP_PATH", memory_dir / "dedup_index.json")
+    monkeypatch.setattr(ingest_pipeline, "LABEL_CACHE_PATH", memory_dir / "label_cache.json")
+    monkeypatch.setattr(ingest_pipeline, "MANIFEST_PATH", memory_dir / "ingest_manifest.json")
+    monkeypatch.setattr(ingest_pipeline, "NEAR_DUP_PATH", memory_dir / "near_dup_index.json")
+    monkeypatch.setattr(ingest_pipeline, "JOURNAL_PATH", memory_dir / "ingest_journal.jsonl")
+    monkeypatch.setattr(ingest_pipeline, "CHECKPOINT_PATH", memory_dir / "ingest_checkpoint.json")
+    monkeypatch.setattr(ingest_pipeline, "LOCAL_CLASSIFIER_PATH", memory_dir / "local_classifier.json")
+    monkeypatch.setattr(ingest_pipeline, "METRICS_PATH", memory_dir / "ingest_metrics.jsonl")
+    monkeypatch.setattr(ingest_pipeline, "WRITER_LOCK_PATH", memory_dir / "ingest.lock")
+    monkeypatch.setattr(loader, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(loader, "INDEX_PATH", memory_dir / "memory_index.json")
+    monkeypatch.setattr(loader, "CANONICAL_DIR", memory_dir / "canonical")
+    monkeypatch.setattr(loader, "RETRIEVAL_STATS_PATH", memory_dir / "retrieval_stats.json")
+    monkeypatch.setattr(splitter, "USE_LLM_SPLITTER", False)
+    monkeypatch.setattr(
+        ingest_pipeline, "classify_batch", lambda contents: [("long_term", None, "model") for _ in contents]
+    )
+    monkeypatch.setattr(ingest_pipeline, "classify_memory", lambda content: ("long_term", None, "model"))
+    return data_dir, memory_dir
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_daemon_ingests_pushed_segments_and_new_files(monkeypatch, tmp_path):
+    data_dir, memory_dir = _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(ingest_daemon, "POLL_INTERVAL_S", 0.05)
+    (data_dir / "antigo_01_02_2026.txt").write_text(">>>arquivo anterior sobre jardinagem", encoding="utf-8")
+    daemon = ingest_daemon.IngestDaemon(workers=2, max_latency_s=0.1)
+    server = ingest_daemon.SegmentServer(daemon, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    worker = threading.Thread(target=daemon.serve_forever, daemon=True)
+    worker.start()
+    try:
+        assert _wait_for(lambda: loader.search_memory("jardinagem"))
+
+        with socket.create_connection(server.server_address) as conn:
+            f = conn.makefile("rwb")
+            f.write(b'{"text": "reuniao sobre o telescopio do observatorio"}\n\n')
+            f.flush()
+            assert f.readline() == b"ok\n"
+            assert f.readline().startswith(b"erro")
+        assert _wait_for(lambda: loader.search_memory("telescopio observatorio"))
+
+        (data_dir / "novo_02_02_2026.txt").write_text(">>>novo arquivo sobre astronomia amadora", encoding="utf-8")
+        assert _wait_for(lambda: loader.search_memory("astronomia amadora"))
+    finally:
+        daemon.stop()
+        worker.join(timeout=10)
+        server.shutdown()
+        server.server_close()
+
+    assert not worker.is_alive()
+    (inbox,) = data_dir.glob("inbox_*.txt")
+    assert inbox.read_text(encoding="utf-8") == ">>>reuniao sobre o telescopio do observatorio\n"
+    assert len(list((memory_dir / "long_term").glob("*.txt"))) == 3
+    # State was checkpointed on shutdown: nothing left to resume.
+    assert (memory_dir / "ingest_manifest.json").exists()
+
+
+class _SlowText(str):
+    # Stalls submit() half way through its append.
+    started = threading.Event()
+    release = threading.Event()
+
+    def __format__(self, spec):
+        self.started.set()
+        self.release.wait(10)
+        return str.__format__(self, spec)
+
+
+def test_batch_does_not_cut_a_concurrent_submit(monkeypatch, tmp_path):
+    _data_dir, memory_dir = _isolate(monkeypatch, tmp_path)
+    daemon = ingest_daemon.IngestDaemon(workers=2, publish=False)
+    daemon.run = ingest_pipeline._open_run(incremental=True, resume=True, track_written=True)
+    try:
+        pushing = threading.Thread(
+            target=daemon.submit,
+            args=(["primeiro texto sobre botanica " * 400, _SlowText("segundo texto sobre geologia")],),
+        )
+        pushing.start()
+        assert _SlowText.started.wait(10)
+        batch = threading.Thread(target=daemon.process, args=([daemon.inbox_path()],))
+        batch.start()
+        batch.join(0.3)
+        # The batch waits for the append instead of sizing the inbox mid-way.
+        assert batch.is_alive()
+        _SlowText.release.set()
+        pushing.join(10)
+        batch.join(10)
+        assert len(daemon.run["written"]) == 2
+        manifest = daemon.run["manifest"][daemon.inbox_path().name]
+        assert manifest["size"] == daemon.inbox_path().stat().st_size
+    finally:
+        _SlowText.release.set()
+        ingest_pipeline._close_run(daemon.run)
+    assert len(list((memory_dir / "long_term").glob("*.txt"))) == 2
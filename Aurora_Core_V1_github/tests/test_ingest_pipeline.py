@@ -1,2 +1,357 @@
+import json
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.pipeline.aurora_memory.ai.local_classifier import LocalClassifier
+from aurora_core.pipeline.aurora_memory.ingest import reader, splitter
+from aurora_core.pipeline.aurora_memory.memory import writer
+from aurora_core.pipeline.aurora_memory.memory.near_dup import NearDupIndex
+from aurora_core.pipeline.aurora_memory.pipeline import ingest_pipeline
+
+
 def test_placeholder():
     assert True
+
+
+def _isolate(monkeypatch, tmp_path):
+    data_dir = tmp_path / "data"
+    memory_dir = tmp_path / "memory"
+    data_dir.mkdir(parents=True)
+    monkeypatch.setattr(reader, "DATA_DIR", data_dir)
+    monkeypatch.setattr(writer, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(ingest_pipeline, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(ingest_pipeline, "LOG_PATH", memory_dir / "ingest_log.jsonl")
+    monkeypatch.setattr(ingest_pipeline, "DEDUP_STORE_PATH", memory_dir / "dedup")
+    monkeypatch.setattr(ingest_pipeline, "DEDUP_PATH", memory_dir / "dedup_index.json")
+    monkeypatch.setattr(ingest_pipeline, "LABEL_CACHE_PATH", memory_dir / "label_cache.json")
+    monkeypatch.setattr(ingest_pipeline, "MANIFEST_PATH", memory_dir / "ingest_manifest.json")
+    monkeypatch.setattr(ingest_pipeline, "NEAR_DUP_PATH", memory_dir / "near_dup_index.json")
+    monkeypatch.setattr(ingest_pipeline, "JOURNAL_PATH", memory_dir / "ingest_journal.jsonl")
+    monkeypatch.setattr(ingest_pipeline, "CHECKPOINT_PATH", memory_dir / "ingest_checkpoint.json")
+    monkeypatch.setattr(ingest_pipeline, "LOCAL_CLASSIFIER_PATH", memory_dir / "local_classifier.json")
+    monkeypatch.setattr(ingest_pipeline, "METRICS_PATH", memory_dir / "ingest_metrics.jsonl")
+    monkeypatch.setattr(ingest_pipeline, "WRITER_LOCK_PATH", memory_dir / "ingest.lock")
+    monkeypatch.setattr(splitter, "USE_LLM_SPLITTER", False)
+    return data_dir, memory_dir
+
+
+def _segment_events(log_path):
+    # Per-file "file_done" events are left out.
+    return [e for e in map(json.loads, log_path.read_text().splitlines()) if "segment" in e]
+
+
+TOPICS = [
+    "backup do servidor principal",
+    "reuniao com a equipe de design",
+    "compra de passagens para lisboa",
+    "configurar o roteador novo",
+    "revisar contrato do fornecedor",
+    "plano de estudos de estatistica",
+    "receita de bolo de cenoura",
+    "manutencao preventiva do carro",
+    "orcamento anual do projeto eclipse",
+    "treino de corrida na segunda",
+    "migrar banco de dados para postgres",
+    "leitura do livro sobre historia",
+    "consulta medica marcada quinta",
+    "pagar conta de energia eletrica",
+    "atualizar documentacao da api",
+    "organizar fotos da viagem",
+    "renovar assinatura do dominio",
+    "preparar apresentacao para cliente",
+    "conserto da torneira da cozinha",
+    "jantar de aniversario da familia",
+]
+
+
+def _fake_classify(content):
+    # Later segments finish first to exercise out-of-order completion.
+    time.sleep(0.001 * (len(content) % 7))
+    if "longo" in content:
+        return "long_term", None, "model"
+    return "short_term", None, "model"
+
+
+def _run(monkeypatch, tmp_path, workers, batching=True):
+    data_dir, memory_dir = _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(ingest_pipeline, "classify_memory", _fake_classify)
+    monkeypatch.setattr(
+        ingest_pipeline, "classify_batch", lambda contents: [_fake_classify(c) for c in contents]
+    )
+    monkeypatch.setattr(ingest_pipeline, "BATCH_CLASSIFICATION", batching)
+    for n in range(3):
+        parts = [f"mensagem {n}-{i} {'longo' if i % 2 else 'curto'} texto" for i in range(6)]
+        parts.append("mensagem repetida em todos os arquivos")
+        (data_dir / f"conversa{n}_01_02_2026.txt").write_text(">>>" + "\n>>>".join(parts), encoding="utf-8")
+    ingest_pipeline.run_pipeline(workers=workers)
+    events = [json.loads(l) for l in (memory_dir / "ingest_log.jsonl").read_text().splitlines()]
+    for e in events:
+        e.pop("ts")
+    written = sorted(str(p.relative_to(memory_dir)) for p in memory_dir.rglob("*_part*.txt"))
+    return events, written
+
+
+def test_parallel_run_matches_serial_run(monkeypatch, tmp_path):
+    serial = _run(monkeypatch, tmp_path / "serial", workers=1)
+    parallel = _run(monkeypatch, tmp_path / "parallel", workers=4)
+    unbatched = _run(monkeypatch, tmp_path / "unbatched", workers=4, batching=False)
+    assert serial == parallel == unbatched
+    statuses = [e["status"] for e in serial[0]]
+    assert statuses.count("duplicate") == 2
+    assert statuses.count("ok") == 19
+    assert [(e["file"], e["segments_total"]) for e in serial[0] if e["status"] == "file_done"] == [
+        (f"conversa{n}_01_02_2026.txt", 7) for n in range(3)
+    ]
+    metrics = json.loads((tmp_path / "parallel" / "memory" / "ingest_metrics.jsonl").read_text().splitlines()[-1])
+    assert metrics["kind"] == "run"
+    assert metrics["counters"]["segments_written"] == 19
+    assert metrics["counters"]["skipped_duplicate"] == 2
+    assert metrics["timers"]["classify"]["count"] >= 1
+
+
+def test_rerun_uses_label_cache(monkeypatch, tmp_path):
+    _run(monkeypatch, tmp_path, workers=2)
+    memory_dir = tmp_path / "memory"
+    shutil.rmtree(memory_dir / "dedup")
+    for path in memory_dir.rglob("*_part*.txt"):
+        path.unlink()
+    (memory_dir / "ingest_log.jsonl").unlink()
+
+    def fail(_contents):
+        raise AssertionError("classifier should not be called")
+
+    monkeypatch.setattr(ingest_pipeline, "classify_batch", fail)
+    ingest_pipeline.run_pipeline(workers=2, incremental=False)
+    rerun = _segment_events(memory_dir / "ingest_log.jsonl")
+    ok = [e for e in rerun if e["status"] == "ok"]
+    assert len(ok) == 19
+    assert all(e["cache_hit"] for e in ok)
+
+
+def test_duplicates_behind_an_open_batch_are_bounded(monkeypatch, tmp_path):
+    data_dir, memory_dir = _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(ingest_pipeline, "BATCH_MAX_BUFFERED", 3)
+    batches = []
+
+    def classify(contents):
+        batches.append(len(contents))
+        return [_fake_classify(c) for c in contents]
+
+    monkeypatch.setattr(ingest_pipeline, "classify_batch", classify)
+    parts = [TOPICS[0]] * 6 + [TOPICS[1]]
+    (data_dir / "a_01_02_2026.txt").write_text(">>>" + "\n>>>".join(parts), encoding="utf-8")
+    ingest_pipeline.run_pipeline(workers=2)
+    # The first batch was submitted once three duplicates queued up behind it.
+    assert batches == [1, 1]
+    events = _segment_events(memory_dir / "ingest_log.jsonl")
+    assert [e["status"] for e in events] == ["ok"] + ["duplicate"] * 5 + ["ok"]
+
+
+def test_incremental_run_skips_unchanged_and_processes_tail(monkeypatch, tmp_path):
+    _run(monkeypatch, tmp_path, workers=2)
+    data_dir = tmp_path / "data"
+    memory_dir = tmp_path / "memory"
+    log_path = memory_dir / "ingest_log.jsonl"
+    log_path.unlink()
+
+    def fail(_contents):
+        raise AssertionError("unchanged files must not reach the classifier")
+
+    monkeypatch.setattr(ingest_pipeline, "classify_batch", fail)
+    ingest_pipeline.run_pipeline(workers=2)
+    assert not log_path.exists()
+
+    target = data_dir / "conversa1_01_02_2026.txt"
+    with target.open("a", encoding="utf-8") as f:
+        f.write("\n>>>mensagem nova adicionada depois\n>>>outra mensagem nova longo")
+    monkeypatch.setattr(
+        ingest_pipeline, "classify_batch", lambda contents: [_fake_classify(c) for c in contents]
+    )
+    ingest_pipeline.run_pipeline(workers=2)
+    events = _segment_events(log_path)
+    assert [(e["file"], e["segment"], e["status"]) for e in events] == [
+        ("conversa1_01_02_2026.txt", 8, "ok"),
+        ("conversa1_01_02_2026.txt", 9, "ok"),
+    ]
+    done = [json.loads(l) for l in log_path.read_text().splitlines() if '"file_done"' in l]
+    assert [(e["file"], e["segments_total"]) for e in done] == [("conversa1_01_02_2026.txt", 9)]
+    assert (memory_dir / "short_term" / "short_term_conversa1_01_02_2026_part8.txt").exists()
+
+
+def test_near_duplicates_are_not_stored_again(monkeypatch, tmp_path):
+    data_dir, memory_dir = _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(
+        ingest_pipeline, "classify_batch", lambda contents: [_fake_classify(c) for c in contents]
+    )
+    (data_dir / "a_01_02_2026.txt").write_text(
+        ">>>Reunião às 10:00 sobre o orçamento do projeto Eclipse", encoding="utf-8"
+    )
+    (data_dir / "b_02_02_2026.txt").write_text(
+        ">>>reuniao as 11:30   sobre o orcamento do projeto eclipse!", encoding="utf-8"
+    )
+    ingest_pipeline.run_pipeline(workers=2)
+    events = _segment_events(memory_dir / "ingest_log.jsonl")
+    assert [e["status"] for e in events] == ["ok", "near_duplicate"]
+    assert events[1]["dup_of"]["file"] == "a_01_02_2026_part1.txt"
+
+
+def test_segments_differing_only_in_a_number_are_kept(monkeypatch, tmp_path):
+    data_dir, memory_dir = _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(
+        ingest_pipeline, "classify_batch", lambda contents: [_fake_classify(c) for c in contents]
+    )
+    (data_dir / "a_01_02_2026.txt").write_text(
+        ">>>lembrar de pagar 100 reais ao fornecedor ate 05/03/2026", encoding="utf-8"
+    )
+    (data_dir / "b_02_02_2026.txt").write_text(
+        ">>>lembrar de pagar 9000 reais ao fornecedor ate 05/03/2026", encoding="utf-8"
+    )
+    ingest_pipeline.run_pipeline(workers=2)
+    events = _segment_events(memory_dir / "ingest_log.jsonl")
+    assert [e["status"] for e in events] == ["ok", "ok"]
+
+
+def test_resume_continues_after_interruption(monkeypatch, tmp_path):
+    data_dir, memory_dir = _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(ingest_pipeline, "BATCH_CLASSIFICATION", False)
+    for n in range(2):
+        parts = [TOPICS[n * 6 + i] for i in range(6)]
+        (data_dir / f"conversa{n}_01_02_2026.txt").write_text(">>>" + "\n>>>".join(parts), encoding="utf-8")
+
+    calls = []
+
+    def interrupted(content):
+        calls.append(content)
+        if len(calls) == 8:
+            raise KeyboardInterrupt
+        return _fake_classify(content)
+
+    monkeypatch.setattr(ingest_pipeline, "classify_memory", interrupted)
+    try:
+        ingest_pipeline.run_pipeline(workers=1)
+    except KeyboardInterrupt:
+        pass
+    log_path = memory_dir / "ingest_log.jsonl"
+    first = _segment_events(log_path)
+    assert [e["status"] for e in first] == ["ok"] * 7
+
+    monkeypatch.setattr(ingest_pipeline, "classify_memory", _fake_classify)
+    ingest_pipeline.run_pipeline(workers=1, resume=True)
+    events = _segment_events(log_path)
+    committed = [(e["file"], e["segment"]) for e in events]
+    assert all(e["status"] == "ok" for e in events)
+    assert len(committed) == len(set(committed)) == 12
+    assert json.loads((memory_dir / "ingest_checkpoint.json").read_text())["progress"] == {}
+
+
+def test_near_dup_index_holds_only_written_segments(monkeypatch, tmp_path):
+    data_dir, memory_dir = _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(ingest_pipeline, "BATCH_CLASSIFICATION", False)
+    (data_dir / "a_01_02_2026.txt").write_text(">>>" + "\n>>>".join(TOPICS[:12]), encoding="utf-8")
+    calls = []
+
+    def interrupted(content):
+        calls.append(content)
+        if len(calls) == 4:
+            raise KeyboardInterrupt
+        return _fake_classify(content)
+
+    monkeypatch.setattr(ingest_pipeline, "classify_memory", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        ingest_pipeline.run_pipeline(workers=1)
+    # The reader had routed segments past the interruption; their signatures
+    # must not reach the checkpointed index.
+    written = {
+        ingest_pipeline._hash_text(p.read_text(encoding="utf-8").strip())
+        for p in memory_dir.rglob("*_part*.txt")
+    }
+    near_dup = NearDupIndex(memory_dir / "near_dup_index.json")
+    assert near_dup.load()
+    assert len(written) == 3
+    assert set(near_dup.signatures) == written
+
+
+def test_reader_stops_when_a_commit_fails(monkeypatch, tmp_path):
+    data_dir, _memory_dir = _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(ingest_pipeline, "QUEUE_DEPTH_PER_WORKER", 1)
+    monkeypatch.setattr(ingest_pipeline, "STOP_POLL_S", 0.05)
+    monkeypatch.setattr(
+        ingest_pipeline, "classify_batch", lambda contents: [_fake_classify(c) for c in contents]
+    )
+    (data_dir / "a_01_02_2026.txt").write_text(">>>" + "\n>>>".join(TOPICS), encoding="utf-8")
+
+    def broken(item, classification, run):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(ingest_pipeline, "_commit", broken)
+    with pytest.raises(OSError):
+        ingest_pipeline.run_pipeline(workers=1)
+    # The reader was blocked on the full queue; it must not outlive the run.
+    assert not [t for t in threading.enumerate() if t.name == "ingest-reader"]
+
+
+def test_confident_local_labels_skip_the_model(monkeypatch, tmp_path):
+    data_dir, memory_dir = _isolate(monkeypatch, tmp_path)
+    LocalClassifier(threshold=0.9).fit(
+        [(f"{topic} curto", "short_term") for topic in TOPICS] + [("plano de carreira", "long_term")] * 3
+    ).save(memory_dir / "local_classifier.json")
+
+    def fail(_contents):
+        raise AssertionError("confident segments must not reach the model")
+
+    monkeypatch.setattr(ingest_pipeline, "classify_batch", fail)
+    (data_dir / "a_01_02_2026.txt").write_text(">>>" + "\n>>>".join(f"{t} curto" for t in TOPICS[:4]), encoding="utf-8")
+    ingest_pipeline.run_pipeline(workers=2)
+    events = _segment_events(memory_dir / "ingest_log.jsonl")
+    assert [(e["type"], e["source"]) for e in events] == [("short_term", "local")] * 4
+
+
+def test_namespaces_are_isolated(monkeypatch, tmp_path):
+    from aurora_core.memory import loader
+
+    data_dir, memory_dir = _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(ingest_pipeline, "classify_memory", _fake_classify)
+    monkeypatch.setattr(
+        ingest_pipeline, "classify_batch", lambda contents: [_fake_classify(c) for c in contents]
+    )
+    monkeypatch.setattr(loader, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(loader, "INDEX_PATH", memory_dir / "memory_index.json")
+    monkeypatch.setattr(loader, "CANONICAL_DIR", memory_dir / "canonical")
+    monkeypatch.setattr(loader, "RETRIEVAL_STATS_PATH", memory_dir / "retrieval_stats.json")
+    for n, tenant in enumerate(["acme", "globex"]):
+        tenant_dir = data_dir / "tenants" / tenant
+        tenant_dir.mkdir(parents=True)
+        (tenant_dir / "notas_01_02_2026.txt").write_text(
+            f">>>{TOPICS[n]} longo\n>>>mensagem repetida em todos os arquivos", encoding="utf-8"
+        )
+        ingest_pipeline.run_pipeline(workers=2, namespace=tenant)
+
+    # The same text is new to each tenant: dedup state is per namespace.
+    for tenant in ["acme", "globex"]:
+        tenant_memory = memory_dir / "tenants" / tenant
+        assert len(list(tenant_memory.rglob("*_part*.txt"))) == 2
+        assert (tenant_memory / "ingest_log.jsonl").exists()
+    assert not (memory_dir / "long_term").exists()
+
+    assert loader.search_memory("servidor backup", namespace="acme")
+    assert not loader.search_memory("servidor backup", namespace="globex")
+
+    # A cap below two indexes keeps only the most recently used one.
+    index_size = (memory_dir / "tenants" / "acme" / "memory_index.json").stat().st_size
+    monkeypatch.setattr(loader, "MEMORY_CACHE_MAX_BYTES", index_size * loader.CACHE_SIZE_FACTOR * 3 // 2)
+    loader.evict_namespace("acme")
+    loader.evict_namespace("globex")
+    loader.search_memory("servidor", namespace="acme")
+    loader.search_memory("equipe", namespace="globex")
+    assert "acme" not in loader.loaded_namespaces()
+    assert "globex" in loader.loaded_namespaces()
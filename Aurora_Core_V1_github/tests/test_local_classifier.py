@@ -0,0 +1,58 @@
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.pipeline.aurora_memory.ai.local_classifier import (
+    LocalClassifier,
+    format_report,
+    train,
+)
+
+SHORT = ["lembrar de comprar pao hoje", "reuniao amanha as dez", "pagar boleto hoje cedo"]
+LONG = ["projeto de vida estudar medicina", "objetivo de longo prazo mudar de pais", "meta anual guardar dinheiro"]
+
+
+def _write_log(tmp_path, n):
+    memory_dir = tmp_path / "memory"
+    events = []
+    for i in range(n):
+        label, pool = ("short_term", SHORT) if i % 2 else ("long_term", LONG)
+        text = f"{pool[i % 3]} item {i}"
+        path = memory_dir / label / f"{label}_conversa_part{i}.txt"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        events.append({"file": "conversa.txt", "segment": i, "status": "ok", "type": label, "source": "model"})
+    # Labels the local model produced itself are not training data.
+    events.append({"file": "conversa.txt", "segment": 0, "status": "ok", "type": "identity", "source": "local"})
+    log_path = memory_dir / "ingest_log.jsonl"
+    log_path.write_text("\n".join(json.dumps(e) for e in events), encoding="utf-8")
+    return log_path, memory_dir
+
+
+def test_train_reports_and_saves_confident_model(tmp_path):
+    log_path, memory_dir = _write_log(tmp_path, 80)
+    model_path = memory_dir / "local_classifier.json"
+    report = train(log_path, memory_dir, model_path, threshold=0.9)
+    assert report["saved"]
+    assert report["labels"] == {"long_term": 40, "short_term": 40}
+    assert report["accuracy"] == 1.0
+    assert "acuracia" in format_report(report)
+
+    model = LocalClassifier.load(model_path, threshold=0.9)
+    assert model.classify("lembrar de comprar pao e leite") == "short_term"
+    assert model.classify("meta anual de estudar medicina") == "long_term"
+    assert model.classify("texto sem nenhuma palavra conhecida") is None
+
+
+def test_too_few_examples_removes_model(tmp_path):
+    log_path, memory_dir = _write_log(tmp_path, 10)
+    model_path = memory_dir / "local_classifier.json"
+    model_path.write_text("{}", encoding="utf-8")
+    report = train(log_path, memory_dir, model_path)
+    assert not report["saved"]
+    assert not model_path.exists()
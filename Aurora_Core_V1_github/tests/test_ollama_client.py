@@ -0,0 +1,129 @@
+import json
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.pipeline.aurora_memory.ai import ollama_client
+
+
+class _FakeOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server.requests.append(body)
+        server.clients.append(self.client_address[1])
+        time.sleep(server.delay)
+        status, payload = server.reply
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        try:
+            self.end_headers()
+            self.wfile.write(data)
+        except BrokenPipeError:
+            # The client timed out and left.
+            return
+        # Closed without "Connection: close": the client keeps a stale socket.
+        self.close_connection = server.drop_after_reply
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(monkeypatch, reply=(200, {"response": " ok "}), delay=0.0, drop_after_reply=False):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOllama)
+    server.daemon_threads = True
+    server.requests, server.clients = [], []
+    server.reply, server.delay = reply, delay
+    server.drop_after_reply = drop_after_reply
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _use_port(monkeypatch, server.server_address[1])
+    return server
+
+
+def _use_port(monkeypatch, port):
+    ollama_client._drop_connection()
+    monkeypatch.setattr(ollama_client, "OLLAMA_PORT", port)
+    monkeypatch.setattr(ollama_client, "_api_down_until", 0.0)
+    cli_calls = []
+
+    def fake_cli(prompt, json_mode=False):
+        cli_calls.append(prompt)
+        return "cli"
+
+    monkeypatch.setattr(ollama_client, "_run_ollama", fake_cli)
+    return cli_calls
+
+
+def _stop(server):
+    ollama_client._drop_connection()
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_success_and_error_status(monkeypatch):
+    server = _serve(monkeypatch)
+    try:
+        assert ollama_client.ask_ollama("ola", json_mode=True) == "ok"
+        assert server.requests[0]["format"] == "json"
+        assert server.requests[0]["stream"] is False
+
+        server.reply = (500, {"error": "model not found"})
+        assert ollama_client.ask_ollama("de novo").startswith("error:http_500")
+        # Both went over one kept-alive connection; a non-200 is not a reason
+        # to try the CLI.
+        assert len(server.requests) == 2 and len(set(server.clients)) == 1
+        assert ollama_client._api_down_until == 0.0
+    finally:
+        _stop(server)
+
+
+def test_stale_keep_alive_socket_is_retried_once(monkeypatch):
+    server = _serve(monkeypatch, drop_after_reply=True)
+    try:
+        assert ollama_client.ask_ollama("primeiro") == "ok"
+        time.sleep(0.05)
+        assert ollama_client.ask_ollama("segundo") == "ok"
+        assert [r["prompt"] for r in server.requests] == ["primeiro", "segundo"]
+        assert len(set(server.clients)) == 2
+        assert ollama_client._api_down_until == 0.0
+    finally:
+        _stop(server)
+
+
+def test_unreachable_api_falls_back_to_cli_and_cools_down(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    cli_calls = _use_port(monkeypatch, port)
+    connects = []
+    real_connection = ollama_client._connection
+    monkeypatch.setattr(ollama_client, "_connection", lambda: connects.append(1) or real_connection())
+
+    assert ollama_client.ask_ollama("um") == "cli"
+    assert ollama_client.ask_ollama("dois") == "cli"
+    # The second call did not wait on the API again.
+    assert connects == [1]
+    assert cli_calls == ["um", "dois"]
+
+
+def test_timeout_is_an_error_without_cli_fallback(monkeypatch):
+    server = _serve(monkeypatch, delay=0.5)
+    monkeypatch.setattr(ollama_client, "HTTP_TIMEOUT_S", 0.1)
+    try:
+        assert ollama_client.ask_ollama("lento") == "error:http_timeout"
+        assert len(server.requests) == 1
+        assert ollama_client._api_down_until == 0.0
+    finally:
+        _stop(server)
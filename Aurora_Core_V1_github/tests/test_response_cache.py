@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.decision_layer import response_cache
+
+
+def _isolate(monkeypatch, tmp_path):
+    monkeypatch.setattr(response_cache, "CACHE_PATH", tmp_path / "response_cache.json")
+    monkeypatch.setattr(response_cache, "MEMORY_DIR", tmp_path)
+    monkeypatch.setattr(response_cache, "_caches", {})
+
+
+def test_key_normalizes_input_and_tracks_memory_context():
+    a = response_cache.make_key("m", "chat", "natural", "Qual é  o status?", "ctx")
+    b = response_cache.make_key("m", "chat", "natural", "qual e o status", "ctx")
+    c = response_cache.make_key("m", "chat", "natural", "qual e o status", "ctx2")
+    assert a == b
+    assert a != c
+
+
+def test_put_get_persists_and_evicts(monkeypatch, tmp_path):
+    _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_MAX_ENTRIES", 2)
+    response_cache.put("k1", "r1")
+    response_cache.put("k2", "r2")
+    assert response_cache.get("k1") == "r1"
+    response_cache.put("k3", "r3")
+    assert response_cache.get("k2") is None
+
+    monkeypatch.setattr(response_cache, "_caches", {})
+    assert response_cache.get("k1") == "r1"
+    assert response_cache.get("k3") == "r3"
+
+
+def test_expired_entries_are_dropped(monkeypatch, tmp_path):
+    _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_TTL_S", -1)
+    response_cache.put("k1", "r1")
+    assert response_cache.get("k1") is None
+
+
+def test_namespaces_have_separate_caches(monkeypatch, tmp_path):
+    _isolate(monkeypatch, tmp_path)
+    response_cache.put("k1", "padrao")
+    response_cache.put("k1", "acme", namespace="acme")
+    assert response_cache.get("k1") == "padrao"
+    assert response_cache.get("k1", namespace="acme") == "acme"
+    assert response_cache.get("k1", namespace="globex") is None
+    assert (tmp_path / "tenants" / "acme" / "response_cache.json").exists()
+
+    monkeypatch.setattr(response_cache, "_caches", {})
+    assert response_cache.preload(namespace="acme") == 1
+    response_cache.clear(namespace="acme")
+    assert response_cache.get("k1", namespace="acme") is None
+    assert response_cache.get("k1") == "padrao"
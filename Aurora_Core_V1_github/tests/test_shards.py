@@ -0,0 +1,90 @@
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.memory import loader, shards
+
+WORDS = [
+    "servidor", "backup", "equipe", "design", "contrato", "fornecedor", "banco", "dados",
+    "viagem", "lisboa", "corrida", "treino", "projeto", "eclipse", "orcamento", "cliente",
+    "roteador", "senha", "familia", "jantar", "estudos", "estatistica", "carro", "oficina",
+]
+
+
+def _isolate(monkeypatch, tmp_path):
+    memory_dir = tmp_path / "memory"
+    monkeypatch.setattr(loader, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(loader, "INDEX_PATH", memory_dir / "memory_index.json")
+    monkeypatch.setattr(loader, "CANONICAL_DIR", memory_dir / "canonical")
+    monkeypatch.setattr(loader, "RETRIEVAL_STATS_PATH", memory_dir / "retrieval_stats.json")
+    monkeypatch.setattr(loader, "SHARDS_DIR", memory_dir / "index_shards")
+    rng = random.Random(7)
+    for mem_type in ("short_term", "long_term"):
+        folder = memory_dir / mem_type
+        folder.mkdir(parents=True)
+        for n in range(150):
+            words = rng.choices(WORDS, k=rng.randint(3, 12))
+            (folder / f"{mem_type}_nota{n}.txt").write_text(" ".join(words), encoding="utf-8")
+    loader.build_memory_index(force=True)
+    return memory_dir
+
+
+def test_sharded_search_matches_in_process_search(monkeypatch, tmp_path):
+    memory_dir = _isolate(monkeypatch, tmp_path)
+    queries = [
+        ("backup do servidor", None),
+        ("viagem para lisboa com a familia", ["long_term"]),
+        ("treino de corrida e carro na oficina", ["short_term"]),
+        ("palavra inexistente", None),
+    ]
+    expected = [loader.search_memory(q, types=t, top_k=10) for q, t in queries]
+    assert any(expected)
+
+    monkeypatch.setattr(shards, "SHARDED_SEARCH_MIN_DOCS", 1)
+    monkeypatch.setattr(shards, "SHARD_DOCS", 40)
+    for workers in (1, 2):
+        monkeypatch.setattr(shards, "SEARCH_WORKERS", workers)
+        loader.evict_namespace()
+        assert [loader.search_memory(q, types=t, top_k=10) for q, t in queries] == expected
+    shards.shutdown_pool()
+
+    # One directory per index version: 4 shards per type, df files, vocabulary.
+    (version_dir,) = [p for p in (memory_dir / "index_shards").iterdir() if p.is_dir()]
+    assert len(list(version_dir.glob("short_term_*.bin"))) == 4
+    assert (version_dir / "df_long_term.bin").exists()
+
+
+def test_concurrent_builds_and_build_failures(monkeypatch, tmp_path):
+    memory_dir = _isolate(monkeypatch, tmp_path)
+    monkeypatch.setattr(shards, "SHARDED_SEARCH_MIN_DOCS", 1)
+    monkeypatch.setattr(shards, "SEARCH_WORKERS", 1)
+    base = memory_dir / "index_shards"
+    state = loader._loaded_index(None)
+    # Another process's build in progress and an older version.
+    (base / f"{state['version'][0]}_{state['version'][1]}.tmp99999").mkdir(parents=True)
+    (base / "1_10").mkdir()
+
+    first = shards.build_shards(state["entries"], base, state["version"], loader._tokenize)
+    # A set that is already there is reused instead of being replaced.
+    assert shards.build_shards(state["entries"], base, state["version"], loader._tokenize) == first
+    assert sorted(p.name for p in base.iterdir() if p.is_dir()) == [
+        f"{state['version'][0]}_{state['version'][1]}",
+        f"{state['version'][0]}_{state['version'][1]}.tmp99999",
+    ]
+
+    # A set that cannot be built falls back to the in-process search.
+    expected = loader.search_memory("backup do servidor", top_k=5)
+    assert expected
+    loader.evict_namespace()
+
+    def fail(*_args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(shards.ShardSet, "open", classmethod(lambda cls, b, v: None))
+    monkeypatch.setattr(shards, "build_shards", fail)
+    assert loader.search_memory("backup do servidor", top_k=5) == expected
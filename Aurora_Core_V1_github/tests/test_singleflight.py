@@ -0,0 +1,103 @@
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def upstream():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "ok"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", upstream)))
+    leader.start()
+    while not flights._flights:
+        pass
+    followers = [
+        threading.Thread(target=lambda: results.append(flights.do("k", upstream)))
+        for _ in range(3)
+    ]
+    for t in followers:
+        t.start()
+    release.set()
+    for t in [leader, *followers]:
+        t.join(timeout=5)
+
+    assert calls == [1]
+    assert results == ["ok"] * 4
+    assert flights.do("k", lambda: "fresh") == "fresh"
+
+
+def test_stream_fans_out_chunks_to_followers():
+    flights = SingleFlight()
+    gate = threading.Event()
+
+    def upstream():
+        yield "a"
+        gate.wait(timeout=5)
+        yield "b"
+
+    leader = flights.stream("k", upstream)
+    assert next(leader) == "a"
+    follower_out = []
+    follower = threading.Thread(target=lambda: follower_out.extend(flights.stream("k", upstream)))
+    follower.start()
+    gate.set()
+    assert list(leader) == ["b"]
+    follower.join(timeout=5)
+    assert follower_out == ["a", "b"]
+
+
+def test_abandoned_leader_does_not_block_followers():
+    flights = SingleFlight()
+
+    def upstream():
+        yield "a"
+        yield "b"
+
+    # Never iterated: it must not hold the key.
+    idle = flights.stream("k", upstream)
+    out = []
+    follower = threading.Thread(target=lambda: out.extend(flights.stream("k", upstream)), daemon=True)
+    follower.start()
+    follower.join(timeout=5)
+    assert not follower.is_alive()
+    assert out == ["a", "b"]
+    assert list(idle) == ["a", "b"]
+
+    # Leader gives up after the first chunk: followers get what was produced
+    # and an error instead of waiting forever.
+    leader = flights.stream("k", upstream)
+    assert next(leader) == "a"
+    follower_out, errors = [], []
+    received = threading.Event()
+
+    def follow():
+        try:
+            for chunk in flights.stream("k", upstream):
+                follower_out.append(chunk)
+                received.set()
+        except RuntimeError as e:
+            errors.append(e)
+
+    follower = threading.Thread(target=follow, daemon=True)
+    follower.start()
+    # Joined once it has received the chunk already produced.
+    assert received.wait(5)
+    leader.close()
+    follower.join(timeout=5)
+    assert not follower.is_alive()
+    assert follower_out == ["a"] and len(errors) == 1
+    assert not flights._flights
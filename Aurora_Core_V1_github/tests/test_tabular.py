@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.decision_layer import tabular
+
+
+def _write_csv(path: Path) -> None:
+    rows = ["regiao;valor;status"]
+    for i in range(300):
+        regiao = "sul" if i % 3 == 0 else "norte"
+        status = "pago" if i % 2 else "aberto"
+        rows.append(f"{regiao};{i},5;{status}")
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+
+def test_parse_query_extracts_aggregation_and_filters():
+    spec = tabular.parse_query("some valor de vendas.csv agrupado por regiao onde status=pago")
+    assert spec["file"] == "vendas.csv"
+    assert spec["agg"] == "sum"
+    assert spec["agg_column"] == "valor"
+    assert spec["group_by"] == "regiao"
+    assert spec["filters"] == [("status", "=", "pago")]
+
+
+def test_parallel_scan_matches_serial(monkeypatch, tmp_path):
+    path = tmp_path / "vendas.csv"
+    _write_csv(path)
+    spec = tabular.parse_query("some valor de vendas.csv agrupado por regiao onde status=pago")
+
+    serial = tabular.run_query(path, spec, workers=1)
+    monkeypatch.setattr(tabular, "PARALLEL_MIN_BYTES", 0)
+    parallel = tabular.run_query(path, spec, workers=3)
+
+    assert serial["matched"] == 150
+    assert serial["groups"] == parallel["groups"]
+    assert serial["sum"] == parallel["sum"]
+    summary = tabular.summarize_result("vendas.csv", serial)
+    assert "Agrupado por regiao" in summary
+    assert "300" in summary
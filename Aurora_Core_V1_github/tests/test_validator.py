@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.pipeline.aurora_memory.ingest.validator import check_file
+
+
+def test_check_file_validates_name_length_and_range(tmp_path):
+    path = tmp_path / "conversa_01_01_2026.txt"
+    path.write_text(">>> mensagem com conteudo suficiente", encoding="utf-8")
+    assert check_file(path) == (True, None)
+    assert check_file(path, 0, 5) == (False, "Conteudo muito curto")
+    other = tmp_path / "sem_data.txt"
+    other.write_text(">>> mensagem com conteudo suficiente", encoding="utf-8")
+    assert check_file(other) == (False, "Nome de arquivo invalido")
+
+
+def test_check_file_rejects_invalid_utf8_past_the_first_chunk(tmp_path):
+    path = tmp_path / "conversa_01_01_2026.txt"
+    path.write_bytes(b">>> mensagem valida no inicio\n" * 10 + b">>> \xff\xfe quebrado")
+    ok, reason = check_file(path, chunk_bytes=64)
+    assert not ok
+    assert reason.startswith("Erro ao ler arquivo")
+    # A multi-byte character split across two chunks is fine.
+    path.write_bytes(("a" * 63 + "ção e mais texto").encode("utf-8"))
+    assert check_file(path, chunk_bytes=64) == (True, None)
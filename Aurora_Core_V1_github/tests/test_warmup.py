@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from aurora_core.core import warmup
+from aurora_core.memory import loader
+
+
+def test_warmup_builds_index_and_reports_readiness(monkeypatch, tmp_path):
+    memory_dir = tmp_path / "memory"
+    (memory_dir / "long_term").mkdir(parents=True)
+    (memory_dir / "long_term" / "long_term_a.txt").write_text("plano de carreira em dados", encoding="utf-8")
+    monkeypatch.setattr(loader, "MEMORY_DIR", memory_dir)
+    monkeypatch.setattr(loader, "INDEX_PATH", memory_dir / "memory_index.json")
+    monkeypatch.setattr(loader, "CANONICAL_DIR", memory_dir / "canonical")
+    preloads = []
+    monkeypatch.setattr(warmup, "preload_model", lambda: preloads.append(True))
+
+    ready = []
+    w = warmup.WarmUp(on_ready=ready.append).start()
+    assert w.wait_memory(timeout=5)
+    assert w.done.wait(timeout=5)
+    assert ready == [w] and preloads == [True]
+    assert (memory_dir / "memory_index.json").exists()
+    assert (memory_dir / "canonical" / "long_term.txt").exists()
+    status = w.status()
+    assert "pronto" in status and "1 itens" in status and "modelo: carregado" in status